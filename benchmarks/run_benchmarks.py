@@ -0,0 +1,332 @@
+'''Endpoint benchmarks with regression checks against a stored baseline
+
+Run from the project root:
+
+    python -m benchmarks.run_benchmarks                   # compare with benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --write-baseline  # record a new baseline
+
+A synthetic dataset is generated into a temporary SQLite file unless
+--database-uri points at an existing database.
+'''
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+RAW_DECK_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'raw_import_data', 'raw_deck.txt')
+
+# Volumes for the generated dataset, passed to seed_synthetic()
+DATASET = {
+    'sets': 20,
+    'cards': 2000,
+    'decks': 500,
+    'deckcards': 30000,
+    'battlelogs': 1000,
+    'ratings': 5000,
+    'seed': 0
+}
+
+# Allowed growth over the baseline before a benchmark counts as a regression:
+# latency and memory as ratios of the baseline p95 / peak, queries as extra queries.
+# p95 must also grow by more than latency_slack_ms, so sub-millisecond jitter on
+# fast endpoints does not fail the run.
+DEFAULT_THRESHOLDS = {
+    'latency_ratio': 1.5,
+    'latency_slack_ms': 5.0,
+    'memory_ratio': 1.5,
+    'extra_queries': 0
+}
+WARMUP_ITERATIONS = 3
+
+
+class Context:
+    """Data the benchmark requests draw on, read from the seeded database"""
+
+    def __init__(self, deck_ids, format_id, deckbox_id, cardset_id, job_id, deck_cards, raw_deck, template):
+        self.deck_ids = deck_ids
+        self.format_id = format_id
+        self.deckbox_id = deckbox_id
+        self.cardset_id = cardset_id
+        self.job_id = job_id
+        self.deck_cards = deck_cards
+        self.raw_deck = raw_deck
+        self.template = template
+
+    def deck(self, i):
+        """Pick a deck ID for iteration i, cycling through the library"""
+        return self.deck_ids[i * 7 % len(self.deck_ids)]
+
+    def battlelog(self, i):
+        """Return (player, log text) with an opponent name unique to this run and iteration"""
+        text, players = self.template
+        player, opponent = players[0], players[1]
+        return player, text.replace(opponent, f'Bench{time.time_ns()}x{i}')
+
+
+def _battlelog_import(client, ctx, i):
+    player, text = ctx.battlelog(i)
+    return client.post(f'/api/battlelogs/import/{ctx.deck(i)}/{player}', data=text)
+
+
+def _deckcard_update(client, ctx, i):
+    # Alternate quantities so every request writes
+    deck_id = ctx.deck(i)
+    updates = [{'card_id': card_id, 'quantity': i % 2 + 1} for card_id in ctx.deck_cards[deck_id][:10]]
+    return client.patch(f'/api/deckcards/{deck_id}', json=updates)
+
+
+OK = (200, 201)
+
+# (name, callable(client, context, iteration) -> response, acceptable status codes)
+BENCHMARKS = [
+    ('deck_import', lambda client, ctx, i: client.post(
+        f'/api/decks/import/Bench{i}/{ctx.format_id}/{ctx.deckbox_id}', data=ctx.raw_deck), OK),
+    ('battlelog_import', _battlelog_import, OK),
+    # Synthetic decks are not all legal, so a 422 verdict is a valid answer
+    ('deck_validate', lambda client, ctx, i: client.get(f'/api/decks/validate/{ctx.deck(i)}'), (200, 422)),
+    ('deck_export', lambda client, ctx, i: client.get(f'/api/decks/{ctx.deck(i)}/export'), OK),
+    ('deck_list_page', lambda client, ctx, i: client.get('/api/decks/?limit=50'), OK),
+    ('deck_search', lambda client, ctx, i: client.get(f'/api/decks/search?format={ctx.format_id}&limit=50'), OK),
+    ('card_search', lambda client, ctx, i: client.get('/api/cards/search?name=char&limit=50'), OK),
+    ('deck_battlelogs', lambda client, ctx, i: client.get(f'/api/battlelogs/deck/{ctx.deck(i)}?limit=50'), OK),
+    ('top_rated', lambda client, ctx, i: client.get('/api/decks/top-rated?limit=10'), OK),
+    ('rating_range', lambda client, ctx, i: client.get('/api/decks/filter/by-rating-range?min=3.5&max=4.5'), OK),
+    ('type_popularity', lambda client, ctx, i: client.get('/api/cardtypes/popularity-in-decks'), OK),
+    ('deckbox_list', lambda client, ctx, i: client.get('/api/deckboxes/?limit=50'), OK),
+    ('deckbox_decks', lambda client, ctx, i: client.get(f'/api/deckboxes/{ctx.deckbox_id}/decks'), OK),
+    ('cardset_list', lambda client, ctx, i: client.get('/api/cardsets/?limit=50'), OK),
+    ('cardset_cards', lambda client, ctx, i: client.get(f'/api/cardsets/{ctx.cardset_id}/cards'), OK),
+    ('set_distribution', lambda client, ctx, i: client.get('/api/cardsets/stats/card-distribution'), OK),
+    ('format_list', lambda client, ctx, i: client.get('/api/formats/'), OK),
+    ('deckcard_list', lambda client, ctx, i: client.get(f'/api/deckcards/{ctx.deck(i)}/cards'), OK),
+    ('deckcard_update', _deckcard_update, OK),
+    ('job_status', lambda client, ctx, i: client.get(f'/api/jobs/{ctx.job_id}'), OK),
+]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def build_app(database_uri):
+    """Create the app against database_uri with SQL echo turned off"""
+    os.environ['DATABASE_URI'] = database_uri
+    from main import create_app
+    from init import db
+
+    app = create_app()
+    app.config['SQLALCHEMY_ECHO'] = False
+    with app.app_context():
+        db.engine.echo = False
+    return app
+
+
+def seed_dataset(app):
+    """Create the tables and fill them with the benchmark dataset"""
+    from init import db
+    from utils.synthetic import seed_synthetic
+
+    with app.app_context():
+        db.create_all()
+        seed_synthetic(db.session, **DATASET)
+
+
+def load_context(app):
+    """
+    Read deck IDs and lookup rows the benchmarks need.
+
+    A finished import job is recorded when the database has none, so job
+    polling can be measured without running background imports.
+    """
+    from init import db
+    from models import CardSet, Deck, DeckBox, DeckCard, Format, ImportJob
+    from utils.synthetic import load_templates
+
+    with app.app_context():
+        deck_ids = list(db.session.scalars(db.select(Deck.id).order_by(Deck.id).limit(1000)))
+        format_id = db.session.scalar(db.select(Format.id).order_by(Format.id))
+        deckbox_id = db.session.scalar(db.select(DeckBox.id).order_by(DeckBox.id))
+        cardset_id = db.session.scalar(db.select(CardSet.id).order_by(CardSet.id))
+        deck_cards = {deck_id: [] for deck_id in deck_ids}
+        for deck_id, card_id in db.session.execute(
+            db.select(DeckCard.deck_id, DeckCard.card_id)
+            .where(DeckCard.deck_id.in_(deck_ids))
+            .order_by(DeckCard.deck_id, DeckCard.id)
+        ):
+            deck_cards[deck_id].append(card_id)
+        job_id = db.session.scalar(db.select(ImportJob.id).order_by(ImportJob.created_at.desc()))
+        if job_id is None:
+            job_id = 'benchmark'
+            db.session.add(ImportJob(
+                id=job_id, kind='deck', status='succeeded', progress=1,
+                status_code=201, result={'message': 'Benchmark job'}
+            ))
+            db.session.commit()
+    with open(RAW_DECK_PATH, encoding='utf-8') as f:
+        raw_deck = f.read()
+    return Context(
+        deck_ids, format_id, deckbox_id, cardset_id, job_id, deck_cards, raw_deck, load_templates()[0]
+    )
+
+
+def run_benchmark(app, client, ctx, request, ok_statuses, iterations, memory_iterations):
+    """
+    Time one benchmark and count its queries, then measure peak memory separately.
+
+    A few untimed requests run first so one-off costs such as statement
+    compilation and cold caches do not land in the timings.
+
+    Returns:
+        dict: p50/p95/p99 latency in ms, mean queries per request, peak memory
+            in KiB, and any unexpected status codes
+    """
+    from sqlalchemy import event
+    from init import db
+
+    queries = [0]
+
+    def count(*args):
+        queries[0] += 1
+
+    with app.app_context():
+        engine = db.engine
+    for i in range(WARMUP_ITERATIONS):
+        request(client, ctx, -1 - i)
+
+    event.listen(engine, 'before_cursor_execute', count)
+    latencies, query_counts, unexpected = [], [], set()
+    try:
+        for i in range(iterations):
+            queries[0] = 0
+            start = time.perf_counter()
+            response = request(client, ctx, i)
+            latencies.append((time.perf_counter() - start) * 1000)
+            query_counts.append(queries[0])
+            if response.status_code not in ok_statuses:
+                unexpected.add(response.status_code)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+
+    tracemalloc.start()
+    try:
+        for i in range(iterations, iterations + memory_iterations):
+            request(client, ctx, i)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'queries': round(sum(query_counts) / len(query_counts), 2),
+        'peak_kib': round(peak / 1024, 1),
+        'unexpected_statuses': sorted(unexpected)
+    }
+
+
+def compare(results, baseline, thresholds):
+    """
+    List the benchmarks that regressed against the baseline.
+
+    Returns:
+        list: Human-readable regression messages
+    """
+    regressions = []
+    for name, result in results.items():
+        if result['unexpected_statuses']:
+            regressions.append(f"{name}: unexpected status {result['unexpected_statuses']}")
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        allowed_p95 = max(
+            previous['p95_ms'] * thresholds['latency_ratio'],
+            previous['p95_ms'] + thresholds['latency_slack_ms']
+        )
+        if result['p95_ms'] > allowed_p95:
+            regressions.append(f"{name}: p95 {result['p95_ms']}ms vs baseline {previous['p95_ms']}ms")
+        if result['queries'] > previous['queries'] + thresholds['extra_queries']:
+            regressions.append(f"{name}: {result['queries']} queries/request vs baseline {previous['queries']}")
+        if result['peak_kib'] > previous['peak_kib'] * thresholds['memory_ratio']:
+            regressions.append(f"{name}: peak {result['peak_kib']}KiB vs baseline {previous['peak_kib']}KiB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-uri', help='Benchmark an existing database instead of a generated one')
+    parser.add_argument('--iterations', type=int, default=30, help='Timed requests per benchmark')
+    parser.add_argument('--memory-iterations', type=int, default=3, help='Requests traced for peak memory')
+    parser.add_argument('--only', action='append', help='Run only this benchmark (repeatable)')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline JSON to compare with')
+    parser.add_argument('--write-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--output', help='Also write the results as JSON to this path')
+    parser.add_argument('--latency-ratio', type=float, help='Override the allowed p95 growth ratio')
+    parser.add_argument('--latency-slack-ms', type=float, help='Override the p95 growth always allowed, in ms')
+    parser.add_argument('--memory-ratio', type=float, help='Override the allowed peak memory growth ratio')
+    parser.add_argument('--extra-queries', type=float, help='Override the allowed extra queries per request')
+    args = parser.parse_args(argv)
+
+    tmpdir = None
+    database_uri = args.database_uri
+    if database_uri is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        database_uri = f"sqlite:///{os.path.join(tmpdir.name, 'benchmark.db')}"
+
+    app = build_app(database_uri)
+    if args.database_uri is None:
+        seed_dataset(app)
+    ctx = load_context(app)
+    client = app.test_client()
+
+    results = {}
+    for name, request, ok_statuses in BENCHMARKS:
+        if args.only and name not in args.only:
+            continue
+        results[name] = run_benchmark(
+            app, client, ctx, request, ok_statuses, args.iterations, args.memory_iterations
+        )
+        result = results[name]
+        print(f"{name:18} p50 {result['p50_ms']:9.2f}ms  p95 {result['p95_ms']:9.2f}ms  "
+              f"p99 {result['p99_ms']:9.2f}ms  {result['queries']:7.2f} queries  {result['peak_kib']:9.1f}KiB")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    thresholds = {**DEFAULT_THRESHOLDS, **baseline.get('thresholds', {})}
+    for key in thresholds:
+        if getattr(args, key) is not None:
+            thresholds[key] = getattr(args, key)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+    if args.write_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'thresholds': thresholds, 'dataset': DATASET, 'benchmarks': results}, f, indent=2)
+            f.write('\n')
+        print(f'Wrote baseline to {args.baseline}')
+        return 0
+
+    regressions = compare(results, baseline.get('benchmarks', {}), thresholds)
+    for message in regressions:
+        print(f'REGRESSION {message}')
+    if not baseline:
+        print('No baseline found; run with --write-baseline to record one')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
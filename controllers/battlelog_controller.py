@@ -1,12 +1,33 @@
 '''Controller for managing Battlelog operations'''
 
-from flask import Blueprint, jsonify, request
+import json
+import shutil
+from tempfile import SpooledTemporaryFile
+from flask import Blueprint, Response, current_app, jsonify, request
+from marshmallow import ValidationError
+from sqlalchemy.exc import IntegrityError
 from init import db
 from models.battlelog import Battlelog
+from models.card import Card
 from models.deck import Deck
+from models.deckcard import DeckCard
+from models.deck_battle_stats import DeckBattleStats
+from models.battle_event import BattleEvent, insert_battle_events
 from schemas.battlelog_schema import battlelog_schema, battlelogs_schema
+from schemas.battle_event_schema import battle_events_schema
+from utils.battlelog_parser import BattlelogParser, parse_battlelogs
+from utils.card_matcher import get_deck_matcher
+from utils.fast_serializer import battlelog_select, stream_mappings
+from utils.jobs import submit_job, wants_async
+from utils.pagination import keyset_paginate, keyset_requested, pagination_headers
+from utils.log_storage import RawLogWriter, compression_enabled, iter_raw_log, latest_dictionary_id, store_raw_log
+from utils.streaming import ndjson_response, wants_ndjson
 
 battlelogs = Blueprint('battlelogs', __name__, url_prefix='/battlelogs')
+
+# Bytes of a queued battle log kept in memory before spilling to disk
+SPOOL_MEMORY_LIMIT = 1024 * 1024
+
 @battlelogs.route('/', methods=['GET'])
 def get_battlelogs():
     """
@@ -15,16 +36,28 @@ def get_battlelogs():
     Query Parameters:
         page (int): Page number (default: 1)
         per_page (int): Items per page (default: 10)
+        after (int): Keyset cursor; return battle logs after this ID.
+            Using after or limit switches to keyset paging, which skips OFFSET
+        limit (int): Keyset page size
+        count (bool): Include the total with keyset paging
         
     Returns:
         200: JSON object containing:
             - battlelogs: List of battlelog objects
             - pagination: Pagination metadata
         
+        400: Invalid paging parameters
         500: Error response if retrieval fails
     """
     
     try:
+        if keyset_requested():
+            logs, pagination = keyset_paginate(db.select(Battlelog), Battlelog.id)
+            return jsonify({
+                "battlelogs": battlelogs_schema.dump(logs),
+                "pagination": pagination
+            }), 200
+
         # Get pagination parameters from query string
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
@@ -50,6 +83,8 @@ def get_battlelogs():
             }
         }), 200
 
+    except ValidationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({
             "error": "Failed to retrieve battle logs",
@@ -80,26 +115,143 @@ def get_battlelog(id):
             "details": str(e)
         }), 500 
 
+@battlelogs.route('/<int:id>/raw', methods=['GET'])
+def get_battlelog_raw(id):
+    """
+    Stream the original text of a battle log.
+    
+    Compressed logs are decompressed incrementally as the response is sent.
+    
+    Args:
+        id (int): Unique identifier of the battlelog
+        
+    Returns:
+        200: Raw battle log as text/plain
+        304: If the client's ETag matches
+        404: If battlelog not found
+        500: Error response if retrieval fails
+    """
+
+    try:
+        raw_log = iter_raw_log(id)
+        if raw_log is None:
+            return jsonify({"error": "Battle log not found"}), 404
+
+        chunks, etag = raw_log
+        response = Response(chunks, mimetype='text/plain')
+        if etag:
+            response.set_etag(etag)
+        return response.make_conditional(request)
+    except Exception as e:
+        return jsonify({
+            "error": "Failed to retrieve battle log",
+            "details": str(e)
+        }), 500
+
+@battlelogs.route('/<int:id>/events', methods=['GET'])
+def get_battlelog_events(id):
+    """
+    Get the structured events parsed from a battle log.
+    
+    Args:
+        id (int): Unique identifier of the battlelog
+        
+    Query Parameters:
+        turn (int, optional): Only return events from this turn
+        
+    Returns:
+        200: List of battle events in log order
+        404: If battlelog not found
+        500: Error response if retrieval fails
+    """
+
+    try:
+        if not db.session.get(Battlelog, id):
+            return jsonify({"error": "Battle log not found"}), 404
+
+        stmt = db.select(BattleEvent).where(BattleEvent.battlelog_id == id)
+        turn = request.args.get('turn', type=int)
+        if turn is not None:
+            stmt = stmt.where(BattleEvent.turn == turn)
+        events = db.session.scalars(stmt.order_by(BattleEvent.sequence)).all()
+        return jsonify(battle_events_schema.dump(events)), 200
+    except Exception as e:
+        return jsonify({
+            "error": "Failed to retrieve battle events",
+            "details": str(e)
+        }), 500
+
+@battlelogs.route('/events/card/<int:card_id>', methods=['GET'])
+def get_card_event_summary(card_id):
+    """
+    Count recorded battle actions involving a card.
+    
+    Args:
+        card_id (int): Unique identifier of the card
+        
+    Returns:
+        200: JSON object containing:
+            - card_id: The requested card
+            - actions: Count of events per action kind
+            - battles: Number of battle logs the card acted in
+        500: Error response if retrieval fails
+    """
+
+    try:
+        rows = db.session.execute(
+            db.select(BattleEvent.action, db.func.count(BattleEvent.id))
+            .where(BattleEvent.card_id == card_id)
+            .group_by(BattleEvent.action)
+        ).all()
+        battles = db.session.scalar(
+            db.select(db.func.count(db.distinct(BattleEvent.battlelog_id)))
+            .where(BattleEvent.card_id == card_id)
+        )
+        return jsonify({
+            "card_id": card_id,
+            "actions": dict(rows),
+            "battles": battles
+        }), 200
+    except Exception as e:
+        return jsonify({
+            "error": "Failed to summarise card events",
+            "details": str(e)
+        }), 500
+
 @battlelogs.route('/deck/<int:deck_id>', methods=['GET'])
 def get_deck_battlelogs(deck_id):
     """
     Get all battle logs for a specific deck.
     
+    Send Accept: application/x-ndjson (or ?stream=true) to stream the logs
+    one per line from a server-side cursor instead of a single JSON list.
+    
     Args:
         deck_id (int): Unique identifier of the deck
         
+    Query Parameters:
+        after (int): Keyset cursor; return battle logs after this ID
+        limit (int): Page size; paging is only applied when after or limit is given
+        count (bool): Include the total in X-Total-Count
+        
     Returns:
-        200: List of battlelog objects for the deck
-        404: If no logs found for deck
+        200: List of battlelog objects for the deck, or an NDJSON stream of them
+        400: Invalid paging parameters
+        404: If no logs found for deck (JSON responses only)
         500: Error response if retrieval fails
     """
 
     try:
+        if wants_ndjson():
+            stmt = battlelog_select().where(Battlelog.deck_id == deck_id).order_by(Battlelog.id)
+            return ndjson_response(stream_mappings(stmt))
         stmt = db.select(Battlelog).where(Battlelog.deck_id == deck_id)
-        deck_battlelogs = db.session.execute(stmt).scalars().all()
-        if not deck_battlelogs:
+        deck_battlelogs, pagination = keyset_paginate(stmt, Battlelog.id)
+        if not deck_battlelogs and not request.args.get('after'):
             return jsonify({"message": "No battle logs found for this deck"}), 404  # Not Found
-        return jsonify(battlelogs_schema.dump(deck_battlelogs)), 200  # OK
+        return jsonify(battlelogs_schema.dump(deck_battlelogs)), 200, pagination_headers(pagination)  # OK
+    except ValidationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({
             "error": "Failed to retrieve deck battle logs",
@@ -135,6 +287,7 @@ def get_deck_stats(deck_id):
             - losses: Number of defeats
             - win_rate: Percentage of games won
             - avg_turns: Average game duration in turns
+            - last_played: When the latest battle was imported
         
         404: If no logs found for deck
         
@@ -142,21 +295,21 @@ def get_deck_stats(deck_id):
     """
 
     try:
-        stmt = db.select(Battlelog).where(Battlelog.deck_id == deck_id)
-        battlelogs = db.session.execute(stmt).scalars().all()
+        deck_stats = db.session.get(DeckBattleStats, deck_id)
 
-        if not battlelogs:
+        if not deck_stats or not deck_stats.games:
             return jsonify({"message": "No battle data found for this deck"}), 404
     
-        total_games = len(battlelogs)
-        wins = sum(1 for log in battlelogs if log.win_loss)
+        total_games = deck_stats.games
+        wins = deck_stats.wins
 
         stats = {
             "total_games": total_games,
             "wins": wins,
             "losses": total_games - wins,
             "win_rate": round((wins / total_games) * 100, 2),
-            "avg_turns": round(sum(log.total_turns for log in battlelogs) / total_games)
+            "avg_turns": round(deck_stats.turn_sum / total_games),
+            "last_played": deck_stats.last_played
         }
 
         return jsonify(stats)
@@ -172,10 +325,17 @@ def import_battlelog(deck_id, player_name):
     """
     Import and process a battle log.
     
+    The request body is read line by line and never held in memory as a
+    whole; statistics, events and the duplicate-check hash are computed in
+    the same pass.
+    
     Args:
         deck_id (int): Unique identifier of the deck used
         player_name (str): Name of the player in the battle
         
+    Query Parameters:
+        async (bool): Queue the import as a background job (default: ASYNC_IMPORTS)
+        
     Request Body:
         Raw text content of the battle log
         
@@ -185,6 +345,8 @@ def import_battlelog(deck_id, player_name):
             - id: New battlelog ID
             - stats: Processed battle statistics
         
+        202: Import queued; poll /api/jobs/{job_id} for the result
+        
         400: If log validation fails
         
         404: If deck not found
@@ -193,119 +355,265 @@ def import_battlelog(deck_id, player_name):
         
         500: Error response if import fails
     """
+
+    try:
+        if wants_async():
+            # Spool the body so the worker can read it after the request ends
+            spool = SpooledTemporaryFile(max_size=SPOOL_MEMORY_LIMIT)
+            shutil.copyfileobj(request.stream, spool)
+            size = spool.tell()
+            spool.seek(0)
+            job = submit_job('battlelog', run_battlelog_import, deck_id, player_name, spool, size, cleanup=spool.close)
+            return jsonify({"message": "Battle log import queued", "job_id": job.id}), 202  # Accepted
+
+        body, status_code = run_battlelog_import(deck_id, player_name, request.stream)
+        return jsonify(body), status_code
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            "error": "Failed to import battle log",
+            "details": str(e)
+        }), 500
+
+
+def deck_card_names(deck_id):
+    """
+    Load the names of every card in a deck with one query.
+    
+    Parameters:
+        deck_id (int): Deck to read
+        
+    Returns:
+        frozenset: Card names in the deck
+    """
+    return frozenset(db.session.scalars(
+        db.select(Card.name).join(DeckCard, DeckCard.card_id == Card.id).where(DeckCard.deck_id == deck_id)
+    ))
+
+
+def run_battlelog_import(deck_id, player_name, lines, size=None, progress=None):
+    """
+    Import one battle log read line by line.
+    
+    Shared by the synchronous endpoint and background import jobs.
+    
+    Args:
+        deck_id (int): Unique identifier of the deck used
+        player_name (str): Name of the player in the battle
+        lines (iterable): Log lines as bytes, including newlines
+        size (int, optional): Total log size in bytes, for progress reporting
+        progress (callable, optional): Called with the fraction of the log read
+        
+    Returns:
+        tuple: (response body, HTTP status code)
+    """
     
     try:
         # Deck validation
-        deck = Deck.query.get_or_404(deck_id)  # 404 if deck not found
+        deck = db.session.get(Deck, deck_id)
+        if not deck:
+            return {"error": "Deck not found"}, 404
 
-        # Duplicate check
-        existing_log = db.session.execute(
-            db.select(Battlelog).where(
+        # Card names are only loaded when the deck's matcher is not cached
+        matcher = get_deck_matcher(deck_id, deck.content_version, lambda: deck_card_names(deck_id))
+
+        # Parse, hash and store the log in one pass as it streams in
+        parser = BattlelogParser(player_name, matcher)
+        writer = RawLogWriter()
+        bytes_read = 0
+        for line_number, raw_line in enumerate(lines, 1):
+            parser.feed(raw_line)
+            writer.write(raw_line)
+            bytes_read += len(raw_line)
+            if progress and size and line_number % 256 == 0:
+                progress(bytes_read / size)
+        log_hash = parser.sha256
+
+        # Duplicate check against the indexed content hash
+        existing_log_id = db.session.scalar(
+            db.select(Battlelog.id).where(
                 db.and_(
                     Battlelog.deck_id == deck_id,
-                    Battlelog.raw_log == request.get_data(as_text=True)
+                    Battlelog.raw_log_sha256 == log_hash
                 )
             )
-        ).scalar_one_or_none()
+        )
 
-        if existing_log:
-            return jsonify({
+        if existing_log_id:
+            return {
                 "error": "This battle log has already been imported",
-                "existing_log_id": existing_log.id
-            }), 409  # Conflict
-    
-        # Process log and create battlelog
-        log_text = request.get_data(as_text=True)
-        lines = log_text.split('\n')
-
-        # Get deck to validate against
-        deck_cards = {deckcard.card.name for deckcard in deck.deck_cards}
-
-        # Track cards and interactions
-        player_cards = set()
-        card_interactions = {}
-        current_player = None
-        card_usage_count = {}  # Track {card_name: usage_count}
-     
-        def is_meaningful_interaction(card1, card2, line):
-            # Define meaningful interactions
-            interactions = [
-                # Stadium sacrificed for attack
-                (lambda c1, c2: "Stadium" in c1 and "discarded" in line and c2 in line and "used" in line),
-                # Energy attachment and Pokemon
-                (lambda c1, c2: "Energy" in c1 and "attached" in line and c2 in line),
-                # Tool/Item card used on Pokemon
-                (lambda c1, c2: ("Tool" in c1 or "Capsule" in c1) and "attached" in line and c2 in line)
-            ]
-            return any(check(card1, card2) or check(card2, card1) for check in interactions)
-
-        for line in lines:
-            if "Turn #" in line:
-                current_player = line.split("-")[1].strip().split("'")[0]
-
-            if current_player == player_name:
-                # Check for meaningful interactions in each line
-                for card1 in deck_cards:
-                    for card2 in deck_cards:
-                        if card1 != card2 and card1 in line and card2 in line:
-                            if is_meaningful_interaction(card1, card2, line):
-                                pair = tuple(sorted([card1, card2]))
-                                card_interactions[pair] = card_interactions.get(pair, 0) + 1
+                "existing_log_id": existing_log_id
+            }, 409  # Conflict
 
-            
-            if current_player == player_name:
-                # Extract card names from the line
-                for card_name in deck_cards:  # Use deck_cards to check valid cards
-                    if card_name in line:  # Check any mention of the card
-                        card_usage_count[card_name] = card_usage_count.get(card_name, 0) + 1
-
-        key_synergy_cards = sorted(card_interactions.items(), key=lambda x: x[1], reverse=True)[:3]
-        key_synergy_cards = [list(pair[0]) for pair in key_synergy_cards]
-
-        # Validate card pools against player name
-        valid_log = all(card in deck_cards for card in player_cards)  # Using new variable name
-        if not valid_log:
-            return jsonify({"error": "Battle log doesn't match specified deck"}), 400
-
-        # Clean the lines when we first get them
-        lines = [line.strip() for line in log_text.split('\n') if line.strip()]
-
-        total_turns = len([line for line in lines if line.startswith('Turn #')])
-
-        # Then at the end, check the last actual line
-        win_loss = any(
-            condition in lines[-1] 
-            for condition in [
-                f"{player_name} wins",
-                f"Opponent conceded. {player_name} wins"
-            ]
-        )
-
-        # Get top 3 most used cards by usage count
-        most_used = sorted(card_usage_count.items(), key=lambda x: x[1], reverse=True)[:3]
-        most_used_cards = [card[0] for card in most_used]
+        try:
+            stats = parser.result()
+        except ValidationError as e:
+            return {"error": str(e)}, 400
 
         # Create new battlelog
         battlelog_data = {
             'deck_id': deck_id,
-            'win_loss': win_loss,
-            'total_turns': total_turns,
-            'most_used_cards': most_used_cards,
-            'key_synergy_cards': key_synergy_cards,
-            'raw_log': log_text
+            **stats
         }
         battlelog = Battlelog(**battlelog_data)
+        writer.store(battlelog, log_hash)
         db.session.add(battlelog)
-        db.session.commit()
-        return jsonify({
+        try:
+            db.session.flush()
+            insert_battle_events(db.session, {battlelog.id: parser.events})
+            db.session.commit()
+        except IntegrityError:
+            # Same log committed concurrently; the unique hash index caught it
+            db.session.rollback()
+            return {"error": "This battle log has already been imported"}, 409
+        return {
             "message": "Battle log imported successfully",
             "id": battlelog.id,
             "stats": battlelog_data
+        }, 201
+
+    except Exception as e:
+        db.session.rollback()
+        return {
+            "error": "Failed to import battle log",
+            "details": str(e)
+        }, 500
+
+
+def _read_batch_logs():
+    """
+    Collect the battle logs submitted to the batch import endpoint.
+    
+    Multipart uploads contribute one log per file. NDJSON bodies contribute
+    one log per line, either as a JSON string or an object with a "log" key.
+    
+    Returns:
+        list: (label, log_text) tuples in submission order
+    """
+    if request.files:
+        return [
+            (upload.filename or field, upload.read().decode('utf-8'))
+            for field, upload in request.files.items(multi=True)
+        ]
+
+    logs = []
+    body = request.get_data(as_text=True)
+    for index, line in enumerate(body.splitlines()):
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        if isinstance(entry, dict):
+            logs.append((entry.get('name', index), entry['log']))
+        else:
+            logs.append((index, entry))
+    return logs
+
+@battlelogs.route('/import/<int:deck_id>/<string:player_name>/batch', methods=['POST'])
+def import_battlelog_batch(deck_id, player_name):
+    """
+    Import many battle logs for a deck in one request.
+    
+    Logs are parsed in parallel on a process pool and every new battlelog is
+    inserted in a single transaction.
+    
+    Args:
+        deck_id (int): Unique identifier of the deck used
+        player_name (str): Name of the player in the battles
+        
+    Request Body:
+        multipart/form-data with one file per battle log, or
+        application/x-ndjson with one log per line
+        
+    Returns:
+        201: JSON object containing:
+            - message: Success confirmation
+            - imported: Number of new battlelogs
+            - results: Per-log status (imported, duplicate, invalid)
+        
+        400: If the batch is empty or malformed
+        
+        404: If deck not found
+        
+        409: If a log in the batch was imported concurrently by another request
+        
+        500: Error response if import fails
+    """
+
+    deck = Deck.query.get_or_404(deck_id)  # 404 if deck not found
+
+    try:
+        try:
+            logs = _read_batch_logs()
+        except (ValueError, KeyError, UnicodeDecodeError) as e:
+            return jsonify({"error": "Malformed battle log batch", "details": str(e)}), 400
+        if not logs:
+            return jsonify({"error": "No battle logs provided"}), 400
+
+        # Duplicate check for the whole batch in one indexed query
+        log_hashes = [Battlelog.hash_log(log_text) for _, log_text in logs]
+        existing = dict(db.session.execute(
+            db.select(Battlelog.raw_log_sha256, Battlelog.id).where(
+                db.and_(
+                    Battlelog.deck_id == deck_id,
+                    Battlelog.raw_log_sha256.in_(set(log_hashes))
+                )
+            )
+        ).all())
+
+        parsed = parse_battlelogs(
+            [log_text for _, log_text in logs],
+            player_name,
+            deck_id,
+            deck.content_version,
+            deck_card_names(deck_id),
+            max_workers=current_app.config.get('BATTLELOG_IMPORT_WORKERS')
+        )
+
+        results = []
+        new_logs = []
+        seen = {}
+        dictionary_id = latest_dictionary_id() if compression_enabled() else None
+        new_events = []
+        for (label, log_text), log_hash, (status, outcome, events) in zip(logs, log_hashes, parsed):
+            if log_hash in existing:
+                results.append({"log": label, "status": "duplicate", "existing_log_id": existing[log_hash]})
+            elif log_hash in seen:
+                results.append({"log": label, "status": "duplicate", "duplicate_of": seen[log_hash]})
+            elif status == 'invalid':
+                results.append({"log": label, "status": "invalid", "error": outcome})
+            else:
+                seen[log_hash] = label
+                battlelog = Battlelog(deck_id=deck_id, **outcome)
+                store_raw_log(battlelog, log_text, dictionary_id)
+                new_logs.append(battlelog)
+                new_events.append(events)
+                results.append({"log": label, "status": "imported", "stats": outcome})
+
+        try:
+            db.session.add_all(new_logs)
+            db.session.flush()
+            insert_battle_events(db.session, {
+                battlelog.id: events for battlelog, events in zip(new_logs, new_events)
+            })
+            db.session.commit()
+        except IntegrityError:
+            # A log was committed concurrently; the unique hash index caught it
+            db.session.rollback()
+            return jsonify({"error": "This battle log has already been imported"}), 409
+
+        battlelog_ids = iter(battlelog.id for battlelog in new_logs)
+        for result in results:
+            if result["status"] == "imported":
+                result["id"] = next(battlelog_ids)
+        return jsonify({
+            "message": "Battle log batch processed",
+            "imported": len(new_logs),
+            "results": results
         }), 201
 
     except Exception as e:
         db.session.rollback()
         return jsonify({
-            "error": "Failed to import battle log",
+            "error": "Failed to import battle log batch",
             "details": str(e)
-        }), 500 
\ No newline at end of file
+        }), 500
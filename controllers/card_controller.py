@@ -2,11 +2,19 @@
 
 from flask import Blueprint, request, jsonify
 from marshmallow import ValidationError, validates
+from sqlalchemy.exc import IntegrityError
 from init import db
+from models.battle_event import BattleEvent
 from models.card import Card
 from models.cardtype import CardType
+from models.card_legality import CardLegality
+from models.deck import bump_content_versions
 from models.deckcard import DeckCard
 from schemas.card_schema import CardSchema
+from utils.fast_serializer import fast_stream, list_response
+from utils.pagination import keyset_paginate, pagination_headers
+from utils.projection import projected_schema, projection_options, request_fields
+from utils.streaming import ndjson_response, wants_ndjson
 
 # Blueprint and Schema initialization
 card_controller = Blueprint('card_controller', __name__)
@@ -58,6 +66,7 @@ def create_card():
     Returns:
         201: Card created successfully
         400: Missing required fields
+        409: The set already has a card with this name
         500: Database operation failed
     """
     
@@ -74,6 +83,9 @@ def create_card():
         db.session.add(card)
         db.session.commit()
         return card_schema.jsonify(card), 201
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'A card with this name already exists in this set'}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to create card', 'details': str(e)}), 500
@@ -83,15 +95,30 @@ def get_all_cards():
     """
     Retrieve all Pokemon cards.
     
+    Send Accept: application/x-ndjson (or ?stream=true) to stream every card
+    one per line from a server-side cursor instead of a single JSON list.
+    
+    Query Parameters:
+        after (int): Keyset cursor; return cards after this ID
+        limit (int): Page size; paging is only applied when after or limit is given
+        count (bool): Include the total in X-Total-Count
+        fields (str): Comma-separated top-level fields to return
+        include (str): Comma-separated relationships to embed (cardtype, cardset)
+        
     Returns:
-        200: List of all cards
+        200: List of cards, with X-Next-After and Link headers when more pages remain,
+            or an NDJSON stream of cards
+        400: Invalid paging parameters or unknown fields
         500: Database query failed
     """
     
     try:
-        stmt = db.select(Card)
-        cards = db.session.scalars(stmt).all()
-        return cards_schema.jsonify(cards), 200
+        fields = request_fields('card')
+        if wants_ndjson():
+            return ndjson_response(fast_stream('card', db.select(Card), fields))
+        return list_response('card', db.select(Card), fields)
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to retrieve cards', 'details': str(e)}), 500
 
@@ -103,17 +130,26 @@ def get_one_card(card_id):
     Parameters:
         card_id (int): ID of the card to retrieve
         
+    Query Parameters:
+        fields (str): Comma-separated top-level fields to return
+        include (str): Comma-separated relationships to embed (cardtype, cardset)
+        
     Returns:
         200: Card details
+        400: Unknown fields
         404: Card not found
         500: Database query failed
     """
     
     try:
-        card = db.session.get(Card, card_id)
+        fields = request_fields('card')
+        stmt = db.select(Card).where(Card.id == card_id).options(*projection_options('card', fields))
+        card = db.session.scalar(stmt)
         if not card:
             return jsonify({'error': 'Card not found'}), 404
-        return card_schema.jsonify(card), 200
+        return projected_schema('card', fields).jsonify(card), 200
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to retrieve card', 'details': str(e)}), 500
 
@@ -134,6 +170,7 @@ def update_card(card_id):
     Returns:
         200: Card updated successfully
         404: Card not found
+        409: The set already has a card with this name
         500: Database operation failed
     """
     
@@ -154,6 +191,9 @@ def update_card(card_id):
 
         db.session.commit()
         return card_schema.jsonify(card), 200
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'A card with this name already exists in this set'}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -175,9 +215,17 @@ def delete_card(card_id):
         500: Deletion operation failed
     """
     try:
-        # First delete associated deck cards
+        # First delete associated deck cards, marking their decks as changed
+        bump_content_versions(db.session, db.select(DeckCard.deck_id).where(DeckCard.card_id == card_id))
         stmt_deckcards = db.delete(DeckCard).where(DeckCard.card_id == card_id)
         db.session.execute(stmt_deckcards)
+        db.session.execute(db.delete(CardLegality).where(CardLegality.card_id == card_id))
+
+        # Battle events keep their history but lose the reference to the card
+        db.session.execute(db.update(BattleEvent).where(BattleEvent.card_id == card_id).values(card_id=None))
+        db.session.execute(
+            db.update(BattleEvent).where(BattleEvent.target_card_id == card_id).values(target_card_id=None)
+        )
         
         # Then delete the card
         stmt_card = db.delete(Card).where(Card.id == card_id)
@@ -199,6 +247,11 @@ def filter_by_multiple_types():
     
     Query Parameters:
         types (str): Comma-separated list of card types (e.g. fire,water)
+        after (int): Keyset cursor; return cards after this ID
+        limit (int): Page size; paging is only applied when after or limit is given
+        count (bool): Include the total in X-Total-Count
+        fields (str): Comma-separated top-level fields to return
+        include (str): Comma-separated relationships to embed (cardtype, cardset)
         
     Returns:
         200: List of cards matching the specified types
@@ -209,10 +262,16 @@ def filter_by_multiple_types():
     try:
         if type_names := request.args.get('types'):
             type_list = [type_name.strip().capitalize() for type_name in type_names.split(',')]
-            stmt = db.select(Card).join(CardType).filter(CardType.name.in_(type_list))
-            cards = db.session.scalars(stmt).all()
-            return cards_schema.jsonify(cards), 200
+            fields = request_fields('card')
+            stmt = (
+                db.select(Card).join(CardType).filter(CardType.name.in_(type_list))
+                .options(*projection_options('card', fields))
+            )
+            cards, pagination = keyset_paginate(stmt, Card.id)
+            return projected_schema('card', fields, many=True).jsonify(cards), 200, pagination_headers(pagination)
         return jsonify({'error': 'No types provided'}), 400
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to filter cards', 'details': str(e)}), 500
 
@@ -223,6 +282,11 @@ def filter_by_multiple_sets():
     
     Query Parameters:
         sets (str): Comma-separated list of set IDs
+        after (int): Keyset cursor; return cards after this ID
+        limit (int): Page size; paging is only applied when after or limit is given
+        count (bool): Include the total in X-Total-Count
+        fields (str): Comma-separated top-level fields to return
+        include (str): Comma-separated relationships to embed (cardtype, cardset)
         
     Returns:
         200: List of cards from specified sets
@@ -233,10 +297,13 @@ def filter_by_multiple_sets():
     try:
         if set_ids := request.args.get('sets'):
             set_id_list = [int(id) for id in set_ids.split(',')]
-            stmt = db.select(Card).filter(Card.cardset_id.in_(set_id_list))
-            cards = db.session.scalars(stmt).all()
-            return cards_schema.jsonify(cards), 200
+            fields = request_fields('card')
+            stmt = db.select(Card).filter(Card.cardset_id.in_(set_id_list)).options(*projection_options('card', fields))
+            cards, pagination = keyset_paginate(stmt, Card.id)
+            return projected_schema('card', fields, many=True).jsonify(cards), 200, pagination_headers(pagination)
         return jsonify({'error': 'No set IDs provided'}), 400
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to filter cards', 'details': str(e)}), 500
 
@@ -249,13 +316,20 @@ def search_cards():
         name (str, optional): Card name pattern to search for (case insensitive)
         cardtype (str, optional): Card type name pattern to filter by (case insensitive)
         cardset_id (int, optional): Exact set ID to filter by
+        format_id (int, optional): Only cards legal in this format
+        after (int): Keyset cursor; return cards after this ID
+        limit (int): Page size; paging is only applied when after or limit is given
+        count (bool): Include the total in X-Total-Count
+        fields (str): Comma-separated top-level fields to return
+        include (str): Comma-separated relationships to embed (cardtype, cardset)
         
     Returns:
         200: List of matching cards with their relationships
-        400: Invalid cardset_id format
+        400: Invalid cardset_id or format_id format
         500: Search operation failed
     """    
     try:
+        fields = request_fields('card')
         stmt = db.select(Card)
         
         if name := request.args.get('name'):
@@ -268,9 +342,19 @@ def search_cards():
                 stmt = stmt.filter(Card.cardset_id == cardset_id)
             except ValueError:
                 return jsonify({'error': 'Invalid cardset_id format'}), 400
+        if format_id := request.args.get('format_id'):
+            try:
+                format_id = int(format_id)
+                stmt = stmt.join(CardLegality, db.and_(
+                    CardLegality.card_id == Card.id,
+                    CardLegality.format_id == format_id
+                ))
+            except ValueError:
+                return jsonify({'error': 'Invalid format_id format'}), 400
             
-        cards = db.session.scalars(stmt).all()
-        return cards_schema.jsonify(cards), 200
+        return list_response('card', stmt, fields)
     
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Search failed', 'details': str(e)}), 500
\ No newline at end of file
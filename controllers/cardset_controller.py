@@ -2,12 +2,16 @@
 
 # Third-party imports
 from flask import Blueprint, request, jsonify
+from marshmallow import ValidationError
 from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 from init import db
 from models.cardset import CardSet
 from models.card import Card
 from models.cardtype import CardType
-from schemas.cardset_schema import cardset_schema, cardsets_schema
+from schemas.cardset_schema import cardset_schema
+from utils.pagination import keyset_paginate, keyset_requested, pagination_headers
+from utils.projection import projected_schema, projection_options, request_fields
 
 cardset_controller = Blueprint('cardsets', __name__, url_prefix='/cardsets')
 
@@ -21,23 +25,37 @@ def get_all_sets():
     Query Parameters:
         page (int): Page number (default: 1)
         per_page (int): Items per page (default: 10)
+        after (int): Keyset cursor; return sets after this ID in name order.
+            Using after or limit switches to keyset paging, which skips OFFSET
+        limit (int): Keyset page size
+        count (bool): Include the total with keyset paging
+        fields (str): Comma-separated top-level fields to return
+        include (str): Comma-separated relationships to embed (cards)
         
     Returns:
         200: List of all sets with pagination metadata
+        400: Invalid paging parameters or unknown fields
         500: Database query failed
     """
     try:
+        fields = request_fields('cardset')
+        sets_schema = projected_schema('cardset', fields, many=True)
+        stmt = db.select(CardSet).options(*projection_options('cardset', fields))
+        if keyset_requested():
+            sets, pagination = keyset_paginate(stmt, CardSet.id, sort_column=CardSet.name)
+            return jsonify({"sets": sets_schema.dump(sets), "pagination": pagination}), 200
+
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
         
         pagination = db.paginate(
-            db.select(CardSet).order_by(CardSet.name),
+            stmt.order_by(CardSet.name),
             page=page,
             per_page=per_page
         )
         
         return jsonify({
-            "sets": cardsets_schema.dump(pagination.items),
+            "sets": sets_schema.dump(pagination.items),
             "pagination": {
                 "total": pagination.total,
                 "pages": pagination.pages,
@@ -45,6 +63,8 @@ def get_all_sets():
                 "per_page": per_page
             }
         }), 200
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to retrieve sets', 'details': str(e)}), 500
 
@@ -56,17 +76,25 @@ def get_set(cardset_id):
     Parameters:
         cardset_id (int): ID of the set to retrieve
         
+    Query Parameters:
+        fields (str): Comma-separated top-level fields to return
+        include (str): Comma-separated relationships to embed (cards)
+        
     Returns:
         200: Set details
+        400: Unknown fields
         404: Set not found
         500: Database query failed
     """
     try:
-        stmt = db.select(CardSet).filter_by(id=cardset_id)
+        fields = request_fields('cardset')
+        stmt = db.select(CardSet).filter_by(id=cardset_id).options(*projection_options('cardset', fields))
         set = db.session.scalar(stmt)
         if not set:
             return jsonify({'error': 'Set not found'}), 404
-        return cardset_schema.dump(set), 200
+        return projected_schema('cardset', fields).dump(set), 200
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to retrieve set', 'details': str(e)}), 500
 
@@ -169,23 +197,30 @@ def delete_set(cardset_id):
 
 @cardset_controller.route('/search/<string:name>', methods=['GET'])
 def search_by_name(name):
-    """Search for sets by name"""
-    stmt = db.select(CardSet).filter(CardSet.name.ilike(f'%{name}%'))
-    sets = db.session.scalars(stmt).all()
-    return cardsets_schema.dump(sets)
+    """Search for sets by name, keyset paged with ?after=&limit= and projected with ?fields=&include="""
+    try:
+        fields = request_fields('cardset')
+        stmt = db.select(CardSet).filter(CardSet.name.ilike(f'%{name}%')).options(*projection_options('cardset', fields))
+        sets, pagination = keyset_paginate(stmt, CardSet.id)
+    except ValidationError as e:
+        return {'error': str(e)}, 400
+    return projected_schema('cardset', fields, many=True).dump(sets), 200, pagination_headers(pagination)
 
 @cardset_controller.route('/<int:cardset_id>/cards', methods=['GET'])
 def get_cards_in_set(cardset_id):
-    """Get all cards in a specific set"""
-    stmt = db.select(CardSet).filter_by(id=cardset_id)
-    cardset = db.session.scalar(stmt)
-    if not cardset:
+    """Get all cards in a specific set, keyset paged with ?after=&limit="""
+    if db.session.get(CardSet, cardset_id) is None:
         return {'error': 'Set not found'}, 404
+    stmt = db.select(Card).filter_by(cardset_id=cardset_id).options(joinedload(Card.cardtype))
+    try:
+        cards, pagination = keyset_paginate(stmt, Card.id)
+    except ValidationError as e:
+        return {'error': str(e)}, 400
     return jsonify([{
         'id': card.id,
         'name': card.name,
         'cardtype': card.cardtype.name
-    } for card in cardset.cards])
+    } for card in cards]), 200, pagination_headers(pagination)
 
 @cardset_controller.route('/stats/card-distribution', methods=['GET'])
 def get_card_distribution():
@@ -1,13 +1,16 @@
 '''Controller for managing Pokemon TCG card type operations'''
 
 from flask import Blueprint, jsonify
+from marshmallow import ValidationError
 from sqlalchemy import desc, func, text
+from sqlalchemy.orm import joinedload
 from init import db
 from models.cardtype import CardType
 from models.card import Card
 from models.cardset import CardSet
 from models.deckcard import DeckCard
 from schemas.cardtype_schema import cardtype_schema, cardtypes_schema
+from utils.pagination import keyset_paginate, pagination_headers
 
 cardtype_controller = Blueprint('cardtypes', __name__, url_prefix='/cardtypes')
 
@@ -16,14 +19,22 @@ def get_all_types():
     """
     Retrieve all card types.
     
+    Query Parameters:
+        after (int): Keyset cursor; return card types after this ID
+        limit (int): Page size; paging is only applied when after or limit is given
+        count (bool): Include the total in X-Total-Count
+        
     Returns:
         200: List of all card types
+        400: Invalid paging parameters
         500: Database query failed
     """
     try:
         stmt = db.select(CardType)
-        types = db.session.scalars(stmt).all()
-        return cardtypes_schema.dump(types), 200
+        types, pagination = keyset_paginate(stmt, CardType.id)
+        return cardtypes_schema.dump(types), 200, pagination_headers(pagination)
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to retrieve card types', 'details': str(e)}), 500
 
@@ -35,14 +46,22 @@ def search_by_name(name):
     Parameters:
         name (str): Name pattern to search for
         
+    Query Parameters:
+        after (int): Keyset cursor; return card types after this ID
+        limit (int): Page size; paging is only applied when after or limit is given
+        count (bool): Include the total in X-Total-Count
+        
     Returns:
         200: List of matching card types
+        400: Invalid paging parameters
         500: Search operation failed
     """
     try:
         stmt = db.select(CardType).filter(CardType.name.ilike(f'%{name}%'))
-        types = db.session.scalars(stmt).all()
-        return cardtypes_schema.dump(types), 200
+        types, pagination = keyset_paginate(stmt, CardType.id)
+        return cardtypes_schema.dump(types), 200, pagination_headers(pagination)
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to search card types', 'details': str(e)}), 500
 
@@ -54,22 +73,31 @@ def get_cards_by_type(cardtype_id):
     Parameters:
         cardtype_id (int): ID of the card type
         
+    Query Parameters:
+        after (int): Keyset cursor; return cards after this ID
+        limit (int): Page size; paging is only applied when after or limit is given
+        count (bool): Include the total in X-Total-Count
+        
     Returns:
         200: List of cards of specified type
+        400: Invalid paging parameters
         404: Card type not found
         500: Query operation failed
     """
     try:
-        stmt = db.select(CardType).filter_by(id=cardtype_id)
-        card_type = db.session.scalar(stmt)
+        card_type = db.session.get(CardType, cardtype_id)
         if not card_type:
             return jsonify({'error': 'Card type not found'}), 404
             
+        stmt = db.select(Card).filter_by(cardtype_id=cardtype_id).options(joinedload(Card.cardset))
+        cards, pagination = keyset_paginate(stmt, Card.id)
         return jsonify([{
             'id': card.id,
             'name': card.name,
             'set': card.cardset.name
-        } for card in card_type.cards]), 200
+        } for card in cards]), 200, pagination_headers(pagination)
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to retrieve cards', 'details': str(e)}), 500
 
@@ -1,6 +1,8 @@
 '''Controller for managing CLI and database initialization operations'''
 
 from datetime import date, datetime
+import json
+import click
 from flask import Blueprint, jsonify
 from flask import current_app
 from init import db
@@ -8,8 +10,23 @@ from models import Card, Deck, DeckBox, DeckCard, CardSet
 from models.format import Format
 from models.cardtype import CardType
 from models.rating import Rating
+from models.battlelog import Battlelog
+from models.deck_battle_stats import rebuild_deck_battle_stats
+from models.deck_rating_stats import rebuild_deck_rating_stats
+from models.log_dictionary import LogDictionary
+from models.battle_event import BattleEvent, insert_battle_events
+from models.card_legality import refresh_card_legality
+from utils.battlelog_parser import parse_battle_events
+from utils.deck_validation import validate_decks
+from utils.dedup import DEDUP_BATCH_SIZE, merge_duplicate_cards
+from utils.fast_serializer import dumps, fast_list
+from utils.log_storage import build_dictionary, compress_log, decode_raw_log, get_dictionary, latest_dictionary_id
+from utils.pagination import keyset_paginate
+from utils.projection import projected_schema, projection_options, request_fields
+from utils.schema_audit import missing_fk_indexes
+from utils.synthetic import seed_synthetic
 
-cli_controller = Blueprint('cli', __name__)
+cli_controller = Blueprint('cli', __name__, cli_group=None)
 
 @cli_controller.route('/run/create', methods=['POST'])
 def create_tables():
@@ -236,49 +253,27 @@ def cleanup_database():
     """
     Clean up duplicate entries in database.
     
+    Duplicate cards (same name and set) are merged into the lowest ID;
+    references are moved to the survivor before the duplicates are deleted.
+    Each batch of cards is committed separately. Card set names are unique,
+    so sets never need merging.
+    
     Returns:
         200: Cleanup completed successfully with count of removed items
         500: Cleanup operation failed
     """
     try:
-        # Clean up duplicate cards
-        stmt = (
-            db.select(Card.name, Card.cardset_id, db.func.count('*'))
-            .group_by(Card.name, Card.cardset_id)
-            .having(db.func.count('*') > 1)
-        )
-        duplicate_cards = db.session.execute(stmt).all()
-        
-        cards_deleted = 0
-        for name, cardset_id, count in duplicate_cards:
-            stmt = db.select(Card).filter_by(name=name, set_id=cardset_id).offset(1)
-            duplicates = db.session.scalars(stmt).all()
-            for card in duplicates:
-                db.session.delete(card)
-                cards_deleted += 1
-
-        # Clean up duplicate sets
-        stmt = (
-            db.select(CardSet.name, db.func.count('*'))
-            .group_by(CardSet.name)
-            .having(db.func.count('*') > 1)
-        )
-        duplicate_sets = db.session.execute(stmt).all()
-        
-        sets_deleted = 0
-        for name, count in duplicate_sets:
-            stmt = db.select(CardSet).filter_by(name=name).offset(1)
-            duplicates = db.session.scalars(stmt).all()
-            for set_ in duplicates:
-                db.session.delete(set_)
-                sets_deleted += 1
-
-        db.session.commit()
+        cards_deleted, after = 0, None
+        while True:
+            removed, after = merge_duplicate_cards(db.session, after)
+            db.session.commit()
+            cards_deleted += removed
+            if after is None:
+                break
 
         return jsonify({
             'message': 'Cleanup completed successfully!',
-            'cards_removed': cards_deleted,
-            'sets_removed': sets_deleted
+            'cards_removed': cards_deleted
         }), 200
     except Exception as e:
         db.session.rollback()
@@ -287,6 +282,202 @@ def cleanup_database():
             'details': str(e)
         }), 500
 
+@cli_controller.cli.command('seed-synthetic')
+@click.option('--sets', default=200, show_default=True, help='Card sets to create')
+@click.option('--cards', default=50000, show_default=True, help='Cards to create')
+@click.option('--decks', default=5000, show_default=True, help='Decks to create')
+@click.option('--deckcards', default=300000, show_default=True, help='Deck card rows in total (at most 60 per deck)')
+@click.option('--battlelogs', default=50000, show_default=True, help='Battle logs built from raw_import_data templates')
+@click.option('--ratings', default=100000, show_default=True, help='Ratings spread over the decks')
+@click.option('--seed', default=0, show_default=True, help='Random seed; the same seed gives the same data')
+def seed_synthetic_data(sets, cards, decks, deckcards, battlelogs, ratings, seed):
+    """
+    Bulk insert deterministic synthetic data for load testing and benchmarks.
+    """
+    counts = seed_synthetic(
+        db.session,
+        sets=sets,
+        cards=cards,
+        decks=decks,
+        deckcards=deckcards,
+        battlelogs=battlelogs,
+        ratings=ratings,
+        seed=seed,
+        progress=click.echo
+    )
+    click.echo('Seeded ' + ', '.join(f'{count} {table}' for table, count in counts.items()))
+
+@cli_controller.cli.command('dedupe-cards')
+@click.option('--batch-size', default=DEDUP_BATCH_SIZE, show_default=True, help='Duplicate groups merged per transaction')
+def dedupe_cards(batch_size):
+    """
+    Merge duplicate cards, those sharing a name and set, into their lowest ID.
+    
+    Cards are processed in batches of duplicate groups, each committed on
+    its own, so locks are short and the command can be interrupted and
+    re-run safely.
+    """
+    cards_removed, after = 0, None
+    while True:
+        removed, after = merge_duplicate_cards(db.session, after, batch_size)
+        db.session.commit()
+        cards_removed += removed
+        if after is None:
+            break
+        click.echo(f'Merged {cards_removed} duplicate cards so far')
+    click.echo(f'Removed {cards_removed} duplicate cards')
+
+@cli_controller.cli.command('backfill-log-hashes')
+@click.option('--batch-size', default=500, show_default=True, help='Rows hashed per transaction')
+def backfill_log_hashes(batch_size):
+    """
+    Fill in raw_log_sha256 for battle logs imported before hashing existed.
+    
+    Rows are processed in primary key order and committed per batch, so the
+    command can be interrupted and re-run safely. Rows without a raw log keep
+    a NULL hash, which the unique (deck_id, raw_log_sha256) index allows any
+    number of times.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            db.select(Battlelog.id, Battlelog.raw_log)
+            .where(
+                Battlelog.id > last_id,
+                Battlelog.raw_log_sha256.is_(None),
+                Battlelog.raw_log.is_not(None)
+            )
+            .order_by(Battlelog.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        db.session.execute(
+            db.update(Battlelog),
+            [
+                {'id': row.id, 'raw_log_sha256': Battlelog.hash_log(row.raw_log)}
+                for row in rows
+            ]
+        )
+        db.session.commit()
+        updated += len(rows)
+        last_id = rows[-1].id
+
+    click.echo(f'Hashed {updated} battle logs')
+
+@cli_controller.cli.command('rebuild-battle-stats')
+def rebuild_battle_stats():
+    """
+    Recompute the deck_battle_stats table from every stored battle log.
+    """
+    decks = rebuild_deck_battle_stats(db.session)
+    db.session.commit()
+    click.echo(f'Rebuilt battle statistics for {decks} decks')
+
+@cli_controller.cli.command('rebuild-rating-stats')
+def rebuild_rating_stats():
+    """
+    Recompute the deck_rating_stats table from every stored rating.
+    """
+    decks = rebuild_deck_rating_stats(db.session)
+    db.session.commit()
+    click.echo(f'Rebuilt rating statistics for {decks} decks')
+
+@cli_controller.cli.command('build-log-dictionary')
+@click.option('--samples', default=1000, show_default=True, help='Most recent battle logs to train on')
+def build_log_dictionary(samples):
+    """
+    Train a preset compression dictionary from stored plain-text battle logs.
+    """
+    logs = db.session.scalars(
+        db.select(Battlelog.raw_log)
+        .where(Battlelog.raw_log.is_not(None))
+        .order_by(Battlelog.id.desc())
+        .limit(samples)
+    ).all()
+    if len(logs) < 2:
+        click.echo('Need at least 2 plain-text battle logs to build a dictionary')
+        return
+
+    dictionary = LogDictionary(data=build_dictionary(logs), sample_count=len(logs))
+    db.session.add(dictionary)
+    db.session.commit()
+    click.echo(f'Created dictionary {dictionary.id} ({len(dictionary.data)} bytes from {len(logs)} logs)')
+
+@cli_controller.cli.command('compress-logs')
+@click.option('--batch-size', default=200, show_default=True, help='Rows compressed per transaction')
+def compress_logs(batch_size):
+    """
+    Move plain-text battle logs into compressed storage with the newest dictionary.
+    """
+    dictionary_id = latest_dictionary_id()
+    zdict = get_dictionary(dictionary_id)
+    compressed = 0
+    raw_bytes = 0
+    stored_bytes = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            db.select(Battlelog.id, Battlelog.raw_log)
+            .where(Battlelog.id > last_id, Battlelog.raw_log.is_not(None))
+            .order_by(Battlelog.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        updates = []
+        for row in rows:
+            data = compress_log(row.raw_log, zdict)
+            raw_bytes += len(row.raw_log.encode('utf-8'))
+            stored_bytes += len(data)
+            updates.append({
+                'id': row.id,
+                'raw_log': None,
+                'raw_log_compressed': data,
+                'log_dictionary_id': dictionary_id,
+                'raw_log_sha256': Battlelog.hash_log(row.raw_log)
+            })
+        db.session.execute(db.update(Battlelog), updates)
+        db.session.commit()
+        compressed += len(rows)
+        last_id = rows[-1].id
+
+    ratio = f'{raw_bytes / stored_bytes:.1f}x' if stored_bytes else 'n/a'
+    click.echo(f'Compressed {compressed} battle logs ({raw_bytes} -> {stored_bytes} bytes, {ratio})')
+
+@cli_controller.cli.command('backfill-battle-events')
+@click.option('--batch-size', default=200, show_default=True, help='Battle logs parsed per transaction')
+def backfill_battle_events(batch_size):
+    """
+    Parse structured events for battle logs imported before events were recorded.
+    """
+    has_events = db.select(BattleEvent.id).where(BattleEvent.battlelog_id == Battlelog.id).exists()
+    parsed = 0
+    inserted = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            db.select(Battlelog.id, Battlelog.raw_log, Battlelog.raw_log_compressed, Battlelog.log_dictionary_id)
+            .where(Battlelog.id > last_id, ~has_events)
+            .order_by(Battlelog.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        inserted += insert_battle_events(db.session, {
+            row.id: parse_battle_events(decode_raw_log(row.raw_log, row.raw_log_compressed, row.log_dictionary_id))
+            for row in rows
+        })
+        db.session.commit()
+        parsed += len(rows)
+        last_id = rows[-1].id
+
+    click.echo(f'Parsed {parsed} battle logs into {inserted} events')
+
 @cli_controller.route('/health')
 def health_check():
     """
@@ -326,3 +517,94 @@ def list_routes():
             'error': 'Failed to list routes',
             'details': str(e)
         }), 500
+
+@cli_controller.cli.command('validate-decks')
+@click.option('--format-id', type=int, help='Only validate decks in this format')
+@click.option('--deckbox-id', type=int, help='Only validate decks in this deck box')
+@click.option('--ndjson', is_flag=True, help='Print one JSON report per deck instead of a summary line')
+@click.option('--invalid-only', is_flag=True, help='Only report decks that fail validation')
+def validate_all_decks(format_id, deckbox_id, ndjson, invalid_only):
+    """
+    Validate every deck, or those in one format or deck box, in a single pass.
+    """
+    total = invalid = 0
+    for report in validate_decks(format_id=format_id, deckbox_id=deckbox_id):
+        total += 1
+        invalid += not report['valid']
+        if invalid_only and report['valid']:
+            continue
+        if ndjson:
+            click.echo(json.dumps(report))
+        else:
+            status = 'PASS' if report['valid'] else 'FAIL: ' + '; '.join(report['errors'])
+            click.echo(f"Deck {report['deck_id']} ({report['name']}): {status}")
+    if not ndjson:
+        click.echo(f'Validated {total} decks, {invalid} invalid')
+
+@cli_controller.cli.command('rebuild-card-legality')
+def rebuild_card_legality():
+    """
+    Recompute the card by format legality index from set release dates.
+    """
+    rows = refresh_card_legality(db.session)
+    db.session.commit()
+    click.echo(f'Indexed {rows} legal card and format pairs')
+
+@cli_controller.cli.command('audit-schema')
+@click.option('--database', is_flag=True, help='Inspect the live database instead of the models')
+def audit_schema(database):
+    """
+    Report foreign keys that are not the leading columns of any index.
+    """
+    missing = missing_fk_indexes(db.metadata, db.engine if database else None)
+    for table, columns, referred in missing:
+        click.echo(f"{table}({', '.join(columns)}) -> {referred}: no index")
+    if missing:
+        raise click.ClickException(f'{len(missing)} foreign keys without an index')
+    click.echo('Every foreign key is indexed')
+
+# Query strings the serializer parity check runs for each resource
+PARITY_QUERIES = {
+    'card': ['', 'limit=25', 'fields=id,name', 'fields=name,cardset', 'include=cardtype', 'include='],
+    'deck': ['', 'limit=25', 'fields=id,name', 'fields=name,deckbox', 'include=battlelogs', 'include=']
+}
+PARITY_MODELS = {'card': Card, 'deck': Deck}
+
+def _normalized(items):
+    """Round-trip serialized items through JSON and order nested battle logs by ID"""
+    items = json.loads(dumps(items))
+    for item in items:
+        if item.get('battlelogs'):
+            item['battlelogs'].sort(key=lambda log: log['id'])
+    return items
+
+@cli_controller.cli.command('check-serializer-parity')
+def check_serializer_parity():
+    """
+    Compare the fast list serializer with the marshmallow schemas over the current data.
+    """
+    failures = 0
+    for resource, queries in PARITY_QUERIES.items():
+        model = PARITY_MODELS[resource]
+        for query in queries:
+            with current_app.test_request_context(f'/?{query}'):
+                fields = request_fields(resource)
+                fast, fast_page = fast_list(resource, db.select(model), fields)
+                stmt = db.select(model).order_by(model.id).options(*projection_options(resource, fields))
+                rows, page = keyset_paginate(stmt, model.id)
+                expected = projected_schema(resource, fields, many=True).dump(rows)
+                db.session.expunge_all()
+
+            if _normalized(fast) == _normalized(expected) and fast_page == page:
+                click.echo(f'{resource} ?{query}: OK ({len(fast)} rows)')
+                continue
+            failures += 1
+            click.echo(f'{resource} ?{query}: MISMATCH')
+            for got, want in zip(_normalized(fast), _normalized(expected)):
+                if got != want:
+                    click.echo(f'  fast:   {got}')
+                    click.echo(f'  schema: {want}')
+                    break
+    if failures:
+        raise click.ClickException(f'{failures} serializer parity checks failed')
+    click.echo('Fast serializer matches the schemas')
@@ -1,20 +1,25 @@
 '''Controller for managing Pokemon TCG deck operations'''
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from marshmallow import ValidationError
 from datetime import datetime
 from sqlalchemy import func
-import re
+from sqlalchemy.orm import joinedload, selectinload
 from init import db
 from models.deck import Deck
 from models.deckcard import DeckCard
 from models.card import Card
 from models.cardset import CardSet
 from models.cardtype import CardType
-from models.rating import Rating
+from models.card_legality import refresh_card_legality
+from models.deck_rating_stats import DeckRatingStats
 from schemas.deck_schema import DeckSchema
-from models.rating import Rating
-from sqlalchemy import func
+from utils.bulk import insert_ignore
+from utils.deck_validation import validate_deck, validate_decks, validation_cache_stats
+from utils.fast_serializer import fast_stream, list_response
+from utils.jobs import submit_job, wants_async
+from utils.projection import projected_schema, projection_options, request_fields
+from utils.streaming import ndjson_response, wants_ndjson
 
 deck_controller = Blueprint('deck_controller', __name__)
 deck_schema = DeckSchema()
@@ -25,14 +30,29 @@ def get_all_decks():
     """
     Retrieve all Pokemon TCG decks.
     
+    Send Accept: application/x-ndjson (or ?stream=true) to stream every deck
+    one per line from a server-side cursor instead of a single JSON list.
+    
+    Query Parameters:
+        fields (str): Comma-separated top-level fields to return
+        include (str): Comma-separated relationships to embed (deckbox, battlelogs)
+        after (int): Keyset cursor; return decks after this ID
+        limit (int): Page size; paging is only applied when after or limit is given
+        count (bool): Include the total in X-Total-Count
+        
     Returns:
-        200: List of all decks
+        200: List of decks, with X-Next-After and Link headers when more pages remain,
+            or an NDJSON stream of decks
+        400: Invalid paging parameters or unknown fields
         500: Database query failed
     """
     try:
-        stmt = db.select(Deck)
-        decks = db.session.scalars(stmt).all()
-        return decks_schema.jsonify(decks), 200
+        fields = request_fields('deck')
+        if wants_ndjson():
+            return ndjson_response(fast_stream('deck', db.select(Deck), fields))
+        return list_response('deck', db.select(Deck), fields)
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to retrieve decks', 'details': str(e)}), 500
 
@@ -44,16 +64,25 @@ def get_one_deck(deck_id):
     Parameters:
         deck_id (int): ID of the deck to retrieve
         
+    Query Parameters:
+        fields (str): Comma-separated top-level fields to return
+        include (str): Comma-separated relationships to embed (deckbox, battlelogs)
+        
     Returns:
         200: Deck details
+        400: Unknown fields
         404: Deck not found
         500: Database query failed
     """
     try:
-        deck = db.session.get(Deck, deck_id)
+        fields = request_fields('deck')
+        stmt = db.select(Deck).where(Deck.id == deck_id).options(*projection_options('deck', fields))
+        deck = db.session.scalar(stmt)
         if not deck:
             return jsonify({'error': 'Deck not found'}), 404
-        return deck_schema.jsonify(deck), 200
+        return projected_schema('deck', fields).jsonify(deck), 200
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to retrieve deck', 'details': str(e)}), 500
 
@@ -160,13 +189,13 @@ def validate_deck_rules(deck_id):
         if not deck:
             return jsonify({'error': 'Deck not found'}), 404
             
-        validate_deck(deck.id, deck.format_id)
+        card_count = validate_deck(deck.id, deck.format_id, deck.content_version)
         
         return jsonify({
             'message': 'Deck is valid!',
             'deck_name': deck.name,
             'format': deck.format_id,
-            'card_count': sum(dc.quantity for dc in deck.deck_cards)
+            'card_count': card_count
         }), 200
             
     except ValidationError as e:
@@ -178,6 +207,56 @@ def validate_deck_rules(deck_id):
             'deck_id': deck_id
         }), 500
 
+@deck_controller.route('/validate', methods=['POST'])
+def validate_all_decks():
+    """
+    Validate every deck, or those in one format or deck box, in a single pass.
+    
+    Request Body (optional JSON) or Query Parameters:
+        format_id (int): Only validate decks in this format
+        deckbox_id (int): Only validate decks in this deck box
+        
+    Returns:
+        200: Summary counts and a pass/fail report per deck, or one report per
+            line as application/x-ndjson when requested via Accept or ?stream=true
+        400: Invalid filter value
+        500: Validation run failed
+    """
+    try:
+        filters = request.get_json(silent=True) or {}
+        try:
+            format_id = filters.get('format_id', request.args.get('format_id'))
+            deckbox_id = filters.get('deckbox_id', request.args.get('deckbox_id'))
+            format_id = int(format_id) if format_id is not None else None
+            deckbox_id = int(deckbox_id) if deckbox_id is not None else None
+        except (TypeError, ValueError):
+            return jsonify({'error': 'format_id and deckbox_id must be integers'}), 400
+
+        reports = validate_decks(format_id=format_id, deckbox_id=deckbox_id)
+        if wants_ndjson():
+            return ndjson_response(reports)
+
+        reports = list(reports)
+        valid = sum(1 for report in reports if report['valid'])
+        return jsonify({
+            'total': len(reports),
+            'valid': valid,
+            'invalid': len(reports) - valid,
+            'decks': reports
+        }), 200
+    except Exception as e:
+        return jsonify({'error': 'Validation run failed', 'details': str(e)}), 500
+
+@deck_controller.route('/validate/cache', methods=['GET'])
+def get_validation_cache_stats():
+    """
+    Report hit and miss counters for the per-deck validation cache.
+    
+    Returns:
+        200: Cache size, capacity, hits, misses and hit rate
+    """
+    return jsonify(validation_cache_stats()), 200
+
 @deck_controller.route('/search', methods=['GET'])
 def search_decks():
     """
@@ -186,21 +265,32 @@ def search_decks():
     Query Parameters:
         format (str): Format name (standard, expanded)
         rating (int): Minimum rating threshold
+        fields (str): Comma-separated top-level fields to return
+        include (str): Comma-separated relationships to embed (deckbox, battlelogs)
+        after (int): Keyset cursor; return decks after this ID
+        limit (int): Page size; paging is only applied when after or limit is given
+        count (bool): Include the total in X-Total-Count
         
     Returns:
         200: List of matching decks
+        400: Invalid paging parameters or unknown fields
         500: Search operation failed
     """
     try:
+        fields = request_fields('deck')
         stmt = db.select(Deck)
         
         if format_name := request.args.get('format'):
             stmt = stmt.filter(Deck.format_id == format_name)
         if rating := request.args.get('rating'):
-            stmt = stmt.filter(Deck.rating >= rating)
+            stmt = stmt.join(DeckRatingStats, DeckRatingStats.deck_id == Deck.id).filter(
+                DeckRatingStats.rating_count > 0,
+                DeckRatingStats.average >= rating
+            )
             
-        decks = db.session.scalars(stmt).all()
-        return decks_schema.jsonify(decks), 200
+        return list_response('deck', stmt, fields)
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Search failed', 'details': str(e)}), 500
 
@@ -248,23 +338,22 @@ def filter_decks_by_cardtype():
 @deck_controller.route('/top-rated', methods=['GET'])
 def get_top_rated_decks():
     """
-    Get top rated decks ordered by rating.
+    Get top rated decks ordered by Bayesian weighted rating score.
     
     Query Parameters:
         limit (int): Number of decks to return (default: 10)
         
     Returns:
-        200: List of deck IDs ordered by rating
+        200: List of deck IDs ordered by weighted score
         500: Query operation failed
     """
     try:
         limit = request.args.get('limit', 10, type=int)
         
         stmt = (
-            db.select(Deck.id, func.avg(Rating.score).label('avg_rating'))
-            .join(Rating)
-            .group_by(Deck.id)
-            .order_by(func.avg(Rating.score).desc())
+            db.select(DeckRatingStats.deck_id)
+            .where(DeckRatingStats.rating_count > 0)
+            .order_by(DeckRatingStats.score.desc(), DeckRatingStats.deck_id)
             .limit(limit)
         )
         
@@ -278,9 +367,6 @@ def get_top_rated_decks():
             'details': str(e)
         }), 500
 
-from models.rating import Rating
-from sqlalchemy import func
-
 @deck_controller.route('/filter/by-rating-range', methods=['GET'])
 def filter_by_rating():
     """
@@ -299,16 +385,15 @@ def filter_by_rating():
         max_rating = request.args.get('max', type=float)
         
         stmt = (
-            db.select(Deck.id, func.avg(Rating.score).label('avg_rating'))
-            .join(Rating)
-            .group_by(Deck.id)
-            .order_by(func.avg(Rating.score).desc()) 
+            db.select(DeckRatingStats.deck_id)
+            .where(DeckRatingStats.rating_count > 0)
+            .order_by(DeckRatingStats.average.desc())
         )
         
         if min_rating is not None:
-            stmt = stmt.having(func.avg(Rating.score) >= min_rating)
+            stmt = stmt.where(DeckRatingStats.average >= min_rating)
         if max_rating is not None:
-            stmt = stmt.having(func.avg(Rating.score) <= max_rating)
+            stmt = stmt.where(DeckRatingStats.average <= max_rating)
             
         result = db.session.execute(stmt)
         deck_ids = [row[0] for row in result]
@@ -320,62 +405,6 @@ def filter_by_rating():
             'details': str(e.__class__.__name__ + ': ' + str(e))
         }), 500
         
-def validate_deck(deck_id, format_id):
-    """
-    Validate deck composition and format legality.
-    
-    Parameters:
-        deck_id (int): ID of deck to validate
-        format_id (int): Format to validate against
-        
-    Raises:
-        ValidationError: If deck violates any format or composition rules
-    """
-    standard_date = datetime(2022, 7, 1).date()
-    expanded_date = datetime(2011, 9, 1).date()
-
-    stmt = (
-        db.select(db.func.min(CardSet.release_date))
-        .join(Card)
-        .join(DeckCard)
-        .filter(DeckCard.deck_id == deck_id)
-    )
-    oldest_card_date = db.session.scalar(stmt)
-    
-    if not oldest_card_date:
-        raise ValidationError('No cards found in deck')
-
-    # Continue with date comparisons after confirming we have a valid date
-    if format_id == 1 and oldest_card_date < standard_date:
-        raise ValidationError('Deck contains cards not legal in Standard format')
-    elif format_id == 2 and oldest_card_date < expanded_date:
-        raise ValidationError('Deck contains cards not legal in Expanded format')
-
-    stmt = db.select(DeckCard).filter_by(deck_id=deck_id)
-    deck_cards = db.session.scalars(stmt).all()
-
-    card_count = 0
-    card_quantities = {}
-    basic_energy_pattern = re.compile(r'^Basic \w+ Energy', re.IGNORECASE)
-
-    for deck_card in deck_cards:
-        card = db.session.get(Card, deck_card.card_id)
-        card_set = db.session.get(CardSet, card.cardset_id)
-
-        if not card or not card_set:
-            raise ValidationError(f'Card or card set not found for deck card ID {deck_card.id}')
-
-        quantity = deck_card.quantity
-        card_count += quantity
-
-        if not basic_energy_pattern.match(card.name):
-            card_quantities[card.id] = card_quantities.get(card.id, 0) + quantity
-            if card_quantities[card.id] > 4:
-                raise ValidationError(f'Card \'{card.name}\' has more than 4 copies in the deck.')
-
-    if card_count != 60:
-        raise ValidationError(f'Deck must contain exactly 60 cards. Current count: {card_count}')
-
 @deck_controller.route('/import/<deck_name>/<int:format_id>/<int:deckbox_id>', methods=['POST'])
 def import_deck(deck_name, format_id, deckbox_id):
     """
@@ -386,16 +415,54 @@ def import_deck(deck_name, format_id, deckbox_id):
         format_id (int): Format ID for the deck
         deckbox_id (int): Deck box to store the deck in
         
+    Query Parameters:
+        async (bool): Queue the import as a background job (default: ASYNC_IMPORTS)
+        
     Body:
         Raw text in TCG Live format
         
     Returns:
         201: Deck imported successfully
+        202: Import queued; poll /api/jobs/{job_id} for the result
         400: Invalid deck list format
         500: Import operation failed
     """
     try:
         deck_list = request.get_data(as_text=True)
+        if wants_async():
+            job = submit_job('deck', run_deck_import, deck_name, format_id, deckbox_id, deck_list)
+            return jsonify({'message': 'Deck import queued', 'job_id': job.id}), 202
+
+        body, status_code = run_deck_import(deck_name, format_id, deckbox_id, deck_list)
+        return jsonify(body), status_code
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to import deck', 'details': str(e)}), 500
+
+def run_deck_import(deck_name, format_id, deckbox_id, deck_list, progress=None):
+    """
+    Create a deck from TCG Live format text.
+    
+    Shared by the synchronous endpoint and background import jobs.
+    
+    Parameters:
+        deck_name (str): Name for the imported deck
+        format_id (int): Format ID for the deck
+        deckbox_id (int): Deck box to store the deck in
+        deck_list (str): Raw text in TCG Live format
+        progress (callable, optional): Called with the fraction of sections processed
+        
+    Returns:
+        tuple: (response body, HTTP status code)
+    """
+    try:
+        try:
+            entries = parse_deck_list(deck_list)
+        except (ValueError, IndexError) as e:
+            return {'error': 'Invalid deck list format', 'details': str(e)}, 400
+        if progress:
+            progress(0.25)
+
         # Create new deck
         new_deck = Deck(
             name=deck_name,
@@ -405,91 +472,232 @@ def import_deck(deck_name, format_id, deckbox_id):
         )
         db.session.add(new_deck)
         db.session.flush()  # Get deck ID while maintaining transaction
-        
-        # Parse deck list
-        sections = deck_list.split('\n\n')
-        for section in sections:
-            if not section.strip():
-                continue
-                
-            lines = section.strip().split('\n')
-            for line in lines[1:]:  # Skip section header
-                if not line.strip():
-                    continue
-                    
-                # Parse card line (e.g., "4 Fezandipiti ex SFA 38")
-                parts = line.strip().split(' ')
-                quantity = int(parts[0])
-                set_code = parts[-2]
-                card_number = parts[-1]
-                # Keep variant as part of name by including all parts between quantity and set code
-                card_name = ' '.join(parts[1:-2])
-                    
-                # Find or create card set
-                stmt = db.select(CardSet).filter_by(name=set_code)
-                card_set = db.session.scalar(stmt)
-                if not card_set:
-                    card_set = CardSet(
-                        name=set_code,
-                        release_date=datetime.now().date(),  # Default to today
-                        description=f"Set {set_code}"
-                    )
-                    db.session.add(card_set)
-                    db.session.flush()
-                    
-                # Find or create card
-                stmt = db.select(Card).filter_by(name=card_name, cardset_id=card_set.id)
-                card = db.session.scalar(stmt)
-                if not card:
-                    # Determine card type from name/section
-                    card_type = determine_card_type(card_name, section)
-                    card = Card(
-                        name=card_name,
-                        cardtype_id=card_type.id,
-                        cardset_id=card_set.id,
-                        card_number=card_number
-                    )
-                    db.session.add(card)
-                    db.session.flush()
-                
-                # Add card to deck
-                deck_card = DeckCard(
-                    deck_id=new_deck.id,
-                    card_id=card.id,
-                    quantity=quantity
-                )
-                db.session.add(deck_card)
+
+        # Find or create every card type, set and card with one IN query each
+        type_ids = find_or_create_card_types({entry['card_type'] for entry in entries})
+        set_ids = find_or_create_card_sets({entry['set_code'] for entry in entries})
+        if progress:
+            progress(0.5)
+
+        card_ids = find_or_create_cards([
+            {
+                'name': entry['card_name'],
+                'cardset_id': set_ids[entry['set_code']],
+                'cardtype_id': type_ids[entry['card_type']],
+                'card_number': entry['card_number']
+            }
+            for entry in entries
+        ])
+        if progress:
+            progress(0.75)
+
+        # Add every card to the deck in one executemany, merging repeated lines
+        quantities = {}
+        for entry in entries:
+            card_id = card_ids[(entry['card_name'], set_ids[entry['set_code']])]
+            quantities[card_id] = quantities.get(card_id, 0) + entry['quantity']
+        if quantities:
+            db.session.execute(db.insert(DeckCard), [
+                {'deck_id': new_deck.id, 'card_id': card_id, 'quantity': quantity}
+                for card_id, quantity in quantities.items()
+            ])
 
         db.session.commit()
-        return jsonify(deck_schema.dump(new_deck)), 201
+        return deck_schema.dump(new_deck), 201
         
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': 'Failed to import deck', 'details': str(e)}), 500
+        return {'error': 'Failed to import deck', 'details': str(e)}, 500
 
-def determine_card_type(card_name: str, section: str) -> CardType:
-    """Helper function to determine and create card type if needed"""
+def parse_deck_list(deck_list):
+    """
+    Parse TCG Live format text into card entries without touching the database.
     
+    Parameters:
+        deck_list (str): Raw text in TCG Live format
+        
+    Returns:
+        list: Dicts with quantity, card_name, set_code, card_number and card_type
+        
+    Raises:
+        ValueError: If a card line has no leading quantity
+    """
     # Map sections to card types
     section_types = {
         'Pokémon': 'Pokemon',
         'Trainer': 'Trainer',
         'Energy': 'Energy'
     }
+
+    entries = []
+    for section in deck_list.split('\n\n'):
+        if not section.strip():
+            continue
+
+        lines = section.strip().split('\n')
+        # Get type name from section header
+        card_type = section_types.get(lines[0].split(':')[0], 'Pokemon')
+        for line in lines[1:]:  # Skip section header
+            if not line.strip():
+                continue
+
+            # Parse card line (e.g., "4 Fezandipiti ex SFA 38")
+            parts = line.strip().split(' ')
+            entries.append({
+                'quantity': int(parts[0]),
+                # Keep variant as part of name by including all parts between quantity and set code
+                'card_name': ' '.join(parts[1:-2]),
+                'set_code': parts[-2],
+                'card_number': parts[-1],
+                'card_type': card_type
+            })
+    return entries
+
+def find_or_create_card_types(names):
+    """
+    Resolve card type names to ids, creating any that are missing.
     
-    # Get type name from section header
-    card_type_name = section_types.get(section.split(':')[0], 'Pokemon')
+    Parameters:
+        names (set): Card type names
+        
+    Returns:
+        dict: Card type name mapped to id
+    """
+    if not names:
+        return {}
+    insert_ignore(CardType, [{'name': name} for name in names], ['name'])
+    return dict(db.session.execute(
+        db.select(CardType.name, CardType.id).where(CardType.name.in_(names))
+    ).all())
+
+def find_or_create_card_sets(codes):
+    """
+    Resolve set codes to card set ids, creating any that are missing.
     
-    # Find or create the card type
-    stmt = db.select(CardType).filter_by(name=card_type_name)
-    card_type = db.session.scalar(stmt)
+    Parameters:
+        codes (set): Set codes as they appear in the deck list
+        
+    Returns:
+        dict: Set code mapped to card set id
+    """
+    if not codes:
+        return {}
+    set_ids = dict(db.session.execute(
+        db.select(CardSet.name, CardSet.id).where(CardSet.name.in_(codes))
+    ).all())
+    missing = codes - set_ids.keys()
+    if missing:
+        insert_ignore(CardSet, [
+            {
+                'name': code,
+                'release_date': datetime.now().date(),  # Default to today
+                'description': f"Set {code}"
+            }
+            for code in missing
+        ], ['name'])
+        set_ids.update(db.session.execute(
+            db.select(CardSet.name, CardSet.id).where(CardSet.name.in_(missing))
+        ).all())
+    return set_ids
+
+def find_or_create_cards(cards):
+    """
+    Resolve (name, set) pairs to card ids, bulk inserting any that are missing.
     
-    if not card_type:
-        card_type = CardType(name=card_type_name)
-        db.session.add(card_type)
-        db.session.flush()
+    Missing cards are inserted with ON CONFLICT DO NOTHING on the unique
+    (name, cardset_id) index and then re-selected, so concurrent imports of
+    the same list share one row per card instead of creating duplicates.
     
-    return card_type
+    Parameters:
+        cards (list): Dicts with name, cardset_id, cardtype_id and card_number
+        
+    Returns:
+        dict: (name, cardset_id) mapped to card id
+    """
+    if not cards:
+        return {}
+    wanted = {(card['name'], card['cardset_id']): card for card in cards}
+    card_ids = _select_card_ids(wanted)
+
+    missing = [card for key, card in wanted.items() if key not in card_ids]
+    if missing:
+        insert_ignore(Card, missing, ['name', 'cardset_id'])
+        created = _select_card_ids({(card['name'], card['cardset_id']) for card in missing})
+        card_ids.update(created)
+        # Core inserts skip the ORM flush hooks, so index the new cards here
+        refresh_card_legality(db.session, card_ids=list(created.values()), bump_versions=False)
+    return card_ids
+
+def _select_card_ids(keys):
+    """Look up the ids of the cards with the given (name, cardset_id) keys"""
+    rows = db.session.execute(
+        db.select(Card.name, Card.cardset_id, Card.id)
+        .where(
+            Card.name.in_({name for name, _ in keys}),
+            Card.cardset_id.in_({cardset_id for _, cardset_id in keys})
+        )
+    ).all()
+    return {(name, cardset_id): card_id for name, cardset_id, card_id in rows if (name, cardset_id) in keys}
+
+EXPORT_BATCH_SIZE = 100
+
+def export_options():
+    """
+    Loader options that fetch a deck's cards, sets and types up front.
+    
+    Returns:
+        list: Options loading the whole export graph in a fixed number of queries
+    """
+    return [
+        selectinload(Deck.deck_cards)
+        .joinedload(DeckCard.card)
+        .options(joinedload(Card.cardset), joinedload(Card.cardtype))
+    ]
+
+def render_deck_list(deck):
+    """
+    Render a loaded deck as TCG Live format text.
+    
+    Parameters:
+        deck (Deck): Deck loaded with export_options()
+        
+    Returns:
+        str: Deck list grouped into Pokémon, Trainer and Energy sections
+    """
+    # Group cards by type with correct counting
+    pokemon_cards = []
+    trainer_cards = []
+    energy_cards = []
+    
+    for deck_card in deck.deck_cards:
+        card = deck_card.card
+        card_line = f"{deck_card.quantity} {card.name} {card.cardset.name}"
+        
+        # Use card type for categorization
+        if card.cardtype.name == 'Pokemon':
+            pokemon_cards.append(card_line)
+        elif card.cardtype.name == 'Trainer':
+            trainer_cards.append(card_line)
+        elif card.cardtype.name == 'Energy':
+            energy_cards.append(card_line)
+
+    # Build deck list with correct section counts
+    deck_list = [
+        f"Pokémon: {len(pokemon_cards)}",
+        "",
+        *pokemon_cards,
+        "",
+        f"Trainer: {len(trainer_cards)}",
+        "",
+        *trainer_cards,
+        "",
+        f"Energy: {len(energy_cards)}",
+        "",
+        *energy_cards,
+        "",
+        f"Total Cards: {sum(dc.quantity for dc in deck.deck_cards)}"
+    ]
+    return '\n'.join(deck_list)
 
 @deck_controller.route('/<int:deck_id>/export', methods=['GET'])
 def export_deck(deck_id):
@@ -505,45 +713,65 @@ def export_deck(deck_id):
         500: Export operation failed
     """
     try:
-        deck = db.session.get(Deck, deck_id)
+        stmt = db.select(Deck).where(Deck.id == deck_id).options(*export_options())
+        deck = db.session.scalar(stmt)
         if not deck:
             return jsonify({'error': 'Deck not found'}), 404
 
-        # Group cards by type with correct counting
-        pokemon_cards = []
-        trainer_cards = []
-        energy_cards = []
+        return render_deck_list(deck), 200, {'Content-Type': 'text/plain'}
+
+    except Exception as e:
+        return jsonify({'error': 'Export failed', 'details': str(e)}), 500
+
+@deck_controller.route('/export', methods=['GET'])
+def export_decks():
+    """
+    Export many decks to TCG Live format text in one streamed response.
+    
+    Decks are loaded in batches of EXPORT_BATCH_SIZE, each with a fixed
+    number of queries, and written as they are rendered. Every deck list is
+    preceded by a "# Deck {id}: {name}" header line.
+    
+    Query Parameters:
+        ids (str): Comma-separated deck IDs
+        deckbox_id (int): Export every deck in this deck box
         
-        for deck_card in deck.deck_cards:
-            card = deck_card.card
-            card_line = f"{deck_card.quantity} {card.name} {card.cardset.name}"
-            
-            # Use card type for categorization
-            if card.cardtype.name == 'Pokemon':
-                pokemon_cards.append(card_line)
-            elif card.cardtype.name == 'Trainer':
-                trainer_cards.append(card_line)
-            elif card.cardtype.name == 'Energy':
-                energy_cards.append(card_line)
-
-        # Build deck list with correct section counts
-        deck_list = [
-            f"Pokémon: {len(pokemon_cards)}",
-            "",
-            *pokemon_cards,
-            "",
-            f"Trainer: {len(trainer_cards)}",
-            "",
-            *trainer_cards,
-            "",
-            f"Energy: {len(energy_cards)}",
-            "",
-            *energy_cards,
-            "",
-            f"Total Cards: {sum(dc.quantity for dc in deck.deck_cards)}"
-        ]
-
-        return '\n'.join(deck_list), 200, {'Content-Type': 'text/plain'}
+    Returns:
+        200: Plain text deck lists in TCG Live format
+        400: Neither ids nor deckbox_id given, or a value is not an integer
+        500: Export operation failed
+    """
+    try:
+        try:
+            deck_ids = None
+            if ids := request.args.get('ids'):
+                deck_ids = [int(deck_id) for deck_id in ids.split(',') if deck_id.strip()]
+            deckbox_id = request.args.get('deckbox_id')
+            deckbox_id = int(deckbox_id) if deckbox_id else None
+        except ValueError:
+            return jsonify({'error': 'ids and deckbox_id must be integers'}), 400
+        if deck_ids is None and deckbox_id is None:
+            return jsonify({'error': 'Provide ids or deckbox_id'}), 400
+
+        stmt = db.select(Deck).order_by(Deck.id).options(*export_options()).limit(EXPORT_BATCH_SIZE)
+        if deck_ids is not None:
+            stmt = stmt.where(Deck.id.in_(deck_ids))
+        if deckbox_id is not None:
+            stmt = stmt.where(Deck.deckbox_id == deckbox_id)
+
+        def generate():
+            last_id = 0
+            while True:
+                decks = db.session.scalars(stmt.where(Deck.id > last_id)).all()
+                if not decks:
+                    break
+                for deck in decks:
+                    yield f"# Deck {deck.id}: {deck.name}\n{render_deck_list(deck)}\n\n"
+                last_id = decks[-1].id
+                # Release the rendered batch before loading the next one
+                db.session.expunge_all()
+
+        return Response(stream_with_context(generate()), mimetype='text/plain')
 
     except Exception as e:
-        return jsonify({'error': 'Export failed', 'details': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': 'Export failed', 'details': str(e)}), 500
@@ -8,11 +8,14 @@ from models.deck import Deck
 from models.format import Format
 from schemas.deckbox_schema import DeckBoxSchema
 from schemas.deck_schema import DeckSchema
+from utils.pagination import keyset_paginate, pagination_headers
+from utils.projection import projected_schema, projection_options, request_fields
 
 # Blueprint and Schema Setup
 deckbox_controller = Blueprint('deckbox_controller', __name__)
-deckbox_schema = DeckBoxSchema()
-deckboxes_schema = DeckBoxSchema(many=True)
+# Decks are only embedded when requested with ?include=decks
+deckbox_schema = DeckBoxSchema(exclude=('decks',))
+deckboxes_schema = DeckBoxSchema(many=True, exclude=('decks',))
 deck_schema = DeckSchema()
 decks_schema = DeckSchema(many=True)
 
@@ -48,14 +51,25 @@ def read_all_deckboxes():
     """
     Retrieve all deck boxes.
     
+    Query Parameters:
+        after (int): Keyset cursor; return deck boxes after this ID
+        limit (int): Page size; paging is only applied when after or limit is given
+        count (bool): Include the total in X-Total-Count
+        fields (str): Comma-separated top-level fields to return
+        include (str): Comma-separated relationships to embed (decks)
+        
     Returns:
         200: List of all deck boxes
+        400: Invalid paging parameters or unknown fields
         500: Database query failed
     """
     try:
-        stmt = db.select(DeckBox)
-        deckboxes = db.session.scalars(stmt).all()
-        return deckboxes_schema.jsonify(deckboxes), 200
+        fields = request_fields('deckbox')
+        stmt = db.select(DeckBox).options(*projection_options('deckbox', fields))
+        deckboxes, pagination = keyset_paginate(stmt, DeckBox.id)
+        return projected_schema('deckbox', fields, many=True).jsonify(deckboxes), 200, pagination_headers(pagination)
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to retrieve deckboxes', 'details': str(e)}), 500
 
@@ -67,16 +81,25 @@ def read_one_deckbox(deckbox_id):
     Parameters:
         deckbox_id (int): ID of the deck box to retrieve
         
+    Query Parameters:
+        fields (str): Comma-separated top-level fields to return
+        include (str): Comma-separated relationships to embed (decks)
+        
     Returns:
         200: Deck box details
+        400: Unknown fields
         404: Deck box not found
         500: Database query failed
     """
     try:
-        deckbox = db.session.get(DeckBox, deckbox_id)
+        fields = request_fields('deckbox')
+        stmt = db.select(DeckBox).where(DeckBox.id == deckbox_id).options(*projection_options('deckbox', fields))
+        deckbox = db.session.scalar(stmt)
         if not deckbox:
             return jsonify({'error': 'DeckBox not found'}), 404
-        return deckbox_schema.jsonify(deckbox), 200
+        return projected_schema('deckbox', fields).jsonify(deckbox), 200
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to retrieve deckbox', 'details': str(e)}), 500
 
@@ -147,8 +170,14 @@ def show_decks_in_deckbox(deckbox_id):
     Parameters:
         deckbox_id (int): ID of the deck box to list decks from
         
+    Query Parameters:
+        after (int): Keyset cursor; return decks after this ID
+        limit (int): Page size; paging is only applied when after or limit is given
+        count (bool): Include the total in X-Total-Count
+        
     Returns:
         200: List of decks in the deck box
+        400: Invalid paging parameters
         404: Deck box not found
         500: Database query failed
     """
@@ -156,7 +185,11 @@ def show_decks_in_deckbox(deckbox_id):
         deckbox = db.session.get(DeckBox, deckbox_id)
         if not deckbox:
             return jsonify({'error': 'DeckBox not found'}), 404
-        return decks_schema.jsonify(deckbox.decks), 200
+        stmt = db.select(Deck).filter(Deck.deckbox_id == deckbox_id)
+        decks, pagination = keyset_paginate(stmt, Deck.id)
+        return decks_schema.jsonify(decks), 200, pagination_headers(pagination)
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to retrieve decks', 'details': str(e)}), 500
 
@@ -204,17 +237,26 @@ def search_deckboxes():
     
     Query Parameters:
         name (str): Name to search for
+        after (int): Keyset cursor; return deck boxes after this ID
+        limit (int): Page size; paging is only applied when after or limit is given
+        count (bool): Include the total in X-Total-Count
+        fields (str): Comma-separated top-level fields to return
+        include (str): Comma-separated relationships to embed (decks)
         
     Returns:
         200: List of matching deckboxes
+        400: Invalid paging parameters or unknown fields
         500: Search operation failed
     """
     try:
-        stmt = db.select(DeckBox)
+        fields = request_fields('deckbox')
+        stmt = db.select(DeckBox).options(*projection_options('deckbox', fields))
         if name := request.args.get('name'):
             stmt = stmt.filter(DeckBox.name.ilike(f'%{name}%'))
-        deckboxes = db.session.scalars(stmt).all()
-        return deckboxes_schema.jsonify(deckboxes), 200
+        deckboxes, pagination = keyset_paginate(stmt, DeckBox.id)
+        return projected_schema('deckbox', fields, many=True).jsonify(deckboxes), 200, pagination_headers(pagination)
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Search failed', 'details': str(e)}), 500
 
@@ -229,9 +271,13 @@ def filter_deckbox_decks(deckbox_id):
     Query Parameters:
         format (str): Filter by deck format
         name (str): Filter by deck name
+        after (int): Keyset cursor; return decks after this ID
+        limit (int): Page size; paging is only applied when after or limit is given
+        count (bool): Include the total in X-Total-Count
         
     Returns:
         200: Filtered list of decks
+        400: Invalid paging parameters
         404: Deckbox not found
         500: Filter operation failed
     """
@@ -250,9 +296,11 @@ def filter_deckbox_decks(deckbox_id):
         if deck_name := request.args.get('name'):
             stmt = stmt.filter(Deck.name.ilike(f'%{deck_name}%'))
             
-        decks = db.session.scalars(stmt).all()
-        return decks_schema.jsonify(decks), 200
+        decks, pagination = keyset_paginate(stmt, Deck.id)
+        return decks_schema.jsonify(decks), 200, pagination_headers(pagination)
         
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({
             'error': 'Filter failed',
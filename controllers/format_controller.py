@@ -10,6 +10,7 @@ from models.deck import Deck
 from models.deckcard import DeckCard
 from models.format import Format
 from init import db
+from utils.pagination import keyset_paginate, pagination_headers
 
 format_controller = Blueprint('formats', __name__)
 
@@ -18,14 +19,22 @@ def get_formats():
     """
     Retrieve all game formats.
     
+    Query Parameters:
+        after (int): Keyset cursor; return formats after this ID
+        limit (int): Page size; paging is only applied when after or limit is given
+        count (bool): Include the total in X-Total-Count
+        
     Returns:
         200: List of all formats
+        400: Invalid paging parameters
         500: Database query failed
     """
     try:
         stmt = db.select(Format)
-        formats = db.session.scalars(stmt).all()
-        return jsonify([format.to_dict() for format in formats]), 200
+        formats, pagination = keyset_paginate(stmt, Format.id)
+        return jsonify([format.to_dict() for format in formats]), 200, pagination_headers(pagination)
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to retrieve formats', 'details': str(e)}), 500
 
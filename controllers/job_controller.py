@@ -0,0 +1,39 @@
+'''Controller for polling background import jobs'''
+
+from flask import Blueprint, current_app, jsonify
+from init import db
+from models.import_job import ImportJob
+from schemas.import_job_schema import import_job_schema
+from utils.jobs import fail_stale_jobs, live_progress
+
+job_controller = Blueprint('job_controller', __name__)
+
+@job_controller.route('/<string:job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Report the progress and outcome of an import job.
+    
+    A queued or running job whose row has not been written for
+    IMPORT_JOB_TIMEOUT seconds, and that this process is not running, is
+    reported (and recorded) as failed: its worker stopped.
+    
+    Parameters:
+        job_id (str): Identifier returned by the import endpoint
+        
+    Returns:
+        200: Job status, progress and, once finished, the import result
+        404: Job not found
+        500: Database query failed
+    """
+    try:
+        job = db.session.get(ImportJob, job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        if job.status in ('queued', 'running') and fail_stale_jobs(current_app.config['IMPORT_JOB_TIMEOUT'], job_id):
+            db.session.refresh(job)
+        data = import_job_schema.dump(job)
+        if job.status == 'running' and (progress := live_progress(job_id)) is not None:
+            data['progress'] = progress
+        return jsonify(data), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to retrieve job', 'details': str(e)}), 500
@@ -4,7 +4,7 @@
 from flask import Flask
 from dotenv import load_dotenv
 import os
-from init import db, ma
+from init import db, ma, migrate
 from controllers.deck_controller import deck_controller
 from controllers.deckbox_controller import deckbox_controller
 from controllers.cli_controller import cli_controller
@@ -14,6 +14,9 @@ from controllers.cardset_controller import cardset_controller
 from controllers.format_controller import format_controller
 from controllers.cardtype_controller import cardtype_controller
 from controllers.battlelog_controller import battlelogs
+from controllers.job_controller import job_controller
+from utils.query_counter import init_query_counter
+from utils.jobs import recover_jobs
 
 def create_app():
     """
@@ -30,10 +33,31 @@ def create_app():
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URI')
     app.config['SQLALCHEMY_ECHO'] = True
     app.json.sort_keys = False
+
+    # Battle log storage: 'text' or 'zlib' (compressed with the newest dictionary)
+    app.config['BATTLELOG_STORAGE'] = os.environ.get('BATTLELOG_STORAGE', 'text')
+    app.config['BATTLELOG_IMPORT_WORKERS'] = int(os.environ.get('BATTLELOG_IMPORT_WORKERS') or 0) or None
+
+    # Background imports: ?async=true per request, or ASYNC_IMPORTS=1 for all
+    app.config['ASYNC_IMPORTS'] = os.environ.get('ASYNC_IMPORTS', '').lower() in ('1', 'true', 'yes')
+    app.config['IMPORT_JOB_WORKERS'] = int(os.environ.get('IMPORT_JOB_WORKERS') or 4)
+    # Seconds a queued or running job may go without a state or progress write before it counts as abandoned
+    app.config['IMPORT_JOB_TIMEOUT'] = int(os.environ.get('IMPORT_JOB_TIMEOUT') or 900)
+
+    # Serialize hot list endpoints straight from result rows; FAST_SERIALIZER=0 uses the schemas
+    app.config['FAST_SERIALIZER'] = os.environ.get('FAST_SERIALIZER', '1').lower() in ('1', 'true', 'yes')
+
+    # Per-request query counting: X-Query-Count / Server-Timing headers and repeated statement warnings
+    app.config['QUERY_COUNTER'] = os.environ.get('QUERY_COUNTER', '1').lower() in ('1', 'true', 'yes')
+    app.config['QUERY_REPEAT_THRESHOLD'] = int(os.environ.get('QUERY_REPEAT_THRESHOLD') or 10)
+    app.config['QUERY_REPEAT_RAISE'] = os.environ.get('QUERY_REPEAT_RAISE', '').lower() in ('1', 'true', 'yes')
     
     # Initialize extensions
     db.init_app(app)
     ma.init_app(app)
+    migrate.init_app(app, db)
+    if app.config['QUERY_COUNTER']:
+        init_query_counter(app)
     
     # Register blueprints
     app.register_blueprint(cli_controller)
@@ -45,5 +69,9 @@ def create_app():
     app.register_blueprint(format_controller, url_prefix='/api/formats')
     app.register_blueprint(cardtype_controller, url_prefix='/api/cardtypes')
     app.register_blueprint(battlelogs, url_prefix='/api/battlelogs')
+    app.register_blueprint(job_controller, url_prefix='/api/jobs')
+
+    # Jobs whose worker stopped mid-import would otherwise stay queued or running forever
+    recover_jobs(app)
     
     return app
\ No newline at end of file
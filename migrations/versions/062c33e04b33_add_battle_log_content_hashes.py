@@ -0,0 +1,90 @@
+"""add battle log content hashes
+
+Revision ID: 062c33e04b33
+Revises:
+Create Date: 2026-10-18 10:28:06.715822
+
+First revision after the original schema. Existing logs are hashed here;
+when a deck already holds the same log more than once only the oldest copy
+gets its hash, so the unique (deck_id, raw_log_sha256) index can be built
+without deleting any rows. Rows without a raw log keep a NULL hash.
+
+Databases created with /run/create after a later request already have
+some of these objects, so every step here and in the following revisions
+only runs when its column, table or index is missing.
+
+"""
+import hashlib
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '062c33e04b33'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+battlelogs = sa.table(
+    'battlelogs',
+    sa.column('id', sa.Integer),
+    sa.column('deck_id', sa.Integer),
+    sa.column('raw_log', sa.Text),
+    sa.column('raw_log_sha256', sa.String)
+)
+
+
+def backfill_hashes(bind):
+    """Hash existing logs in id order, skipping repeats of a log within a deck"""
+    seen = set(bind.execute(
+        sa.select(battlelogs.c.deck_id, battlelogs.c.raw_log_sha256)
+        .where(battlelogs.c.raw_log_sha256.is_not(None))
+    ).all())
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(battlelogs.c.id, battlelogs.c.deck_id, battlelogs.c.raw_log)
+            .where(
+                battlelogs.c.id > last_id,
+                battlelogs.c.raw_log_sha256.is_(None),
+                battlelogs.c.raw_log.is_not(None)
+            )
+            .order_by(battlelogs.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            digest = hashlib.sha256(row.raw_log.encode('utf-8')).hexdigest()
+            if (row.deck_id, digest) not in seen:
+                seen.add((row.deck_id, digest))
+                updates.append({'row_id': row.id, 'digest': digest})
+        if updates:
+            bind.execute(
+                sa.update(battlelogs)
+                .where(battlelogs.c.id == sa.bindparam('row_id'))
+                .values(raw_log_sha256=sa.bindparam('digest')),
+                updates
+            )
+        last_id = rows[-1].id
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if 'raw_log_sha256' not in {column['name'] for column in inspector.get_columns('battlelogs')}:
+        op.add_column('battlelogs', sa.Column('raw_log_sha256', sa.String(length=64), nullable=True))
+
+    backfill_hashes(bind)
+
+    if 'ix_battlelogs_deck_id_raw_log_sha256' not in {index['name'] for index in inspector.get_indexes('battlelogs')}:
+        op.create_index('ix_battlelogs_deck_id_raw_log_sha256', 'battlelogs', ['deck_id', 'raw_log_sha256'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_battlelogs_deck_id_raw_log_sha256', table_name='battlelogs')
+    with op.batch_alter_table('battlelogs') as batch_op:
+        batch_op.drop_column('raw_log_sha256')
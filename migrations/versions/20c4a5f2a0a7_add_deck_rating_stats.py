@@ -0,0 +1,66 @@
+"""add deck rating stats
+
+Revision ID: 20c4a5f2a0a7
+Revises: b136681d472d
+Create Date: 2026-10-18 10:28:17.145327
+
+Scores are filled with the prior in models.deck_rating_stats at the time
+of this revision (5 ratings of 3.0); flask rebuild-rating-stats recomputes
+them if the prior changes later.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20c4a5f2a0a7'
+down_revision = 'b136681d472d'
+branch_labels = None
+depends_on = None
+
+RATING_PRIOR_WEIGHT = 5
+RATING_PRIOR_MEAN = 3.0
+
+ratings = sa.table(
+    'ratings',
+    sa.column('id', sa.Integer),
+    sa.column('deck_id', sa.Integer),
+    sa.column('score', sa.Integer)
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table('deck_rating_stats'):
+        return
+    stats = op.create_table(
+        'deck_rating_stats',
+        sa.Column('deck_id', sa.Integer(), nullable=False),
+        sa.Column('rating_count', sa.Integer(), nullable=False),
+        sa.Column('rating_sum', sa.Integer(), nullable=False),
+        sa.Column('average', sa.Float(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['deck_id'], ['decks.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('deck_id')
+    )
+    op.create_index('ix_deck_rating_stats_average', 'deck_rating_stats', ['average'])
+    op.create_index('ix_deck_rating_stats_score', 'deck_rating_stats', ['score'])
+
+    rating_count = sa.func.count(ratings.c.id)
+    rating_sum = sa.cast(sa.func.sum(ratings.c.score), sa.Float)
+    bind.execute(stats.insert().from_select(
+        ['deck_id', 'rating_count', 'rating_sum', 'average', 'score'],
+        sa.select(
+            ratings.c.deck_id,
+            rating_count,
+            sa.func.sum(ratings.c.score),
+            rating_sum / rating_count,
+            (RATING_PRIOR_WEIGHT * RATING_PRIOR_MEAN + rating_sum) / (RATING_PRIOR_WEIGHT + rating_count)
+        )
+        .group_by(ratings.c.deck_id)
+    ))
+
+
+def downgrade():
+    op.drop_table('deck_rating_stats')
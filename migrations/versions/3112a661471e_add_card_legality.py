@@ -0,0 +1,49 @@
+"""add card legality
+
+Revision ID: 3112a661471e
+Revises: 7d2669de4757
+Create Date: 2026-10-18 10:28:14.403018
+
+The table is filled with the same rule the application applies: a card is
+legal when its set has no release date or was released on or after the
+format's start date.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3112a661471e'
+down_revision = '7d2669de4757'
+branch_labels = None
+depends_on = None
+
+cards = sa.table('cards', sa.column('id', sa.Integer), sa.column('cardset_id', sa.Integer))
+cardsets = sa.table('cardsets', sa.column('id', sa.Integer), sa.column('release_date', sa.Date))
+formats = sa.table('formats', sa.column('id', sa.Integer), sa.column('start_date', sa.Date))
+
+
+def upgrade():
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table('card_legality'):
+        return
+    legality = op.create_table(
+        'card_legality',
+        sa.Column('card_id', sa.Integer(), nullable=False),
+        sa.Column('format_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['card_id'], ['cards.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['format_id'], ['formats.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('card_id', 'format_id')
+    )
+    op.create_index('ix_card_legality_format_id_card_id', 'card_legality', ['format_id', 'card_id'])
+    bind.execute(legality.insert().from_select(
+        ['card_id', 'format_id'],
+        sa.select(cards.c.id, formats.c.id)
+        .join(cardsets, cards.c.cardset_id == cardsets.c.id)
+        .join(formats, sa.or_(cardsets.c.release_date.is_(None), cardsets.c.release_date >= formats.c.start_date))
+    ))
+
+
+def downgrade():
+    op.drop_table('card_legality')
@@ -0,0 +1,45 @@
+"""add battle events
+
+Revision ID: 3c67ca94dba0
+Revises: 8a6900df23a5
+Create Date: 2026-10-18 10:28:11.472761
+
+Events for logs imported before this revision are parsed by
+flask backfill-battle-events.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c67ca94dba0'
+down_revision = '8a6900df23a5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('battle_events'):
+        return
+    op.create_table(
+        'battle_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('battlelog_id', sa.Integer(), nullable=False),
+        sa.Column('sequence', sa.Integer(), nullable=False),
+        sa.Column('turn', sa.Integer(), nullable=False),
+        sa.Column('player', sa.String(length=50), nullable=False),
+        sa.Column('action', sa.String(length=20), nullable=False),
+        sa.Column('card_id', sa.Integer(), nullable=True),
+        sa.Column('target_card_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['battlelog_id'], ['battlelogs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['card_id'], ['cards.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['target_card_id'], ['cards.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_battle_events_battlelog_id_turn', 'battle_events', ['battlelog_id', 'turn'])
+    op.create_index('ix_battle_events_card_id', 'battle_events', ['card_id'])
+
+
+def downgrade():
+    op.drop_table('battle_events')
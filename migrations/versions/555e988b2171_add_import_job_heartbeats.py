@@ -0,0 +1,26 @@
+"""add import job heartbeats
+
+Revision ID: 555e988b2171
+Revises: b1540a4474e4
+Create Date: 2026-10-18 10:43:21.398686
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '555e988b2171'
+down_revision = 'b1540a4474e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'updated_at' not in {column['name'] for column in sa.inspect(op.get_bind()).get_columns('import_jobs')}:
+        op.add_column('import_jobs', sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('import_jobs') as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,123 @@
+"""make card names unique per set
+
+Revision ID: 5e60a4c63bba
+Revises: 555e988b2171
+Create Date: 2026-10-18 10:51:00.028801
+
+Cards sharing a name and set are merged into the lowest ID first, the same
+way flask dedupe-cards does: deck cards and battle events are re-pointed,
+deck card rows that would then collide are folded together and the
+affected decks get a new content_version. ix_cards_name_cardset_id is then
+rebuilt as a unique index.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e60a4c63bba'
+down_revision = '555e988b2171'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+cards = sa.table(
+    'cards',
+    sa.column('id', sa.Integer),
+    sa.column('name', sa.String),
+    sa.column('cardset_id', sa.Integer)
+)
+deckcards = sa.table(
+    'deckcards',
+    sa.column('id', sa.Integer),
+    sa.column('deck_id', sa.Integer),
+    sa.column('card_id', sa.Integer),
+    sa.column('quantity', sa.Integer)
+)
+decks = sa.table('decks', sa.column('id', sa.Integer), sa.column('content_version', sa.Integer))
+battle_events = sa.table(
+    'battle_events',
+    sa.column('card_id', sa.Integer),
+    sa.column('target_card_id', sa.Integer)
+)
+card_legality = sa.table('card_legality', sa.column('card_id', sa.Integer))
+
+
+def merge_batch(bind, mapping):
+    """Merge one batch of duplicate cards, mapping loser IDs to survivor IDs"""
+    losers = sorted(mapping)
+    bind.execute(
+        sa.update(decks)
+        .where(decks.c.id.in_(sa.select(deckcards.c.deck_id).where(deckcards.c.card_id.in_(losers))))
+        .values(content_version=decks.c.content_version + 1)
+    )
+
+    # Fold deck card rows that would collide on the unique (deck_id, card_id) index
+    rows = bind.execute(
+        sa.select(deckcards.c.id, deckcards.c.deck_id, deckcards.c.card_id, deckcards.c.quantity)
+        .where(deckcards.c.card_id.in_(losers + sorted(set(mapping.values()))))
+        .order_by(deckcards.c.id)
+    ).all()
+    groups = {}
+    for row in rows:
+        groups.setdefault((row.deck_id, mapping.get(row.card_id, row.card_id)), []).append(row)
+    for group in groups.values():
+        if len(group) > 1:
+            bind.execute(
+                sa.update(deckcards)
+                .where(deckcards.c.id == group[0].id)
+                .values(quantity=sum(row.quantity for row in group))
+            )
+            bind.execute(sa.delete(deckcards).where(deckcards.c.id.in_([row.id for row in group[1:]])))
+
+    for table, column in ((deckcards, 'card_id'), (battle_events, 'card_id'), (battle_events, 'target_card_id')):
+        bind.execute(
+            sa.update(table)
+            .where(table.c[column].in_(losers))
+            .values({column: sa.case(mapping, value=table.c[column])})
+        )
+    bind.execute(sa.delete(card_legality).where(card_legality.c.card_id.in_(losers)))
+    bind.execute(sa.delete(cards).where(cards.c.id.in_(losers)))
+
+
+def merge_duplicate_cards(bind):
+    """Merge cards sharing a name and set into the one with the lowest ID, in batches"""
+    while True:
+        groups = bind.execute(
+            sa.select(cards.c.name, cards.c.cardset_id, sa.func.min(cards.c.id).label('keep_id'))
+            .group_by(cards.c.name, cards.c.cardset_id)
+            .having(sa.func.count() > 1)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not groups:
+            break
+        keep_ids = {(group.name, group.cardset_id): group.keep_id for group in groups}
+        duplicates = bind.execute(
+            sa.select(cards.c.id, cards.c.name, cards.c.cardset_id)
+            .where(sa.tuple_(cards.c.name, cards.c.cardset_id).in_(list(keep_ids)))
+        ).all()
+        merge_batch(bind, {
+            card.id: keep_ids[(card.name, card.cardset_id)]
+            for card in duplicates
+            if card.id != keep_ids[(card.name, card.cardset_id)]
+        })
+
+
+def upgrade():
+    bind = op.get_bind()
+    merge_duplicate_cards(bind)
+
+    indexes = {index['name']: index for index in sa.inspect(bind).get_indexes('cards')}
+    existing = indexes.get('ix_cards_name_cardset_id')
+    if existing is not None and existing['unique']:
+        return
+    if existing is not None:
+        op.drop_index('ix_cards_name_cardset_id', table_name='cards')
+    op.create_index('ix_cards_name_cardset_id', 'cards', ['name', 'cardset_id'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_cards_name_cardset_id', table_name='cards')
+    op.create_index('ix_cards_name_cardset_id', 'cards', ['name', 'cardset_id'], unique=False)
@@ -0,0 +1,66 @@
+"""add battle log timestamps and deck battle stats
+
+Revision ID: 71547ca179b6
+Revises: 062c33e04b33
+Create Date: 2026-10-18 10:28:08.194597
+
+Logs imported before this revision have no created_at, so the rebuilt
+statistics only get a last_played once a deck records a new battle.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '71547ca179b6'
+down_revision = '062c33e04b33'
+branch_labels = None
+depends_on = None
+
+battlelogs = sa.table(
+    'battlelogs',
+    sa.column('id', sa.Integer),
+    sa.column('deck_id', sa.Integer),
+    sa.column('win_loss', sa.Boolean),
+    sa.column('total_turns', sa.Integer),
+    sa.column('created_at', sa.DateTime)
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if 'created_at' not in {column['name'] for column in inspector.get_columns('battlelogs')}:
+        op.add_column('battlelogs', sa.Column('created_at', sa.DateTime(), nullable=True))
+
+    if inspector.has_table('deck_battle_stats'):
+        return
+    stats = op.create_table(
+        'deck_battle_stats',
+        sa.Column('deck_id', sa.Integer(), nullable=False),
+        sa.Column('games', sa.Integer(), nullable=False),
+        sa.Column('wins', sa.Integer(), nullable=False),
+        sa.Column('turn_sum', sa.Integer(), nullable=False),
+        sa.Column('last_played', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['deck_id'], ['decks.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('deck_id')
+    )
+    bind.execute(stats.insert().from_select(
+        ['deck_id', 'games', 'wins', 'turn_sum', 'last_played'],
+        sa.select(
+            battlelogs.c.deck_id,
+            sa.func.count(battlelogs.c.id),
+            sa.func.count(battlelogs.c.id).filter(battlelogs.c.win_loss.is_(True)),
+            sa.func.coalesce(sa.func.sum(battlelogs.c.total_turns), 0),
+            sa.func.max(battlelogs.c.created_at)
+        )
+        .where(battlelogs.c.deck_id.is_not(None))
+        .group_by(battlelogs.c.deck_id)
+    ))
+
+
+def downgrade():
+    op.drop_table('deck_battle_stats')
+    with op.batch_alter_table('battlelogs') as batch_op:
+        batch_op.drop_column('created_at')
@@ -0,0 +1,52 @@
+"""add battle log compression dictionaries
+
+Revision ID: 8a6900df23a5
+Revises: 71547ca179b6
+Create Date: 2026-10-18 10:28:09.908620
+
+Existing logs stay in raw_log; flask compress-logs moves them into
+compressed storage once a dictionary has been built.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a6900df23a5'
+down_revision = '71547ca179b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table('log_dictionaries'):
+        op.create_table(
+            'log_dictionaries',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('data', sa.LargeBinary(), nullable=False),
+            sa.Column('sample_count', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    columns = {column['name'] for column in inspector.get_columns('battlelogs')}
+    if 'log_dictionary_id' in columns:
+        return
+    with op.batch_alter_table('battlelogs') as batch_op:
+        if 'raw_log_compressed' not in columns:
+            batch_op.add_column(sa.Column('raw_log_compressed', sa.LargeBinary(), nullable=True))
+        batch_op.add_column(sa.Column('log_dictionary_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            'fk_battlelogs_log_dictionary_id_log_dictionaries', 'log_dictionaries', ['log_dictionary_id'], ['id']
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('battlelogs') as batch_op:
+        batch_op.drop_constraint('fk_battlelogs_log_dictionary_id_log_dictionaries', type_='foreignkey')
+        batch_op.drop_column('log_dictionary_id')
+        batch_op.drop_column('raw_log_compressed')
+    op.drop_table('log_dictionaries')
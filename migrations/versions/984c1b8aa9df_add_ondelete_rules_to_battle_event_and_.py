@@ -0,0 +1,53 @@
+"""add ondelete rules to battle event and deck stats foreign keys
+
+Revision ID: 984c1b8aa9df
+Revises: 20c4a5f2a0a7
+Create Date: 2026-10-18 10:30:09.408379
+
+The earlier revisions create these tables with their ON DELETE rules, but
+databases created with /run/create before the rules were declared have
+plain foreign keys, so deleting a card used in a battle event or a deck
+with statistics fails. Those keys are recreated here; keys that already
+carry the rule are left alone.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '984c1b8aa9df'
+down_revision = '20c4a5f2a0a7'
+branch_labels = None
+depends_on = None
+
+# (table, column, referred table, ON DELETE rule)
+FOREIGN_KEYS = [
+    ('battle_events', 'card_id', 'cards', 'SET NULL'),
+    ('battle_events', 'target_card_id', 'cards', 'SET NULL'),
+    ('deck_battle_stats', 'deck_id', 'decks', 'CASCADE'),
+    ('deck_rating_stats', 'deck_id', 'decks', 'CASCADE'),
+]
+
+# Names unnamed SQLite foreign keys so batch mode can drop them
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table, column, referent, ondelete in FOREIGN_KEYS:
+        for foreign_key in inspector.get_foreign_keys(table):
+            if foreign_key['constrained_columns'] != [column]:
+                continue
+            if (foreign_key['options'].get('ondelete') or '').upper() == ondelete:
+                break
+            name = foreign_key['name'] or f'fk_{table}_{column}_{referent}'
+            with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+                batch_op.drop_constraint(name, type_='foreignkey')
+                batch_op.create_foreign_key(name, referent, [column], ['id'], ondelete=ondelete)
+            break
+
+
+def downgrade():
+    # The tables are created with these rules by earlier revisions, so there is nothing to undo
+    pass
@@ -0,0 +1,34 @@
+"""add deck content and format legality versions
+
+Revision ID: b136681d472d
+Revises: 3112a661471e
+Create Date: 2026-10-18 10:28:15.650743
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b136681d472d'
+down_revision = '3112a661471e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'content_version' not in {column['name'] for column in inspector.get_columns('decks')}:
+        op.add_column('decks', sa.Column('content_version', sa.Integer(), server_default='0', nullable=False))
+    if 'legality_version' not in {column['name'] for column in inspector.get_columns('formats')}:
+        op.add_column('formats', sa.Column(
+            'legality_version', sa.Integer(), server_default='0', nullable=False,
+            comment="Bumped whenever the format's card legality is recomputed"
+        ))
+
+
+def downgrade():
+    with op.batch_alter_table('formats') as batch_op:
+        batch_op.drop_column('legality_version')
+    with op.batch_alter_table('decks') as batch_op:
+        batch_op.drop_column('content_version')
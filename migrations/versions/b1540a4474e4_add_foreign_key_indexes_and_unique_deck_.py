@@ -0,0 +1,100 @@
+"""add foreign key indexes and unique deck cards
+
+Revision ID: b1540a4474e4
+Revises: 984c1b8aa9df
+Create Date: 2026-10-18 10:13:00.095956
+
+Last revision of the chain that brings the original schema up to date;
+the earlier revisions add the columns and tables this one indexes.
+Databases created with /run/create after the indexes were declared
+already have them, so each index is only created when it is missing.
+Duplicate (deck_id, card_id) rows are merged into the lowest ID, summing
+quantities and bumping the deck's content_version, before the unique
+index is built.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b1540a4474e4'
+down_revision = '984c1b8aa9df'
+branch_labels = None
+depends_on = None
+
+
+# (table, index name, columns, unique)
+INDEXES = [
+    ('cards', 'ix_cards_cardtype_id', ['cardtype_id'], False),
+    ('cards', 'ix_cards_cardset_id', ['cardset_id'], False),
+    ('cards', 'ix_cards_name_cardset_id', ['name', 'cardset_id'], False),
+    ('decks', 'ix_decks_format_id', ['format_id'], False),
+    ('decks', 'ix_decks_deckbox_id', ['deckbox_id'], False),
+    ('deckcards', 'ix_deckcards_deck_id_card_id', ['deck_id', 'card_id'], True),
+    ('deckcards', 'ix_deckcards_card_id', ['card_id'], False),
+    ('ratings', 'ix_ratings_deck_id', ['deck_id'], False),
+    ('battlelogs', 'ix_battlelogs_log_dictionary_id', ['log_dictionary_id'], False),
+    ('battle_events', 'ix_battle_events_target_card_id', ['target_card_id'], False),
+]
+
+deckcards = sa.table(
+    'deckcards',
+    sa.column('id', sa.Integer),
+    sa.column('deck_id', sa.Integer),
+    sa.column('card_id', sa.Integer),
+    sa.column('quantity', sa.Integer)
+)
+decks = sa.table('decks', sa.column('id', sa.Integer), sa.column('content_version', sa.Integer))
+
+
+def merge_duplicate_deckcards(bind):
+    """Fold repeated (deck_id, card_id) rows into the row with the lowest ID"""
+    duplicates = bind.execute(
+        sa.select(
+            deckcards.c.deck_id,
+            deckcards.c.card_id,
+            sa.func.min(deckcards.c.id).label('keep_id'),
+            sa.func.sum(deckcards.c.quantity).label('quantity')
+        )
+        .group_by(deckcards.c.deck_id, deckcards.c.card_id)
+        .having(sa.func.count() > 1)
+    ).all()
+    for row in duplicates:
+        bind.execute(
+            sa.update(deckcards)
+            .where(deckcards.c.id == row.keep_id)
+            .values(quantity=row.quantity)
+        )
+        bind.execute(
+            sa.delete(deckcards)
+            .where(deckcards.c.deck_id == row.deck_id)
+            .where(deckcards.c.card_id == row.card_id)
+            .where(deckcards.c.id != row.keep_id)
+        )
+    if duplicates:
+        bind.execute(
+            sa.update(decks)
+            .where(decks.c.id.in_(sorted({row.deck_id for row in duplicates})))
+            .values(content_version=decks.c.content_version + 1)
+        )
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    merge_duplicate_deckcards(bind)
+
+    for table, name, columns, unique in INDEXES:
+        if name in {index['name'] for index in inspector.get_indexes(table)}:
+            continue
+        op.create_index(name, table, columns, unique=unique)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    for table, name, columns, unique in reversed(INDEXES):
+        if name in {index['name'] for index in inspector.get_indexes(table)}:
+            op.drop_index(name, table_name=table)
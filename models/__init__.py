@@ -9,6 +9,12 @@ from .cardset import CardSet
 from .format import Format
 from .cardtype import CardType
 from .battlelog import Battlelog
+from .deck_battle_stats import DeckBattleStats
+from .deck_rating_stats import DeckRatingStats
+from .log_dictionary import LogDictionary
+from .battle_event import BattleEvent
+from .import_job import ImportJob
+from .card_legality import CardLegality
 
 __all__ = [
     'Card',
@@ -19,5 +25,11 @@ __all__ = [
     'CardType',
     'CardSet', 
     'Format',
-    'Battlelog'
+    'Battlelog',
+    'DeckBattleStats',
+    'DeckRatingStats',
+    'LogDictionary',
+    'BattleEvent',
+    'ImportJob',
+    'CardLegality'
 ]
\ No newline at end of file
@@ -0,0 +1,117 @@
+'''BattleEvent model for structured actions parsed from battle logs'''
+
+from init import db
+from models.battlelog import Battlelog
+from models.card import Card
+from models.deckcard import DeckCard
+
+
+class BattleEvent(db.Model):
+    """
+    A single action taken during a recorded battle.
+    
+    Events are parsed from the raw battle log on import so per-card and
+    per-turn questions can be answered with indexed queries.
+    
+    Attributes:
+        id (int): Primary key for the event
+        battlelog_id (int): Foreign key reference to the source battle log
+        sequence (int): Position of the event within its battle log
+        turn (int): Turn number the event happened on (0 for setup)
+        player (str): Name of the acting player
+        action (str): Kind of action (drew, played, attached, attacked, used,
+            evolved, retreated, discarded, knocked_out)
+        card_id (int): Foreign key reference to the acting card, if known
+        target_card_id (int): Foreign key reference to the target card, if any
+        battlelog (relationship): Relationship to the source battle log
+    """
+    
+    __tablename__ = 'battle_events'
+    __table_args__ = (
+        db.Index('ix_battle_events_battlelog_id_turn', 'battlelog_id', 'turn'),
+        db.Index('ix_battle_events_card_id', 'card_id'),
+        db.Index('ix_battle_events_target_card_id', 'target_card_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    battlelog_id = db.Column(db.Integer, db.ForeignKey('battlelogs.id', ondelete='CASCADE'), nullable=False)
+    sequence = db.Column(db.Integer, nullable=False)
+    turn = db.Column(db.Integer, nullable=False)
+    player = db.Column(db.String(50), nullable=False)
+    action = db.Column(db.String(20), nullable=False)
+    card_id = db.Column(db.Integer, db.ForeignKey('cards.id', ondelete='SET NULL'))
+    target_card_id = db.Column(db.Integer, db.ForeignKey('cards.id', ondelete='SET NULL'))
+
+    # Relationships
+    battlelog = db.relationship('Battlelog', back_populates='events')
+
+    def __repr__(self):
+        return f'<BattleEvent {self.battlelog_id}#{self.sequence} {self.action}>'
+
+
+def insert_battle_events(session, events_by_battlelog):
+    """
+    Store parsed battle events, resolving card names to card ids.
+    
+    A name resolves to the printing in the battle log's own deck when the
+    deck holds one, since the same name can exist in several sets; names the
+    deck does not hold, such as the opponent's cards, fall back to the
+    lowest card id with that name. All names are resolved with one query and
+    all events are inserted with one Core executemany, however many battle
+    logs are included. Every row carries every column, including NULL card
+    ids, so the rows are not split into separate statements by which keys
+    they set.
+    
+    Parameters:
+        session: Session to insert with; the battle logs must already be
+            flushed and the caller commits
+        events_by_battlelog (dict): Battlelog id mapped to parse_battle_events output
+        
+    Returns:
+        int: Number of events inserted
+    """
+    names = {
+        name
+        for events in events_by_battlelog.values()
+        for event in events
+        for name in (event['card'], event['target'])
+        if name
+    }
+    card_ids = {}
+    if names:
+        in_deck = db.select(DeckCard.id).where(
+            DeckCard.deck_id == Battlelog.deck_id,
+            DeckCard.card_id == Card.id
+        ).exists()
+        rows = session.execute(
+            db.select(
+                Battlelog.id,
+                Card.name,
+                db.func.coalesce(db.func.min(db.case((in_deck, Card.id))), db.func.min(Card.id))
+            )
+            .join(Card, Card.name.in_(names))
+            .where(Battlelog.id.in_(list(events_by_battlelog)))
+            .group_by(Battlelog.id, Card.name)
+        ).all()
+        card_ids = {(battlelog_id, name): card_id for battlelog_id, name, card_id in rows}
+
+    def resolve(battlelog_id, name):
+        """Card id for a name as seen from one battle log"""
+        return card_ids.get((battlelog_id, name)) if name else None
+
+    rows = [
+        {
+            'battlelog_id': battlelog_id,
+            'sequence': event['sequence'],
+            'turn': event['turn'],
+            'player': event['player'][:50],
+            'action': event['action'],
+            'card_id': resolve(battlelog_id, event['card']),
+            'target_card_id': resolve(battlelog_id, event['target'])
+        }
+        for battlelog_id, events in events_by_battlelog.items()
+        for event in events
+    ]
+    if rows:
+        session.execute(BattleEvent.__table__.insert(), rows)
+    return len(rows)
@@ -1,6 +1,8 @@
 '''Battlelog model for managing Pokemon TCG battle logs'''
 
-from sqlalchemy import Column, Integer, Boolean, JSON, ForeignKey
+import hashlib
+from sqlalchemy import Column, Integer, Boolean, JSON, ForeignKey, String, Index, DateTime, LargeBinary, func
+from sqlalchemy.orm import deferred, validates
 from init import db
 
 class Battlelog(db.Model):
@@ -17,20 +19,55 @@ class Battlelog(db.Model):
         total_turns (int): Number of turns the battle lasted
         most_used_cards (JSON): Array of frequently played cards during the match
         key_synergy_cards (JSON): Array of cards that created effective combinations
-        raw_log (str): Complete text of the original battle log :no-index:
+        raw_log (str): Complete text of the original battle log, deferred until accessed :no-index:
+        raw_log_compressed (bytes): zlib-compressed raw log, used instead of raw_log when compression is enabled
+        log_dictionary_id (int): Foreign key to the preset dictionary raw_log_compressed was built with
+        raw_log_sha256 (str): Hex SHA-256 digest of raw_log, unique per deck
+        created_at (datetime): Timestamp of when the log was imported
         deck (relationship): Relationship to associated Deck model
+        events (relationship): Structured actions parsed from the log
     """
     
     __tablename__ = 'battlelogs'
+    __table_args__ = (
+        Index('ix_battlelogs_deck_id_raw_log_sha256', 'deck_id', 'raw_log_sha256', unique=True),
+        Index('ix_battlelogs_log_dictionary_id', 'log_dictionary_id'),
+    )
+
     id = Column(Integer, primary_key=True)
     deck_id = Column(Integer, ForeignKey('decks.id'))
     win_loss = Column(Boolean)
     total_turns = Column(Integer)
     most_used_cards = Column(JSON)
     key_synergy_cards = Column(JSON)
-    raw_log = Column(db.Text) 
+    raw_log = deferred(Column(db.Text))
+    raw_log_compressed = deferred(Column(LargeBinary))
+    log_dictionary_id = Column(Integer, ForeignKey('log_dictionaries.id'))
+    raw_log_sha256 = Column(String(64))
+    created_at = Column(DateTime, default=func.current_timestamp())
 
     deck = db.relationship("Deck", back_populates="battlelogs")
+    events = db.relationship("BattleEvent", back_populates="battlelog", cascade="all, delete-orphan")
+
+    @staticmethod
+    def hash_log(log_text):
+        """
+        Compute the digest used to detect duplicate battle logs.
+        
+        Parameters:
+            log_text (str): Raw battle log text
+            
+        Returns:
+            str: Hex SHA-256 digest of the UTF-8 encoded text
+        """
+        return hashlib.sha256(log_text.encode('utf-8')).hexdigest()
+
+    @validates('raw_log')
+    def _hash_raw_log(self, key, value):
+        """Keep raw_log_sha256 in step with raw_log"""
+        if value is not None:
+            self.raw_log_sha256 = self.hash_log(value)
+        return value
 
     def __repr__(self):
         return f"<Battlelog(deck_id={self.deck_id}, win={self.win_loss}, turns={self.total_turns})>"
@@ -9,6 +9,8 @@ class Card(db.Model):
     This model stores essential information about individual Pokemon cards including
     their name, type, and which set they belong to. It maintains relationships with
     CardType and CardSet models, as well as connecting to decks through DeckCards.
+    A set holds at most one card of each name, so imports can find-or-create
+    cards with INSERT ... ON CONFLICT DO NOTHING.
     
     Attributes:
         id (int): Primary key for the card
@@ -22,6 +24,11 @@ class Card(db.Model):
     """
     
     __tablename__ = 'cards'
+    __table_args__ = (
+        db.Index('ix_cards_cardtype_id', 'cardtype_id'),
+        db.Index('ix_cards_cardset_id', 'cardset_id'),
+        db.Index('ix_cards_name_cardset_id', 'name', 'cardset_id', unique=True),
+    )
 
     # Primary and foreign key columns
     id = db.Column(db.Integer, primary_key=True)
@@ -0,0 +1,168 @@
+'''CardLegality model for the precomputed card by format legality index'''
+
+from sqlalchemy import event, inspect, or_
+from sqlalchemy.orm import Session
+from init import db
+from models.card import Card
+from models.cardset import CardSet
+from models.format import Format
+
+
+class CardLegality(db.Model):
+    """
+    One row for every card that is legal in a format.
+
+    A card is legal when its set was released on or after the format's
+    start date (cards from sets without a release date are always legal).
+    Rows are recomputed whenever a card, a set's release date or a format's
+    start date changes, so legality is an indexed lookup rather than a date
+    join.
+
+    Attributes:
+        card_id (int): Legal card, part of the primary key
+        format_id (int): Format the card is legal in, part of the primary key
+    """
+
+    __tablename__ = 'card_legality'
+
+    card_id = db.Column(db.Integer, db.ForeignKey('cards.id', ondelete='CASCADE'), primary_key=True)
+    format_id = db.Column(db.Integer, db.ForeignKey('formats.id', ondelete='CASCADE'), primary_key=True)
+
+    __table_args__ = (
+        db.Index('ix_card_legality_format_id_card_id', 'format_id', 'card_id'),
+    )
+
+    def __repr__(self):
+        return f'<CardLegality {self.card_id}:{self.format_id}>'
+
+
+def refresh_card_legality(connection, card_ids=None, cardset_ids=None, format_ids=None, bump_versions=True):
+    """
+    Recompute legality rows, limited to the given cards, sets or formats.
+
+    With no arguments the whole table is rebuilt. Otherwise only rows for
+    cards in card_ids or cardset_ids, or for formats in format_ids, are
+    replaced. Unless bump_versions is False, the legality_version of every
+    affected format is bumped in the same transaction, so cached verdicts
+    keyed on it expire in every process once the change commits, and never
+    before. Indexing new cards or formats passes False: no existing deck
+    holds a card that did not exist yet, so no cached verdict can change,
+    and imports that create cards do not contend on the formats rows.
+
+    Parameters:
+        connection: Session or Connection to run in; the caller commits
+        card_ids (iterable, optional): Cards whose legality changed
+        cardset_ids (iterable, optional): Sets whose release date changed
+        format_ids (iterable, optional): Formats whose start date changed
+        bump_versions (bool, optional): Bump the affected formats' legality_version
+
+    Returns:
+        int: Number of legality rows inserted
+    """
+    scoped = card_ids is not None or cardset_ids is not None or format_ids is not None
+    card_filters = []
+    if card_ids:
+        card_filters.append(Card.id.in_(card_ids))
+    if cardset_ids:
+        card_filters.append(Card.cardset_id.in_(cardset_ids))
+
+    conditions = []
+    if card_filters:
+        conditions.append(Card.id.in_(db.select(Card.id).where(or_(*card_filters))))
+    if format_ids:
+        conditions.append(Format.id.in_(format_ids))
+    if scoped and not conditions:
+        return 0
+
+    if bump_versions:
+        # Card and set changes can affect every format; format changes only their own
+        bump = db.update(Format).values(legality_version=Format.legality_version + 1)
+        if not card_filters and format_ids:
+            bump = bump.where(Format.id.in_(format_ids))
+        connection.execute(bump.execution_options(synchronize_session=False))
+
+    delete = db.delete(CardLegality)
+    if scoped:
+        delete_conditions = []
+        if card_filters:
+            delete_conditions.append(CardLegality.card_id.in_(db.select(Card.id).where(or_(*card_filters))))
+            if card_ids:
+                # Catches cards that have since been deleted
+                delete_conditions.append(CardLegality.card_id.in_(card_ids))
+        if format_ids:
+            delete_conditions.append(CardLegality.format_id.in_(format_ids))
+        delete = delete.where(or_(*delete_conditions))
+    connection.execute(delete)
+
+    legal = (
+        db.select(Card.id, Format.id)
+        .join(CardSet, Card.cardset_id == CardSet.id)
+        .join(Format, or_(CardSet.release_date.is_(None), CardSet.release_date >= Format.start_date))
+    )
+    if conditions:
+        legal = legal.where(or_(*conditions))
+    result = connection.execute(
+        db.insert(CardLegality).from_select(['card_id', 'format_id'], legal)
+    )
+    return result.rowcount
+
+
+def _changed(obj, attribute):
+    """Check whether an attribute was modified in the current flush"""
+    return inspect(obj).attrs[attribute].history.has_changes()
+
+
+@event.listens_for(Session, 'after_flush')
+def _refresh_changed_legality(session, flush_context):
+    """Recompute legality for cards, sets and formats touched in this flush"""
+    # New cards and formats only gain rows; they cannot change an existing verdict
+    new_card_ids, new_format_ids = set(), set()
+    for obj in session.new:
+        if isinstance(obj, Card):
+            new_card_ids.add(obj.id)
+        elif isinstance(obj, Format):
+            new_format_ids.add(obj.id)
+    # Deleted formats take their rows with them through the cascade
+    for obj in session.deleted:
+        if isinstance(obj, Format):
+            new_format_ids.add(obj.id)
+    if new_card_ids or new_format_ids:
+        refresh_card_legality(session.connection(), new_card_ids, None, new_format_ids, bump_versions=False)
+        session.info['legality_uncommitted'] = True
+
+    card_ids, cardset_ids, format_ids = set(), set(), set()
+    for obj in session.dirty:
+        if isinstance(obj, Card) and _changed(obj, 'cardset_id'):
+            card_ids.add(obj.id)
+        elif isinstance(obj, CardSet) and _changed(obj, 'release_date'):
+            cardset_ids.add(obj.id)
+        elif isinstance(obj, Format) and _changed(obj, 'start_date'):
+            format_ids.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Card):
+            card_ids.add(obj.id)
+
+    if card_ids or cardset_ids or format_ids:
+        refresh_card_legality(session.connection(), card_ids, cardset_ids, format_ids)
+        session.info['legality_refreshed'] = True
+        session.info['legality_uncommitted'] = True
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def _expire_legality_versions(session, flush_context):
+    """Reload legality_version on loaded formats after a refresh bumped it behind the ORM's back"""
+    if session.info.pop('legality_refreshed', False):
+        for obj in list(session.identity_map.values()):
+            if isinstance(obj, Format):
+                session.expire(obj, ['legality_version'])
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _end_legality_transaction(session):
+    session.info.pop('legality_uncommitted', None)
+
+
+def legality_uncommitted(session):
+    """Check whether session holds a legality refresh that has not been committed yet"""
+    return session.info.get('legality_uncommitted', False)
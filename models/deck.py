@@ -1,6 +1,9 @@
 '''Deck model for managing Pokemon TCG decks'''
 
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
 from init import db
+from models.deckcard import DeckCard
 
 
 class Deck(db.Model):
@@ -14,9 +17,15 @@ class Deck(db.Model):
         format_id (int): Foreign key reference to the format
         deckbox_id (int): Foreign key reference to the deckbox
         created_at (datetime): Timestamp of deck creation
+        content_version (int): Bumped whenever the deck's cards or format change,
+            used as the cache key for derived data such as validation results
     """
     
     __tablename__ = 'decks'
+    __table_args__ = (
+        db.Index('ix_decks_format_id', 'format_id'),
+        db.Index('ix_decks_deckbox_id', 'deckbox_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
@@ -25,6 +34,7 @@ class Deck(db.Model):
     deckbox_id = db.Column(db.Integer, db.ForeignKey('deckboxes.id'))
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime, onupdate=db.func.current_timestamp())
+    content_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # Relationships
     deck_cards = db.relationship('DeckCard', back_populates='deck')
@@ -33,4 +43,50 @@ class Deck(db.Model):
     battlelogs = db.relationship('Battlelog', back_populates='deck')
 
     def __repr__(self):
-        return f'<Deck {self.name}>'
\ No newline at end of file
+        return f'<Deck {self.name}>'
+
+
+def bump_content_versions(session, deck_ids):
+    """
+    Bump the content version of decks changed outside the ORM.
+    
+    Parameters:
+        session: Session to run the update in; the caller commits
+        deck_ids: Iterable of deck IDs, or a select returning them
+    """
+    session.execute(
+        db.update(Deck)
+        .where(Deck.id.in_(deck_ids))
+        .values(content_version=Deck.content_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _deck_card_deck_ids(deck_card):
+    """Deck IDs whose contents a pending DeckCard change affects"""
+    state = inspect(deck_card)
+    deck_ids = set(state.attrs.deck_id.history.sum())
+    # Only consult the relationship if it is already loaded
+    deck = state.dict.get('deck')
+    if deck is not None and deck.id is not None:
+        deck_ids.add(deck.id)
+    return deck_ids
+
+
+@event.listens_for(Session, 'before_flush')
+def _bump_changed_decks(session, flush_context, instances):
+    """Bump the version of decks whose cards or format change in this flush"""
+    deck_ids = set()
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, DeckCard):
+            deck_ids |= _deck_card_deck_ids(obj)
+    for obj in session.dirty:
+        if isinstance(obj, DeckCard) and session.is_modified(obj):
+            deck_ids |= _deck_card_deck_ids(obj)
+        elif isinstance(obj, Deck) and inspect(obj).attrs.format_id.history.has_changes():
+            deck_ids.add(obj.id)
+
+    for deck_id in deck_ids - {None}:
+        deck = session.get(Deck, deck_id)
+        if deck is not None and deck not in session.new:
+            deck.content_version = Deck.content_version + 1
@@ -0,0 +1,103 @@
+'''DeckBattleStats model for aggregated Pokemon TCG battle results'''
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from init import db
+from models.battlelog import Battlelog
+from utils.bulk import upsert
+
+
+class DeckBattleStats(db.Model):
+    """
+    Running battle totals for a deck, maintained alongside its battle logs.
+    
+    A row is updated in the same flush as every Battlelog insert or delete,
+    so deck statistics are a single primary key read.
+    
+    Attributes:
+        deck_id (int): Primary key and foreign key reference to the deck
+        games (int): Number of recorded battles
+        wins (int): Number of victories
+        turn_sum (int): Sum of total_turns across all battles
+        last_played (datetime): When the most recent battle was recorded
+    """
+    
+    __tablename__ = 'deck_battle_stats'
+
+    deck_id = db.Column(db.Integer, db.ForeignKey('decks.id', ondelete='CASCADE'), primary_key=True)
+    games = db.Column(db.Integer, nullable=False, default=0)
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    turn_sum = db.Column(db.Integer, nullable=False, default=0)
+    last_played = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<DeckBattleStats {self.deck_id}: {self.wins}/{self.games}>'
+
+
+def rebuild_deck_battle_stats(session):
+    """
+    Recompute every deck's totals from the battlelogs table.
+    
+    Parameters:
+        session: Session to run the rebuild in; the caller commits
+        
+    Returns:
+        int: Number of decks with battle statistics
+    """
+    session.execute(db.delete(DeckBattleStats))
+    totals = (
+        db.select(
+            Battlelog.deck_id,
+            func.count(Battlelog.id),
+            func.count(Battlelog.id).filter(Battlelog.win_loss.is_(True)),
+            func.coalesce(func.sum(Battlelog.total_turns), 0),
+            func.max(Battlelog.created_at)
+        )
+        .where(Battlelog.deck_id.is_not(None))
+        .group_by(Battlelog.deck_id)
+    )
+    result = session.execute(
+        db.insert(DeckBattleStats).from_select(
+            ['deck_id', 'games', 'wins', 'turn_sum', 'last_played'],
+            totals
+        )
+    )
+    return result.rowcount
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_battlelog_deltas(session, flush_context):
+    """Fold battle logs inserted or deleted in this flush into deck totals"""
+    deltas = {}
+    changes = [(obj, 1) for obj in session.new] + [(obj, -1) for obj in session.deleted]
+    for battlelog, sign in changes:
+        if not isinstance(battlelog, Battlelog) or battlelog.deck_id is None:
+            continue
+        delta = deltas.setdefault(battlelog.deck_id, {'games': 0, 'wins': 0, 'turn_sum': 0, 'played': False})
+        delta['games'] += sign
+        delta['wins'] += sign if battlelog.win_loss else 0
+        delta['turn_sum'] += sign * (battlelog.total_turns or 0)
+        delta['played'] = delta['played'] or sign > 0
+
+    connection = session.connection()
+    for deck_id, delta in deltas.items():
+        # Deleting logs leaves last_played alone; a rebuild recomputes it exactly
+        last_played = {'last_played': func.current_timestamp()} if delta['played'] else {}
+        upsert(
+            connection,
+            DeckBattleStats,
+            values=dict(
+                deck_id=deck_id,
+                games=delta['games'],
+                wins=delta['wins'],
+                turn_sum=delta['turn_sum'],
+                **last_played
+            ),
+            index_elements=['deck_id'],
+            update=dict(
+                games=DeckBattleStats.games + delta['games'],
+                wins=DeckBattleStats.wins + delta['wins'],
+                turn_sum=DeckBattleStats.turn_sum + delta['turn_sum'],
+                **last_played
+            )
+        )
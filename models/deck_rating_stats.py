@@ -0,0 +1,136 @@
+'''DeckRatingStats model for aggregated Pokemon TCG deck ratings'''
+
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+from init import db
+from models.rating import Rating
+from utils.bulk import upsert
+
+# Bayesian prior: every deck starts as if it had this many ratings of this score,
+# so a single five-star rating does not outrank a deck with dozens of fours
+RATING_PRIOR_WEIGHT = 5
+RATING_PRIOR_MEAN = 3.0
+
+
+class DeckRatingStats(db.Model):
+    """
+    Running rating totals for a deck, maintained alongside its ratings.
+
+    A row is updated in the same flush as every Rating insert, delete,
+    score change or move to another deck, so averages, top-rated lists and rating range filters
+    read this table through its indexes instead of grouping ratings.
+
+    Attributes:
+        deck_id (int): Primary key and foreign key reference to the deck
+        rating_count (int): Number of ratings
+        rating_sum (int): Sum of all rating scores
+        average (float): rating_sum / rating_count
+        score (float): Bayesian weighted average used for ranking
+    """
+
+    __tablename__ = 'deck_rating_stats'
+
+    deck_id = db.Column(db.Integer, db.ForeignKey('decks.id', ondelete='CASCADE'), primary_key=True)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    average = db.Column(db.Float, nullable=False, default=0.0, index=True)
+    score = db.Column(db.Float, nullable=False, default=RATING_PRIOR_MEAN, index=True)
+
+    def __repr__(self):
+        return f'<DeckRatingStats {self.deck_id}: {self.rating_sum}/{self.rating_count}>'
+
+
+def _average(rating_count, rating_sum):
+    """SQL expression for the plain average, 0 for a deck without ratings"""
+    return db.case((rating_count > 0, db.cast(rating_sum, db.Float) / rating_count), else_=0.0)
+
+
+def _score(rating_count, rating_sum):
+    """SQL expression for the totals blended with the prior ratings"""
+    prior = RATING_PRIOR_WEIGHT * RATING_PRIOR_MEAN
+    return (prior + db.cast(rating_sum, db.Float)) / (RATING_PRIOR_WEIGHT + rating_count)
+
+
+def rebuild_deck_rating_stats(session):
+    """
+    Recompute every deck's totals from the ratings table.
+
+    Parameters:
+        session: Session to run the rebuild in; the caller commits
+
+    Returns:
+        int: Number of decks with ratings
+    """
+    session.execute(db.delete(DeckRatingStats))
+    rating_count = func.count(Rating.id)
+    rating_sum = func.sum(Rating.score)
+    totals = (
+        db.select(
+            Rating.deck_id,
+            rating_count,
+            rating_sum,
+            _average(rating_count, rating_sum),
+            _score(rating_count, rating_sum)
+        )
+        .group_by(Rating.deck_id)
+    )
+    result = session.execute(
+        db.insert(DeckRatingStats).from_select(
+            ['deck_id', 'rating_count', 'rating_sum', 'average', 'score'],
+            totals
+        )
+    )
+    return result.rowcount
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_rating_deltas(session, flush_context):
+    """Fold ratings inserted, deleted, rescored or moved between decks in this flush into deck totals"""
+    deltas = {}
+
+    def add(deck_id, count, total):
+        delta = deltas.setdefault(deck_id, [0, 0])
+        delta[0] += count
+        delta[1] += total
+
+    for rating in session.new:
+        if isinstance(rating, Rating):
+            add(rating.deck_id, 1, rating.score)
+    for rating in session.deleted:
+        if isinstance(rating, Rating):
+            add(rating.deck_id, -1, -rating.score)
+    for rating in session.dirty:
+        if not isinstance(rating, Rating):
+            continue
+        # A rating moved to another deck leaves the old deck's totals and joins the new one's
+        attrs = inspect(rating).attrs
+        old_deck_id = attrs.deck_id.history.deleted[0] if attrs.deck_id.history.deleted else rating.deck_id
+        old_score = attrs.score.history.deleted[0] if attrs.score.history.deleted else rating.score
+        if (old_deck_id, old_score) != (rating.deck_id, rating.score):
+            add(old_deck_id, -1, -old_score)
+            add(rating.deck_id, 1, rating.score)
+
+    connection = session.connection()
+    for deck_id, (count, total) in deltas.items():
+        if count == 0 and total == 0:
+            continue
+        new_count = DeckRatingStats.rating_count + count
+        new_sum = DeckRatingStats.rating_sum + total
+        upsert(
+            connection,
+            DeckRatingStats,
+            values=dict(
+                deck_id=deck_id,
+                rating_count=count,
+                rating_sum=total,
+                average=_average(db.literal(count), db.literal(total)),
+                score=_score(db.literal(count), db.literal(total))
+            ),
+            index_elements=['deck_id'],
+            update=dict(
+                rating_count=new_count,
+                rating_sum=new_sum,
+                average=_average(new_count, new_sum),
+                score=_score(new_count, new_sum)
+            )
+        )
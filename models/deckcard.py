@@ -21,6 +21,11 @@ class DeckCard(db.Model):
     """
     
     __tablename__ = 'deckcards'
+    __table_args__ = (
+        # One row per card in a deck; also serves lookups by deck_id
+        db.Index('ix_deckcards_deck_id_card_id', 'deck_id', 'card_id', unique=True),
+        db.Index('ix_deckcards_card_id', 'card_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     deck_id = db.Column(db.Integer, db.ForeignKey('decks.id'), nullable=False)
@@ -23,6 +23,10 @@ class Format(db.Model):
         id (int): Unique identifier for the format.
         name (str): Name of the format, must be unique (e.g., "Standard").
         description (str): Detailed rules and set restrictions for the format.
+        start_date (date): Sets released on or after this date are legal.
+        legality_version (int): Bumped in the same transaction whenever the
+            format's card legality is recomputed, used as the cache key for
+            legality-dependent results such as validation verdicts.
     """
 
     __tablename__ = 'formats'
@@ -31,6 +35,8 @@ class Format(db.Model):
     name = db.Column(db.String(50), nullable=False, unique=True, comment="Name of the format (e.g., Standard)")
     description = db.Column(db.String(200), comment="Rules and set restrictions for the format")
     start_date = db.Column(db.Date, nullable=False, comment="Start date for format legality")
+    legality_version = db.Column(db.Integer, nullable=False, default=0, server_default='0',
+                                 comment="Bumped whenever the format's card legality is recomputed")
 
     def to_dict(self):
         """
@@ -0,0 +1,43 @@
+'''ImportJob model for tracking background import work'''
+
+from init import db
+
+
+class ImportJob(db.Model):
+    """
+    A queued or running import, polled by clients through /api/jobs.
+    
+    Job state lives in the database so any application worker can report on
+    a job, whichever worker process is running it.
+    
+    Attributes:
+        id (str): Job identifier handed back to the client
+        kind (str): What is being imported (deck, battlelog)
+        status (str): queued, running, succeeded or failed
+        progress (float): Fraction of the work completed, from 0 to 1
+        status_code (int): HTTP status the import would have returned synchronously
+        result (JSON): Response body of the finished import
+        error (str): Failure details for jobs that raised
+        created_at (datetime): When the job was queued
+        started_at (datetime): When a worker picked the job up
+        finished_at (datetime): When the job completed
+        updated_at (datetime): Last write of the job's state or progress; jobs left
+            queued or running without one for IMPORT_JOB_TIMEOUT are failed as stale
+    """
+    
+    __tablename__ = 'import_jobs'
+
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    progress = db.Column(db.Float, nullable=False, default=0)
+    status_code = db.Column(db.Integer)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    def __repr__(self):
+        return f'<ImportJob {self.id} {self.kind} {self.status}>'
@@ -0,0 +1,28 @@
+'''LogDictionary model for battle log compression dictionaries'''
+
+from init import db
+
+
+class LogDictionary(db.Model):
+    """
+    A preset zlib dictionary trained from stored battle logs.
+    
+    Dictionaries are immutable once created; compressed battle logs keep a
+    reference to the dictionary they were compressed with.
+    
+    Attributes:
+        id (int): Primary key for the dictionary
+        data (bytes): Dictionary contents passed to zlib as zdict
+        sample_count (int): Number of battle logs the dictionary was built from
+        created_at (datetime): Timestamp of dictionary creation
+    """
+    
+    __tablename__ = 'log_dictionaries'
+
+    id = db.Column(db.Integer, primary_key=True)
+    data = db.Column(db.LargeBinary, nullable=False)
+    sample_count = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    def __repr__(self):
+        return f'<LogDictionary {self.id}: {len(self.data)} bytes>'
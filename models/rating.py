@@ -17,6 +17,9 @@ class Rating(db.Model):
     """
     
     __tablename__ = 'ratings'
+    __table_args__ = (
+        db.Index('ix_ratings_deck_id', 'deck_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     deck_id = db.Column(db.Integer, db.ForeignKey('decks.id'), nullable=False)
@@ -7,6 +7,8 @@ from schemas.format_schema import FormatSchema
 from schemas.rating_schema import RatingSchema
 from schemas.cardtype_schema import CardTypeSchema
 from schemas.battlelog_schema import BattlelogSchema
+from schemas.battle_event_schema import BattleEventSchema
+from schemas.import_job_schema import ImportJobSchema
 
 # Export all schemas
 __all__ = [
@@ -18,5 +20,7 @@ __all__ = [
     'DeckCardSchema',
     'FormatSchema',
     'RatingSchema',
-    'BattlelogSchema'
+    'BattlelogSchema',
+    'BattleEventSchema',
+    'ImportJobSchema'
 ]
\ No newline at end of file
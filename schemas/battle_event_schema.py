@@ -0,0 +1,14 @@
+'''Schema for serializing structured Pokemon TCG battle events'''
+
+from init import ma
+from marshmallow import EXCLUDE
+
+class BattleEventSchema(ma.Schema):
+    class Meta:
+        fields = ('id', 'battlelog_id', 'sequence', 'turn', 'player', 'action', 'card_id', 'target_card_id')
+        ordered = True
+        unknown = EXCLUDE
+
+# Schema instances
+battle_event_schema = BattleEventSchema()
+battle_events_schema = BattleEventSchema(many=True)
@@ -4,8 +4,9 @@ from init import ma
 from marshmallow import EXCLUDE
 
 class BattlelogSchema(ma.Schema):
+    # raw_log is served only by GET /battlelogs/<id>/raw
     class Meta:
-        fields = ('id', 'deck_id', 'win_loss', 'total_turns', 'most_used_cards', 'key_synergy_cards', 'raw_log')
+        fields = ('id', 'deck_id', 'win_loss', 'total_turns', 'most_used_cards', 'key_synergy_cards', 'created_at')
         ordered = True
         unknown = EXCLUDE
 
@@ -24,10 +24,10 @@ class DeckBoxSchema(ma.SQLAlchemySchema):
     description = ma.auto_field(required=True)
     
     # Enhanced relationships with version tracking
-    deck = ma.Nested('DeckSchema', many=True, only=[
+    decks = ma.Nested('DeckSchema', many=True, only=[
         'id', 
         'name', 
-        'format',
+        'format_id',
         'created_at'
     ])
 
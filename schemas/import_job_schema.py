@@ -0,0 +1,42 @@
+'''Schema for serializing background import jobs'''
+
+from init import ma
+from models.import_job import ImportJob
+
+
+class ImportJobSchema(ma.SQLAlchemySchema):
+    """
+    Schema for ImportJob model serialization.
+    
+    Attributes:
+        id: Job identifier
+        kind: What is being imported
+        status: queued, running, succeeded or failed
+        progress: Fraction of the work completed
+        status_code: HTTP status of the finished import
+        result: Response body of the finished import
+        error: Failure details
+        created_at: When the job was queued
+        started_at: When a worker picked the job up
+        finished_at: When the job completed
+        updated_at: Last write of the job's state or progress
+    """
+    
+    class Meta:
+        model = ImportJob
+
+    id = ma.auto_field()
+    kind = ma.auto_field()
+    status = ma.auto_field()
+    progress = ma.auto_field()
+    status_code = ma.auto_field()
+    result = ma.auto_field()
+    error = ma.auto_field()
+    created_at = ma.auto_field(dump_only=True)
+    started_at = ma.auto_field(dump_only=True)
+    finished_at = ma.auto_field(dump_only=True)
+    updated_at = ma.auto_field(dump_only=True)
+
+
+import_job_schema = ImportJobSchema()
+import_jobs_schema = ImportJobSchema(many=True)
@@ -0,0 +1,71 @@
+'''Shared fixtures: an application on a temporary SQLite database with a small, fixed dataset'''
+
+import os
+from datetime import date, datetime
+import pytest
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """Application bound to a fresh SQLite file with every table created and seeded"""
+    os.environ['DATABASE_URI'] = f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}"
+    from main import create_app
+    from init import db
+
+    app = create_app()
+    app.config.update(TESTING=True, QUERY_COUNTER=False)
+    with app.app_context():
+        db.engine.echo = False
+        db.create_all()
+        seed(db.session)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def seed(session):
+    """
+    Insert rows covering the shapes the list serializers have to handle.
+
+    Includes empty optional columns, a set without a release date, a deck
+    without a deck box or format, decks with zero, one and several battle
+    logs, and timestamps with microseconds.
+    """
+    from models import Battlelog, Card, CardSet, CardType, Deck, DeckBox, Format
+
+    pokemon, trainer = CardType(name='Pokemon'), CardType(name='Trainer')
+    base = CardSet(name='BASE', release_date=date(1999, 1, 9), description='Base Set')
+    promo = CardSet(name='PR', release_date=None, description=None)
+    standard = Format(name='Standard', description='Standard format', start_date=date(1990, 1, 1))
+    box = DeckBox(name='Main box', description=None)
+    session.add_all([pokemon, trainer, base, promo, standard, box])
+    session.flush()
+
+    session.add_all([
+        Card(name='Pikachu', cardtype_id=pokemon.id, cardset_id=base.id, card_number='58'),
+        Card(name='Pikachu', cardtype_id=pokemon.id, cardset_id=promo.id, card_number=None),
+        Card(name='Professor Oak', cardtype_id=trainer.id, cardset_id=base.id, card_number='88'),
+        Card(name='Energy Search', cardtype_id=trainer.id, cardset_id=promo.id, card_number='TG01'),
+    ])
+    boxed = Deck(name='Boxed', description='In a box', format_id=standard.id, deckbox_id=box.id,
+                 created_at=datetime(2024, 1, 2, 3, 4, 5, 678901), updated_at=datetime(2024, 2, 3, 4, 5, 6))
+    loose = Deck(name='Loose', description=None, format_id=None, deckbox_id=None,
+                 created_at=datetime(2024, 3, 4, 5, 6, 7), updated_at=None)
+    empty = Deck(name='No logs', description='Never played', format_id=standard.id, deckbox_id=box.id,
+                 created_at=datetime(2024, 5, 6, 7, 8, 9))
+    session.add_all([boxed, loose, empty])
+    session.flush()
+
+    session.add_all([
+        Battlelog(deck_id=boxed.id, win_loss=True, total_turns=12, most_used_cards=['Pikachu'],
+                  key_synergy_cards=[['Pikachu', 'Professor Oak']], raw_log_sha256='a' * 64,
+                  created_at=datetime(2024, 1, 5, 10, 0, 0, 5)),
+        Battlelog(deck_id=boxed.id, win_loss=False, total_turns=7, most_used_cards=[],
+                  key_synergy_cards=[], raw_log_sha256='b' * 64, created_at=datetime(2024, 1, 6)),
+        Battlelog(deck_id=loose.id, win_loss=None, total_turns=None, most_used_cards=None,
+                  key_synergy_cards=None, raw_log_sha256='c' * 64, created_at=datetime(2024, 3, 5)),
+    ])
+    session.commit()
@@ -0,0 +1,273 @@
+'''Pure parsing of TCG Live battle logs into battle statistics'''
+
+import hashlib
+import io
+import re
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from marshmallow import ValidationError
+from utils.card_matcher import get_deck_matcher, synergy_pairs
+
+
+# (action, keyword, pattern) tried in order; the keyword skips lines cheaply
+EVENT_PATTERNS = [
+    ('knocked_out', ' was Knocked Out!', re.compile(r"^(?P<player>\S+?)'s (?P<card>.+) was Knocked Out!$")),
+    ('attacked', ' used ', re.compile(
+        r"^(?P<player>\S+?)'s (?P<card>.+?) used .+? on .+?[’']s (?P<target>.+?) for \d+ damage\."
+    )),
+    ('used', ' used ', re.compile(r"^(?P<player>\S+?)'s (?P<card>.+?) used .+\.$")),
+    ('attached', ' attached ', re.compile(
+        r"^(?P<player>\S+?) attached (?P<card>.+?) to (?:(?P=player)'s )?(?P<target>.+?) (?:in the Active Spot|on the Bench)\.$"
+    )),
+    ('evolved', ' evolved ', re.compile(
+        r"^(?P<player>\S+?) evolved (?P<target>.+?) to (?P<card>.+?) (?:in the Active Spot|on the Bench)\.$"
+    )),
+    ('retreated', ' retreated ', re.compile(r"^(?P<player>\S+?) retreated (?P<card>.+?) to the Bench\.$")),
+    ('drew', ' drew ', re.compile(r"^(?P<player>\S+?) drew (?P<card>.+?)(?: and played it to the .+)?\.$")),
+    ('played', ' played ', re.compile(r"^(?P<player>\S+?) played (?P<card>.+?)(?: to the .+)?\.$")),
+    ('discarded', ' discarded ', re.compile(r"^(?P<player>\S+?) discarded (?P<card>.+?)\.$")),
+]
+
+# Draw/discard lines that name a count rather than a card
+UNNAMED_CARDS = re.compile(r"^(?:a card|\d+ (?:more )?cards?\b.*)$")
+
+TURN_NUMBER = re.compile(r"^Turn #\s*(\d+)")
+
+
+def match_event(line):
+    """
+    Parse one stripped log line into an event, if it describes an action.
+    
+    Parameters:
+        line (str): Log line with surrounding whitespace removed
+        
+    Returns:
+        tuple: (player, action, card, target), or None for non-action lines
+    """
+    if line.startswith('- '):
+        line = line[2:]
+
+    for action, keyword, pattern in EVENT_PATTERNS:
+        if keyword not in line:
+            continue
+        match = pattern.match(line)
+        if not match:
+            continue
+        groups = match.groupdict()
+        card = groups.get('card')
+        if card and UNNAMED_CARDS.match(card):
+            card = None
+        return groups['player'], action, card, groups.get('target')
+    return None
+
+
+class BattlelogParser:
+    """
+    Single-pass, line-at-a-time battle log parser.
+    
+    Lines are fed as they arrive so a log never has to be held in memory to
+    be parsed. Statistics, the structured event stream and the content hash
+    are all accumulated incrementally.
+    
+    Attributes:
+        events (list): Event dicts with sequence, turn, player, action, card and target
+    """
+
+    def __init__(self, player_name, matcher=None):
+        self.player_name = player_name
+        self.matcher = matcher
+        self.events = []
+        self._hash = hashlib.sha256()
+        self._current_player = None
+        self._turn = 0
+        self._total_turns = 0
+        self._last_line = None
+        self._card_usage_count = {}  # Track {card_name: usage_count}
+        self._card_interactions = {}
+
+    def feed(self, raw_line):
+        """
+        Consume one line of the log.
+        
+        Parameters:
+            raw_line (bytes or str): Line including its newline, as read from the source
+        """
+        if isinstance(raw_line, bytes):
+            self._hash.update(raw_line)
+            line = raw_line.decode('utf-8', 'replace')
+        else:
+            self._hash.update(raw_line.encode('utf-8'))
+            line = raw_line
+        line = line.rstrip('\n')
+
+        if "Turn #" in line:
+            parts = line.split("-")
+            # A header without a player keeps the current one
+            if len(parts) > 1:
+                self._current_player = parts[1].strip().split("'")[0]
+
+        if self.matcher is not None and self._current_player == self.player_name:
+            # Single pass over the line finds every deck card it mentions
+            matched = self.matcher.find(line)
+            for card_name in matched:
+                self._card_usage_count[card_name] = self._card_usage_count.get(card_name, 0) + 1
+            for pair in synergy_pairs(matched, line):
+                self._card_interactions[pair] = self._card_interactions.get(pair, 0) + 1
+
+        stripped = line.strip()
+        if not stripped:
+            return
+        self._last_line = stripped
+
+        if stripped.startswith('Turn #'):
+            self._total_turns += 1
+            # Turns are numbered in order, so a header without a number is the next one
+            number = TURN_NUMBER.match(stripped)
+            self._turn = int(number.group(1)) if number else self._turn + 1
+            return
+
+        event = match_event(stripped)
+        if event:
+            player, action, card, target = event
+            self.events.append({
+                'sequence': len(self.events),
+                'turn': self._turn,
+                'player': player,
+                'action': action,
+                'card': card,
+                'target': target
+            })
+
+    @property
+    def sha256(self):
+        """Hex SHA-256 digest of everything fed so far"""
+        return self._hash.hexdigest()
+
+    def result(self):
+        """
+        Finish parsing and summarise the battle.
+        
+        Returns:
+            dict: win_loss, total_turns, most_used_cards and key_synergy_cards
+            
+        Raises:
+            ValidationError: If the log is empty
+        """
+        if self._last_line is None:
+            raise ValidationError("Battle log is empty")
+
+        key_synergy_cards = sorted(self._card_interactions.items(), key=lambda x: x[1], reverse=True)[:3]
+        key_synergy_cards = [list(pair[0]) for pair in key_synergy_cards]
+
+        # Check the last actual line for the winner
+        win_loss = any(
+            condition in self._last_line
+            for condition in [
+                f"{self.player_name} wins",
+                f"Opponent conceded. {self.player_name} wins"
+            ]
+        )
+
+        # Get top 3 most used cards by usage count
+        most_used = sorted(self._card_usage_count.items(), key=lambda x: x[1], reverse=True)[:3]
+        most_used_cards = [card[0] for card in most_used]
+
+        return {
+            'win_loss': win_loss,
+            'total_turns': self._total_turns,
+            'most_used_cards': most_used_cards,
+            'key_synergy_cards': key_synergy_cards
+        }
+
+
+def parse_battlelog(log_text, player_name, matcher):
+    """
+    Extract battle statistics and events from a complete battle log.
+    
+    Parameters:
+        log_text (str): Raw text content of the battle log
+        player_name (str): Name of the player whose deck is being tracked
+        matcher (CardMatcher): Matcher built from the deck's card names
+        
+    Returns:
+        tuple: (stats, events) where stats holds win_loss, total_turns,
+            most_used_cards and key_synergy_cards
+        
+    Raises:
+        ValidationError: If the log is empty
+    """
+    parser = BattlelogParser(player_name, matcher)
+    for line in io.StringIO(log_text):
+        parser.feed(line)
+    return parser.result(), parser.events
+
+
+def parse_battle_events(log_text):
+    """
+    Extract only the structured event stream from a complete battle log.
+    
+    Parameters:
+        log_text (str): Raw text content of the battle log
+        
+    Returns:
+        list: Event dicts with sequence, turn, player, action, card and target
+    """
+    parser = BattlelogParser(None)
+    for line in io.StringIO(log_text):
+        parser.feed(line)
+    return parser.events
+
+
+def _parse_job(job):
+    """
+    Process pool entry point for a single log.
+    
+    Parameters:
+        job (tuple): (log_text, player_name, deck_id, deck_version, deck_cards)
+        
+    Returns:
+        tuple: ('ok', stats, events) on success or ('invalid', message, None) on failure
+    """
+    log_text, player_name, deck_id, deck_version, deck_cards = job
+    matcher = get_deck_matcher(deck_id, deck_version, deck_cards)
+    try:
+        return ('ok', *parse_battlelog(log_text, player_name, matcher))
+    except ValidationError as e:
+        return 'invalid', str(e), None
+
+
+_executor = None
+_executor_lock = Lock()
+
+
+def _get_executor(max_workers=None):
+    """Create the shared parsing pool on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=max_workers)
+        return _executor
+
+
+def parse_battlelogs(log_texts, player_name, deck_id, deck_version, deck_cards, max_workers=None):
+    """
+    Parse a batch of battle logs in parallel on a process pool.
+    
+    Parameters:
+        log_texts (list): Raw battle log texts
+        player_name (str): Name of the player whose deck is being tracked
+        deck_id (int): Deck the logs belong to
+        deck_version (int): The deck's content_version, keying its cached card matcher
+        deck_cards (frozenset): Card names in the deck
+        max_workers (int, optional): Pool size, used when the pool is first created
+        
+    Returns:
+        list: One ('ok', stats, events) or ('invalid', message, None) tuple per log, in order
+    """
+    jobs = [(log_text, player_name, deck_id, deck_version, deck_cards) for log_text in log_texts]
+    if len(jobs) < 2:
+        return [_parse_job(job) for job in jobs]
+
+    executor = _get_executor(max_workers)
+    chunksize = max(1, len(jobs) // ((executor._max_workers or 1) * 4))
+    return list(executor.map(_parse_job, jobs, chunksize=chunksize))
@@ -0,0 +1,57 @@
+'''Bulk insert helpers that pick the best statement for the database backend'''
+
+from sqlalchemy.dialects import postgresql, sqlite
+from init import db
+
+
+def insert_ignore(model, rows, index_elements):
+    """
+    Insert rows, skipping any that collide with an existing unique key.
+    
+    PostgreSQL and SQLite use INSERT ... ON CONFLICT DO NOTHING. Other
+    backends fall back to a plain executemany insert.
+    
+    Parameters:
+        model: Mapped class to insert into
+        rows (list): Column value dicts
+        index_elements (list): Column names of the unique key to conflict on
+    """
+    if not rows:
+        return
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        stmt = postgresql.insert(model).on_conflict_do_nothing(index_elements=index_elements)
+    elif dialect == 'sqlite':
+        stmt = sqlite.insert(model).on_conflict_do_nothing(index_elements=index_elements)
+    else:
+        stmt = db.insert(model)
+    db.session.execute(stmt, rows)
+
+
+def upsert(connection, model, values, index_elements, update):
+    """
+    Insert a row, or update the existing row when its unique key collides.
+    
+    PostgreSQL and SQLite use a single INSERT ... ON CONFLICT DO UPDATE, so
+    concurrent first inserts for the same key cannot both succeed. Other
+    backends fall back to UPDATE followed by INSERT when no row matched.
+    
+    Parameters:
+        connection: Connection to execute on
+        model: Mapped class to write to
+        values (dict): Column values for a new row
+        index_elements (list): Column names of the unique key to conflict on
+        update (dict): Column values to set on an existing row; expressions
+            on the model's columns refer to the existing row
+    """
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert(model) if dialect == 'postgresql' else sqlite.insert(model)
+        connection.execute(
+            insert.values(**values).on_conflict_do_update(index_elements=index_elements, set_=update)
+        )
+        return
+    key = [getattr(model, column) == values[column] for column in index_elements]
+    result = connection.execute(db.update(model).where(*key).values(**update))
+    if result.rowcount == 0:
+        connection.execute(db.insert(model).values(**values))
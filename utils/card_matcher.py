@@ -0,0 +1,147 @@
+'''Multi-pattern card name matching for battle log parsing'''
+
+from collections import deque
+from itertools import combinations
+from threading import Lock
+
+
+class CardMatcher:
+    """
+    Aho-Corasick automaton over a fixed set of card names.
+    
+    The automaton is built once and then finds every card name mentioned in a
+    line with a single pass over its characters, regardless of how many names
+    the deck contains.
+    
+    Attributes:
+        names (frozenset): Card names recognised by the matcher
+    """
+
+    def __init__(self, names):
+        self.names = frozenset(name for name in names if name)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+
+        for name in self.names:
+            state = 0
+            for char in name:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            self._output[state] = self._output[state] + (name,)
+
+        # Breadth-first pass to link each state to its longest proper suffix
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find(self, line):
+        """
+        Find every card name mentioned in a line.
+        
+        Parameters:
+            line (str): Text to scan
+            
+        Returns:
+            set: Card names occurring anywhere in the line
+        """
+        found = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in line:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+def is_meaningful_interaction(card1, card2, line):
+    """
+    Check whether two cards mentioned on the same line interact.
+    
+    Parameters:
+        card1 (str): First card name
+        card2 (str): Second card name
+        line (str): Log line mentioning both cards
+        
+    Returns:
+        bool: True if the line shows a meaningful interaction
+    """
+    interactions = [
+        # Stadium sacrificed for attack
+        (lambda c1, c2: "Stadium" in c1 and "discarded" in line and c2 in line and "used" in line),
+        # Energy attachment and Pokemon
+        (lambda c1, c2: "Energy" in c1 and "attached" in line and c2 in line),
+        # Tool/Item card used on Pokemon
+        (lambda c1, c2: ("Tool" in c1 or "Capsule" in c1) and "attached" in line and c2 in line)
+    ]
+    return any(check(card1, card2) or check(card2, card1) for check in interactions)
+
+
+def synergy_pairs(matched, line):
+    """
+    Yield the interacting card pairs among the cards matched on a line.
+    
+    Parameters:
+        matched (set): Card names found on the line
+        line (str): The log line itself
+        
+    Yields:
+        tuple: Sorted (card1, card2) pair for each meaningful interaction
+    """
+    for card1, card2 in combinations(sorted(matched), 2):
+        if is_meaningful_interaction(card1, card2, line):
+            yield (card1, card2)
+
+
+_matcher_cache = {}
+_matcher_lock = Lock()
+MATCHER_CACHE_SIZE = 256
+
+
+def get_deck_matcher(deck_id, version, card_names):
+    """
+    Return the cached matcher for a deck, building it on first use.
+    
+    Parameters:
+        deck_id (int): Deck the matcher belongs to
+        version: The deck's content_version, which changes with its card list
+        card_names (iterable or callable): Card names in the deck, or a function
+            returning them, used only on a cache miss
+        
+    Returns:
+        CardMatcher: Matcher for the deck's current card list
+    """
+    key = (deck_id, version)
+    with _matcher_lock:
+        matcher = _matcher_cache.get(key)
+        if matcher is not None:
+            return matcher
+
+    if callable(card_names):
+        card_names = card_names()
+    matcher = CardMatcher(card_names)
+
+    with _matcher_lock:
+        # Drop any stale versions for this deck and keep the cache bounded
+        for stale in [k for k in _matcher_cache if k[0] == deck_id]:
+            del _matcher_cache[stale]
+        if len(_matcher_cache) >= MATCHER_CACHE_SIZE:
+            del _matcher_cache[next(iter(_matcher_cache))]
+        _matcher_cache[key] = matcher
+    return matcher
@@ -0,0 +1,295 @@
+'''Deck validation rules evaluated in memory over a single joined query'''
+
+import re
+from collections import OrderedDict
+from itertools import groupby
+from threading import Lock
+from marshmallow import ValidationError
+from init import db
+from models.card import Card
+from models.card_legality import CardLegality, legality_uncommitted
+from models.cardset import CardSet
+from models.cardtype import CardType
+from models.deck import Deck
+from models.deckcard import DeckCard
+from models.format import Format
+
+
+DECK_SIZE = 60
+MAX_COPIES = 4
+BASIC_ENERGY_PATTERN = re.compile(r'^Basic (?:\w+|\{\w\}) Energy', re.IGNORECASE)
+VALIDATION_CACHE_SIZE = 1024
+
+
+def deck_card_rows_query(format_id):
+    """
+    Build the joined query that returns everything the rules need.
+    
+    Parameters:
+        format_id (int): Format whose legality index is joined in
+        
+    Returns:
+        Select: deckcards ⨝ cards ⨝ cardsets ⨝ card_types ⟕ card_legality,
+            one row per deck card
+    """
+    return (
+        db.select(
+            DeckCard.deck_id,
+            DeckCard.id.label('deckcard_id'),
+            DeckCard.quantity,
+            Card.id.label('card_id'),
+            Card.name,
+            CardType.name.label('card_type'),
+            CardSet.name.label('set_name'),
+            CardSet.release_date,
+            CardLegality.card_id.is_not(None).label('legal')
+        )
+        .join(Card, DeckCard.card_id == Card.id)
+        .join(CardSet, Card.cardset_id == CardSet.id)
+        .join(CardType, Card.cardtype_id == CardType.id)
+        .outerjoin(CardLegality, db.and_(
+            CardLegality.card_id == Card.id,
+            CardLegality.format_id == format_id
+        ))
+    )
+
+
+def require_cards(cards, deck_format):
+    """Reject decks with no cards"""
+    if not cards:
+        return 'No cards found in deck'
+
+
+def format_legality(cards, deck_format):
+    """Reject cards missing from the format's legality index"""
+    if deck_format is None:
+        return None
+    if not all(card.legal for card in cards):
+        return f'Deck contains cards not legal in {deck_format.name} format'
+
+
+def copy_limit(cards, deck_format):
+    """Reject more than four copies of any card other than basic energy"""
+    card_quantities = {}
+    for card in cards:
+        if BASIC_ENERGY_PATTERN.match(card.name):
+            continue
+        card_quantities[card.card_id] = card_quantities.get(card.card_id, 0) + card.quantity
+        if card_quantities[card.card_id] > MAX_COPIES:
+            return f'Card \'{card.name}\' has more than {MAX_COPIES} copies in the deck.'
+
+
+def deck_size(cards, deck_format):
+    """Require exactly sixty cards"""
+    card_count = sum(card.quantity for card in cards)
+    if card_count != DECK_SIZE:
+        return f'Deck must contain exactly {DECK_SIZE} cards. Current count: {card_count}'
+
+
+DEFAULT_RULES = [require_cards, format_legality, copy_limit, deck_size]
+
+# Rule lists keyed by format name; formats not listed use DEFAULT_RULES
+FORMAT_RULES = {}
+
+
+def register_format_rules(format_name, rules):
+    """
+    Replace the rule set used for a format.
+    
+    Parameters:
+        format_name (str): Format name, e.g. "Standard"
+        rules (list): Callables taking (cards, deck_format) and returning an error message or None
+    """
+    FORMAT_RULES[format_name.lower()] = list(rules)
+
+
+def rules_for(deck_format):
+    """Return the rule set for a format, falling back to the defaults"""
+    if deck_format is None:
+        return DEFAULT_RULES
+    return FORMAT_RULES.get(deck_format.name.lower(), DEFAULT_RULES)
+
+
+def check_deck(cards, deck_format):
+    """
+    Evaluate a format's rules against already-loaded deck card rows.
+    
+    Parameters:
+        cards (list): Rows from deck_card_rows_query() for one deck
+        deck_format (Format): Format to validate against, or None
+    
+    Returns:
+        list: Error messages in rule order, empty if the deck is valid
+    """
+    errors = []
+    for rule in rules_for(deck_format):
+        error = rule(cards, deck_format)
+        if error:
+            errors.append(error)
+            if rule is require_cards:
+                break
+    return errors
+
+
+_verdict_cache = OrderedDict()
+_verdict_lock = Lock()
+_verdict_stats = {'hits': 0, 'misses': 0}
+
+
+def _verdict_key(deck_id, version, deck_format):
+    """
+    Cache key covering everything a verdict depends on.
+
+    The format's legality_version is committed together with the legality
+    rows it describes and is read before them, so every process sees a new
+    key once a legality change commits. validate_deck() does not cache
+    verdicts computed inside a transaction that changed legality.
+    """
+    format_key = (deck_format.id, deck_format.legality_version) if deck_format is not None else None
+    return deck_id, version, format_key
+
+
+def _get_verdict(key):
+    """Look up a cached (errors, card_count) verdict, counting the hit or miss"""
+    with _verdict_lock:
+        verdict = _verdict_cache.get(key)
+        if verdict is None:
+            _verdict_stats['misses'] += 1
+            return None
+        _verdict_cache.move_to_end(key)
+        _verdict_stats['hits'] += 1
+        return verdict
+
+
+def _put_verdict(key, verdict):
+    """Store a verdict, evicting the least recently used entry when full"""
+    with _verdict_lock:
+        _verdict_cache[key] = verdict
+        _verdict_cache.move_to_end(key)
+        while len(_verdict_cache) > VALIDATION_CACHE_SIZE:
+            _verdict_cache.popitem(last=False)
+
+
+def validation_cache_stats():
+    """
+    Report the validation cache's size and hit/miss counters.
+    
+    Returns:
+        dict: size, max_size, hits, misses and hit_rate
+    """
+    with _verdict_lock:
+        lookups = _verdict_stats['hits'] + _verdict_stats['misses']
+        return {
+            'size': len(_verdict_cache),
+            'max_size': VALIDATION_CACHE_SIZE,
+            'hits': _verdict_stats['hits'],
+            'misses': _verdict_stats['misses'],
+            'hit_rate': _verdict_stats['hits'] / lookups if lookups else 0.0
+        }
+
+
+def validate_deck(deck_id, format_id, version=None):
+    """
+    Validate deck composition and format legality.
+    
+    Verdicts are cached per deck content version, so re-validating an
+    unchanged deck costs a single primary key read.
+    
+    Parameters:
+        deck_id (int): ID of deck to validate
+        format_id (int): Format to validate against
+        version (int, optional): The deck's content_version, read from the
+            database when not given
+        
+    Returns:
+        int: Total number of cards in the deck
+        
+    Raises:
+        ValidationError: If deck violates any format or composition rules
+    """
+    if version is None:
+        version = db.session.scalar(db.select(Deck.content_version).where(Deck.id == deck_id))
+    deck_format = db.session.get(Format, format_id)
+    key = _verdict_key(deck_id, version, deck_format)
+
+    verdict = _get_verdict(key)
+    if verdict is None:
+        cards = db.session.execute(deck_card_rows_query(format_id).where(DeckCard.deck_id == deck_id)).all()
+        verdict = (check_deck(cards, deck_format), sum(card.quantity for card in cards))
+        if not legality_uncommitted(db.session):
+            _put_verdict(key, verdict)
+
+    errors, card_count = verdict
+    if errors:
+        raise ValidationError(errors[0])
+    return card_count
+
+
+def validate_decks(format_id=None, deckbox_id=None, batch_size=1000):
+    """
+    Validate many decks with one query ordered by deck.
+    
+    Every deck card row for the selected decks is read in a single joined
+    query, grouped by deck in memory and checked against the deck's format
+    rules. Decks without cards are included through the outer join.
+    
+    Parameters:
+        format_id (int, optional): Only validate decks in this format
+        deckbox_id (int, optional): Only validate decks in this deck box
+        batch_size (int): Rows fetched from the cursor at a time
+        
+    Yields:
+        dict: Report with deck_id, name, format_id, valid, card_count and errors
+    """
+    formats = {deck_format.id: deck_format for deck_format in db.session.scalars(db.select(Format))}
+
+    stmt = (
+        db.select(
+            Deck.id.label('deck_id'),
+            Deck.name.label('deck_name'),
+            Deck.format_id,
+            Deck.content_version,
+            DeckCard.id.label('deckcard_id'),
+            DeckCard.quantity,
+            Card.id.label('card_id'),
+            Card.name,
+            CardType.name.label('card_type'),
+            CardSet.name.label('set_name'),
+            CardSet.release_date,
+            CardLegality.card_id.is_not(None).label('legal')
+        )
+        .select_from(Deck)
+        .outerjoin(DeckCard, DeckCard.deck_id == Deck.id)
+        .outerjoin(Card, DeckCard.card_id == Card.id)
+        .outerjoin(CardSet, Card.cardset_id == CardSet.id)
+        .outerjoin(CardType, Card.cardtype_id == CardType.id)
+        .outerjoin(CardLegality, db.and_(
+            CardLegality.card_id == Card.id,
+            CardLegality.format_id == Deck.format_id
+        ))
+        .order_by(Deck.id)
+        .execution_options(yield_per=batch_size)
+    )
+    if format_id is not None:
+        stmt = stmt.where(Deck.format_id == format_id)
+    if deckbox_id is not None:
+        stmt = stmt.where(Deck.deckbox_id == deckbox_id)
+
+    warm_cache = not legality_uncommitted(db.session)
+    for deck_id, rows in groupby(db.session.execute(stmt), key=lambda row: row.deck_id):
+        rows = list(rows)
+        cards = [row for row in rows if row.deckcard_id is not None]
+        deck_format = formats.get(rows[0].format_id)
+        errors = check_deck(cards, deck_format)
+        card_count = sum(card.quantity for card in cards)
+        # Warm the single-deck cache with the verdicts computed here
+        if warm_cache:
+            _put_verdict(_verdict_key(deck_id, rows[0].content_version, deck_format), (errors, card_count))
+        yield {
+            'deck_id': deck_id,
+            'name': rows[0].deck_name,
+            'format_id': rows[0].format_id,
+            'valid': not errors,
+            'card_count': card_count,
+            'errors': errors
+        }
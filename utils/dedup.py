@@ -0,0 +1,105 @@
+'''Set-based merging of duplicate cards'''
+
+from sqlalchemy import tuple_
+from init import db
+from models.battle_event import BattleEvent
+from models.card import Card
+from models.card_legality import CardLegality
+from models.deck import bump_content_versions
+from models.deckcard import DeckCard
+
+DEDUP_BATCH_SIZE = 1000
+
+
+def _repoint(session, column, mapping):
+    """Rewrite every reference in column from a loser ID to its survivor with one UPDATE"""
+    session.execute(
+        db.update(column.class_)
+        .where(column.in_(list(mapping)))
+        .values({column.key: db.case(mapping, value=column)})
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _merge_deck_cards(session, mapping):
+    """
+    Fold deck card rows that would collide once losers point at their survivors.
+
+    When a deck holds several cards that merge into one, the row with the
+    lowest ID keeps the summed quantity and the others are deleted, so the
+    (deck_id, card_id) unique index holds after re-pointing.
+    """
+    losers = list(mapping)
+    card_ids = losers + list(set(mapping.values()))
+    rows = session.execute(
+        db.select(DeckCard.id, DeckCard.deck_id, DeckCard.card_id, DeckCard.quantity)
+        .where(DeckCard.card_id.in_(card_ids))
+        .where(DeckCard.deck_id.in_(db.select(DeckCard.deck_id).where(DeckCard.card_id.in_(losers))))
+        .order_by(DeckCard.id)
+    ).all()
+
+    groups = {}
+    for row in rows:
+        groups.setdefault((row.deck_id, mapping.get(row.card_id, row.card_id)), []).append(row)
+
+    survivors, removed = [], []
+    for group in groups.values():
+        if len(group) > 1:
+            survivors.append({'id': group[0].id, 'quantity': sum(row.quantity for row in group)})
+            removed.extend(row.id for row in group[1:])
+    if survivors:
+        session.execute(db.update(DeckCard), survivors)
+        session.execute(db.delete(DeckCard).where(DeckCard.id.in_(removed)))
+    return len(removed)
+
+
+def merge_duplicate_cards(session, after=None, batch_size=DEDUP_BATCH_SIZE):
+    """
+    Merge one batch of duplicate cards, those sharing a name and set.
+
+    Duplicate groups are walked in (name, cardset_id) order along the
+    ix_cards_name_cardset_id index. For each group the card with the lowest
+    ID survives: deck cards and battle events are re-pointed to it with one
+    UPDATE per column, deck card rows that would then collide are merged,
+    and the losers are deleted with one DELETE per table. Affected decks get
+    a new content version.
+
+    Parameters:
+        session: Session to run in; the caller commits after each batch
+        after (tuple, optional): (name, cardset_id) of the previous batch's last group
+        batch_size (int): Duplicate groups merged per batch
+
+    Returns:
+        tuple: (cards removed, cursor for the next batch or None when done)
+    """
+    groups = db.select(Card.name, Card.cardset_id).group_by(Card.name, Card.cardset_id).having(db.func.count() > 1)
+    if after is not None:
+        groups = groups.where(tuple_(Card.name, Card.cardset_id) > tuple_(*after))
+    groups = session.execute(groups.order_by(Card.name, Card.cardset_id).limit(batch_size)).all()
+    if not groups:
+        return 0, None
+
+    mapping, keep_ids = {}, {}
+    cards = session.execute(
+        db.select(Card.id, Card.name, Card.cardset_id)
+        .where(tuple_(Card.name, Card.cardset_id).in_([tuple(group) for group in groups]))
+        .order_by(Card.id)
+    )
+    for card in cards:
+        key = (card.name, card.cardset_id)
+        if key in keep_ids:
+            mapping[card.id] = keep_ids[key]
+        else:
+            keep_ids[key] = card.id
+
+    losers = list(mapping)
+    bump_content_versions(session, db.select(DeckCard.deck_id).where(DeckCard.card_id.in_(losers)))
+    _merge_deck_cards(session, mapping)
+    _repoint(session, DeckCard.card_id, mapping)
+    _repoint(session, BattleEvent.card_id, mapping)
+    _repoint(session, BattleEvent.target_card_id, mapping)
+    session.execute(db.delete(CardLegality).where(CardLegality.card_id.in_(losers)))
+    session.execute(db.delete(Card).where(Card.id.in_(losers)))
+
+    last = groups[-1]
+    return len(losers), (last.name, last.cardset_id)
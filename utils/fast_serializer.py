@@ -0,0 +1,266 @@
+'''Column-level serializers for hot list endpoints, bypassing ORM objects and marshmallow'''
+
+import json
+from flask import Response, current_app
+from sqlalchemy.orm import aliased
+from init import db
+from models.battlelog import Battlelog
+from models.card import Card
+from models.cardset import CardSet
+from models.cardtype import CardType
+from models.deck import Deck
+from models.deckbox import DeckBox
+from utils.pagination import keyset_paginate, pagination_headers
+from utils.projection import PROJECTIONS, projected_schema, projection_options
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def dumps(payload):
+    """
+    Serialize a payload to JSON bytes, keeping key order like the app's jsonify.
+
+    Uses orjson when it is installed and the standard library otherwise.
+
+    Parameters:
+        payload: JSON-compatible data; dates and datetimes are written in ISO format
+
+    Returns:
+        bytes: Encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_isoformat).encode('utf-8')
+
+
+def _isoformat(value):
+    """Fallback encoder for dates and datetimes"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def json_response(payload, status=200, headers=None):
+    """
+    Build a JSON response from a payload without going through jsonify.
+
+    Parameters:
+        payload: Data to serialize
+        status (int): HTTP status code
+        headers (dict, optional): Extra response headers
+
+    Returns:
+        Response: application/json response
+    """
+    return Response(dumps(payload), status=status, headers=headers, mimetype='application/json')
+
+
+def fast_path_enabled():
+    """Check the FAST_SERIALIZER setting (on unless set to a false value)"""
+    return current_app.config.get('FAST_SERIALIZER', True)
+
+
+# To-one relations as {name: (aliased model, join condition, {output key: column})},
+# built per call so each statement gets its own aliases
+def _card_relations():
+    cardtype = aliased(CardType)
+    cardset = aliased(CardSet)
+    return {
+        'cardtype': (cardtype, Card.cardtype_id == cardtype.id, {'id': cardtype.id, 'name': cardtype.name}),
+        'cardset': (cardset, Card.cardset_id == cardset.id, {
+            'id': cardset.id,
+            'name': cardset.name,
+            'release_date': cardset.release_date
+        })
+    }
+
+
+def _deck_relations():
+    deckbox = aliased(DeckBox)
+    return {
+        'deckbox': (deckbox, Deck.deckbox_id == deckbox.id, {'id': deckbox.id, 'name': deckbox.name})
+    }
+
+
+FAST_RESOURCES = {
+    'card': {'id_column': Card.id, 'relations': _card_relations},
+    'deck': {'id_column': Deck.id, 'relations': _deck_relations}
+}
+
+STREAM_BATCH_SIZE = 1000
+
+BATTLELOG_COLUMNS = {
+    'id': Battlelog.id,
+    'deck_id': Battlelog.deck_id,
+    'win_loss': Battlelog.win_loss,
+    'total_turns': Battlelog.total_turns,
+    'most_used_cards': Battlelog.most_used_cards,
+    'key_synergy_cards': Battlelog.key_synergy_cards,
+    'created_at': Battlelog.created_at
+}
+
+
+def supports(resource, fields):
+    """Check whether the fast path can produce every requested field"""
+    spec = PROJECTIONS[resource]
+    extra = {'battlelogs'} if resource == 'deck' else set()
+    relations = FAST_RESOURCES[resource]['relations']()
+    return fields <= spec['columns'].keys() | relations.keys() | extra
+
+
+def _column_select(resource, stmt, fields):
+    """
+    Swap an ORM select's entity for the labelled columns a response needs.
+
+    Returns:
+        tuple: (Core select, {field: column}, {relation: spec}) for _serialize_rows
+    """
+    id_column = FAST_RESOURCES[resource]['id_column']
+    columns = {name: column for name, column in PROJECTIONS[resource]['columns'].items() if name in fields}
+    relations = {
+        name: relation for name, relation in FAST_RESOURCES[resource]['relations']().items() if name in fields
+    }
+
+    selected = [id_column.label('id')]
+    selected += [column.label(f'c_{name}') for name, column in columns.items()]
+    for name, (_, _, nested) in relations.items():
+        selected += [column.label(f'r_{name}_{key}') for key, column in nested.items()]
+
+    core = stmt.with_only_columns(*selected, maintain_column_froms=True)
+    for alias, onclause, _ in relations.values():
+        core = core.outerjoin(alias, onclause)
+    return core, columns, relations
+
+
+def _serialize_rows(resource, rows, fields, columns, relations):
+    """Turn result rows from _column_select into response dicts"""
+    items = []
+    for row in rows:
+        mapping = row._mapping
+        item = {name: mapping[f'c_{name}'] for name in columns}
+        for name, (_, _, nested) in relations.items():
+            values = {key: mapping[f'r_{name}_{key}'] for key in nested}
+            item[name] = values if values['id'] is not None else None
+        items.append(item)
+
+    if resource == 'deck' and 'battlelogs' in fields:
+        _attach_battlelogs(rows, items)
+    return items
+
+
+def fast_list(resource, stmt, fields):
+    """
+    Fetch and serialize a list endpoint's rows straight from Core result rows.
+
+    The ORM select's filters and joins are kept while its columns are
+    replaced by exactly those the response needs; to-one relationships
+    become outer joins against aliased tables and a deck's battle logs are
+    read with one extra query for the whole page. Rows are in ID order,
+    paged or not.
+
+    Parameters:
+        resource (str): 'card' or 'deck'
+        stmt (Select): ORM select of the resource with any filters applied
+        fields (frozenset): Field names from request_fields()
+
+    Returns:
+        tuple: (list of dicts, pagination) as from keyset_paginate
+
+    Raises:
+        ValidationError: If the paging parameters are invalid
+    """
+    id_column = FAST_RESOURCES[resource]['id_column']
+    core, columns, relations = _column_select(resource, stmt.order_by(id_column), fields)
+    rows, pagination = keyset_paginate(core, id_column, scalars=False)
+    return _serialize_rows(resource, rows, fields, columns, relations), pagination
+
+
+def fast_stream(resource, stmt, fields, batch_size=STREAM_BATCH_SIZE):
+    """
+    Serialize every row of a list endpoint from a server-side cursor.
+
+    Rows are fetched batch_size at a time with yield_per, so memory stays
+    flat however large the result is; deck battle logs are read with one
+    query per batch.
+
+    Parameters:
+        resource (str): 'card' or 'deck'
+        stmt (Select): ORM select of the resource with any filters applied
+        fields (frozenset): Field names from request_fields()
+        batch_size (int): Rows fetched from the cursor at a time
+
+    Yields:
+        dict: One serialized row, in ID order
+    """
+    core, columns, relations = _column_select(resource, stmt, fields)
+    core = core.order_by(None).order_by(FAST_RESOURCES[resource]['id_column'])
+    result = db.session.execute(core.execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        yield from _serialize_rows(resource, rows, fields, columns, relations)
+
+
+def battlelog_select():
+    """Select of the columns BattlelogSchema serializes, labelled by field name"""
+    return db.select(*[column.label(name) for name, column in BATTLELOG_COLUMNS.items()])
+
+
+def stream_mappings(stmt, batch_size=STREAM_BATCH_SIZE):
+    """
+    Yield a Core select's rows as dicts from a server-side cursor.
+
+    Parameters:
+        stmt (Select): Select whose column labels are the output keys
+        batch_size (int): Rows fetched from the cursor at a time
+
+    Yields:
+        dict: One row
+    """
+    for row in db.session.execute(stmt.execution_options(yield_per=batch_size)):
+        yield dict(row._mapping)
+
+
+def _attach_battlelogs(rows, items):
+    """Fill in each deck's battle logs with one query for the page"""
+    by_deck = {row.id: item for row, item in zip(rows, items)}
+    for item in items:
+        item['battlelogs'] = []
+    if not by_deck:
+        return
+    logs = db.session.execute(
+        battlelog_select()
+        .where(Battlelog.deck_id.in_(by_deck))
+        .order_by(Battlelog.id)
+    )
+    for log in logs:
+        by_deck[log.deck_id]['battlelogs'].append(dict(log._mapping))
+
+
+def list_response(resource, stmt, fields):
+    """
+    Serialize a list endpoint, taking the fast path when it is enabled.
+
+    Both paths return rows in ID order, so switching FAST_SERIALIZER never
+    reorders a response.
+
+    Parameters:
+        resource (str): 'card' or 'deck'
+        stmt (Select): ORM select of the resource, without loader options
+        fields (frozenset): Field names from request_fields()
+
+    Returns:
+        Response: The JSON list with any pagination headers
+
+    Raises:
+        ValidationError: If the paging parameters are invalid
+    """
+    if fast_path_enabled() and supports(resource, fields):
+        items, pagination = fast_list(resource, stmt, fields)
+        return json_response(items, headers=pagination_headers(pagination))
+
+    id_column = FAST_RESOURCES[resource]['id_column']
+    stmt = stmt.order_by(id_column).options(*projection_options(resource, fields))
+    items, pagination = keyset_paginate(stmt, id_column)
+    return projected_schema(resource, fields, many=True).jsonify(items), 200, pagination_headers(pagination)
@@ -0,0 +1,230 @@
+'''In-process background queue for import jobs'''
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from threading import Lock
+from time import monotonic
+from uuid import uuid4
+from flask import current_app, request
+from sqlalchemy.exc import SQLAlchemyError
+from init import db
+from models.import_job import ImportJob
+
+_executor = None
+_executor_lock = Lock()
+
+# Minimum seconds between progress writes to a job's row
+PROGRESS_WRITE_INTERVAL = 1.0
+
+STALE_JOB_ERROR = 'The worker running this job stopped before it finished'
+
+
+def wants_async():
+    """
+    Whether the current import request should run as a background job.
+    
+    An explicit ?async=true|false wins; otherwise ASYNC_IMPORTS decides.
+    """
+    value = request.args.get('async')
+    if value is None:
+        return bool(current_app.config.get('ASYNC_IMPORTS'))
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def _get_executor(app):
+    """Create the shared worker pool on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config.get('IMPORT_JOB_WORKERS') or 4,
+                thread_name_prefix='import-job'
+            )
+        return _executor
+
+
+def _update_job(job_id, *conditions, **values):
+    """
+    Write job state on its own connection, outside the job's transaction.
+    
+    Returns:
+        int: Number of rows updated (0 when conditions did not match)
+    """
+    table = ImportJob.__table__
+    values.setdefault('updated_at', db.func.current_timestamp())
+    with db.engine.begin() as connection:
+        return connection.execute(
+            db.update(table).where(table.c.id == job_id, *conditions).values(**values)
+        ).rowcount
+
+
+def _holds_sqlite_write_lock():
+    """Whether this thread's session has uncommitted writes on SQLite, which lock the whole database"""
+    session = db.session()
+    if db.engine.dialect.name != 'sqlite' or not session.in_transaction():
+        return False
+    return session.connection().connection.dbapi_connection.in_transaction
+
+
+class JobProgress:
+    """
+    Progress callback handed to a running job.
+    
+    Progress is written to the job row on its own connection, at most once
+    every PROGRESS_WRITE_INTERVAL seconds, so any worker can report it and
+    the write doubles as the job's heartbeat. On SQLite the write is skipped
+    while the job's own transaction holds the database lock, as it would
+    wait on the job itself; live_progress() still reports it to requests in
+    the same process.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.written_at = None
+
+    def __call__(self, fraction):
+        fraction = min(max(fraction, 0), 1)
+        with _progress_lock:
+            _progress[self.job_id] = fraction
+        now = monotonic()
+        if self.written_at is not None and now - self.written_at < PROGRESS_WRITE_INTERVAL:
+            return
+        if _holds_sqlite_write_lock():
+            return
+        self.written_at = now
+        _update_job(self.job_id, progress=fraction)
+
+
+_progress = {}
+_progress_lock = Lock()
+
+
+def live_progress(job_id):
+    """
+    Progress of a job queued or running in this process.
+    
+    Parameters:
+        job_id (str): Job identifier
+        
+    Returns:
+        float: Fraction completed, or None if this process doesn't own the job
+    """
+    with _progress_lock:
+        return _progress.get(job_id)
+
+
+def fail_stale_jobs(timeout, job_id=None):
+    """
+    Mark queued or running jobs whose worker has gone away as failed.
+    
+    The worker pool lives inside one process, so a job owned by a worker
+    that restarted is never finished. A job counts as stale when its row
+    has not been written for timeout seconds; jobs owned by this process
+    are left alone.
+    
+    Parameters:
+        timeout (int): Seconds without a state or progress write
+        job_id (str, optional): Only check this job
+        
+    Returns:
+        int: Number of jobs marked as failed
+    """
+    table = ImportJob.__table__
+    with _progress_lock:
+        owned = list(_progress)
+    with db.engine.begin() as connection:
+        cutoff = connection.scalar(db.select(db.func.current_timestamp())) - timedelta(seconds=timeout)
+        stale = db.update(table).where(
+            table.c.status.in_(('queued', 'running')),
+            db.func.coalesce(table.c.updated_at, table.c.created_at) < cutoff
+        )
+        if job_id is not None:
+            stale = stale.where(table.c.id == job_id)
+        if owned:
+            stale = stale.where(table.c.id.not_in(owned))
+        return connection.execute(stale.values(
+            status='failed',
+            status_code=500,
+            error=STALE_JOB_ERROR,
+            finished_at=db.func.current_timestamp(),
+            updated_at=db.func.current_timestamp()
+        )).rowcount
+
+
+def recover_jobs(app):
+    """
+    Fail jobs left queued or running by workers that stopped, at startup.
+    
+    Skipped quietly when the import_jobs table is missing or out of date,
+    e.g. before /run/create or while flask db upgrade is running.
+    
+    Parameters:
+        app (Flask): Application whose database is checked
+    """
+    with app.app_context():
+        try:
+            fail_stale_jobs(app.config['IMPORT_JOB_TIMEOUT'])
+        except SQLAlchemyError:
+            db.session.rollback()
+
+
+def _run_job(app, job_id, func, args, cleanup):
+    """Execute a job inside its own application context and record the outcome"""
+    with app.app_context():
+        try:
+            started = _update_job(
+                job_id,
+                ImportJob.__table__.c.status == 'queued',
+                status='running',
+                started_at=db.func.current_timestamp()
+            )
+            if not started:
+                # Already failed as stale while it waited in the queue
+                return
+            body, status_code = func(*args, progress=JobProgress(job_id))
+            _update_job(
+                job_id,
+                status='succeeded' if status_code < 400 else 'failed',
+                progress=1,
+                status_code=status_code,
+                result=body,
+                finished_at=db.func.current_timestamp()
+            )
+        except Exception as e:
+            db.session.rollback()
+            _update_job(
+                job_id,
+                status='failed',
+                status_code=500,
+                error=str(e),
+                finished_at=db.func.current_timestamp()
+            )
+        finally:
+            with _progress_lock:
+                _progress.pop(job_id, None)
+            if cleanup:
+                cleanup()
+
+
+def submit_job(kind, func, *args, cleanup=None):
+    """
+    Queue an import to run on the background worker pool.
+    
+    Parameters:
+        kind (str): Job kind recorded on the ImportJob row
+        func (callable): Import function returning (body, status_code); it is
+            called with *args and a progress keyword argument
+        *args: Positional arguments for func
+        cleanup (callable, optional): Called once the job has finished
+        
+    Returns:
+        ImportJob: The queued job
+    """
+    app = current_app._get_current_object()
+    job = ImportJob(id=uuid4().hex, kind=kind, status='queued', progress=0)
+    db.session.add(job)
+    db.session.commit()
+    with _progress_lock:
+        _progress[job.id] = 0
+    _get_executor(app).submit(_run_job, app, job.id, func, args, cleanup)
+    return job
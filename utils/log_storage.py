@@ -0,0 +1,246 @@
+'''Compressed storage for raw battle log text'''
+
+import codecs
+import zlib
+from collections import Counter
+from threading import Lock
+from flask import current_app
+from init import db
+from models.battlelog import Battlelog
+from models.log_dictionary import LogDictionary
+
+# zlib only looks back 32KB, so a larger preset dictionary is wasted
+MAX_DICTIONARY_SIZE = 32 * 1024
+COMPRESSION_LEVEL = 9
+BUFFER_COMPRESSION_LEVEL = 1
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_dictionary_cache = {}
+_dictionary_lock = Lock()
+
+
+def build_dictionary(samples, size=MAX_DICTIONARY_SIZE):
+    """
+    Build a preset zlib dictionary from sample battle logs.
+    
+    Lines repeated across logs are packed into the dictionary with the most
+    common ones last, where zlib can reach them with the shortest distances.
+    
+    Parameters:
+        samples (iterable): Raw battle log texts
+        size (int): Maximum dictionary size in bytes
+        
+    Returns:
+        bytes: Dictionary contents
+    """
+    line_counts = Counter()
+    for sample in samples:
+        line_counts.update({line + '\n' for line in sample.split('\n') if line.strip()})
+
+    chosen = []
+    remaining = size
+    for line, count in line_counts.most_common():
+        if count < 2:
+            break
+        encoded = line.encode('utf-8')
+        if len(encoded) > remaining:
+            continue
+        chosen.append(encoded)
+        remaining -= len(encoded)
+
+    return b''.join(reversed(chosen))
+
+
+def compress_log(log_text, zdict=None):
+    """
+    Compress a raw battle log.
+    
+    Parameters:
+        log_text (str): Raw battle log text
+        zdict (bytes, optional): Preset dictionary
+        
+    Returns:
+        bytes: zlib stream
+    """
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=zdict) if zdict else zlib.compressobj(COMPRESSION_LEVEL)
+    return compressor.compress(log_text.encode('utf-8')) + compressor.flush()
+
+
+def iter_decompressed(data, zdict=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Decompress a stored battle log incrementally.
+    
+    Parameters:
+        data (bytes): zlib stream produced by compress_log
+        zdict (bytes, optional): Dictionary the stream was compressed with
+        chunk_size (int): Compressed bytes fed to zlib per step
+        
+    Yields:
+        bytes: UTF-8 encoded pieces of the original log
+    """
+    decompressor = zlib.decompressobj(zdict=zdict) if zdict else zlib.decompressobj()
+    for start in range(0, len(data), chunk_size):
+        piece = decompressor.decompress(data[start:start + chunk_size])
+        if piece:
+            yield piece
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+
+
+def get_dictionary(dictionary_id):
+    """
+    Fetch a preset dictionary, caching it since dictionaries never change.
+    
+    Parameters:
+        dictionary_id (int): LogDictionary primary key, or None
+        
+    Returns:
+        bytes: Dictionary contents, or None when no dictionary is used
+    """
+    if dictionary_id is None:
+        return None
+    with _dictionary_lock:
+        if dictionary_id in _dictionary_cache:
+            return _dictionary_cache[dictionary_id]
+    data = db.session.scalar(db.select(LogDictionary.data).where(LogDictionary.id == dictionary_id))
+    with _dictionary_lock:
+        _dictionary_cache[dictionary_id] = data
+    return data
+
+
+def latest_dictionary_id():
+    """Return the id of the newest preset dictionary, if any"""
+    return db.session.scalar(db.select(db.func.max(LogDictionary.id)))
+
+
+def compression_enabled():
+    """Whether new battle logs are stored compressed (BATTLELOG_STORAGE=zlib)"""
+    return current_app.config.get('BATTLELOG_STORAGE', 'text') == 'zlib'
+
+
+class RawLogWriter:
+    """
+    Accumulates a raw battle log as it is read, in the configured storage form.
+    
+    Each piece goes through an incremental UTF-8 decoder, which carries
+    characters split across pieces over to the next one and replaces
+    invalid bytes, and is then compressed straight away, so only compressed
+    bytes are held while the log is read. Compressed storage keeps that
+    stream; text storage decompresses it into the column's string once,
+    chunk by chunk, when the log is stored.
+    """
+
+    def __init__(self, dictionary_id=None):
+        self.compressed = compression_enabled()
+        zdict = None
+        if self.compressed:
+            if dictionary_id is None:
+                dictionary_id = latest_dictionary_id()
+            zdict = get_dictionary(dictionary_id)
+            self.dictionary_id = dictionary_id
+            level = COMPRESSION_LEVEL
+        else:
+            self.dictionary_id = None
+            # Only held until the log is stored, so favour speed over ratio
+            level = BUFFER_COMPRESSION_LEVEL
+        self._decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        self._compressor = zlib.compressobj(level, zdict=zdict) if zdict else zlib.compressobj(level)
+        self._chunks = []
+
+    def _compress(self, text):
+        """Compress a decoded piece of the log"""
+        if text:
+            piece = self._compressor.compress(text.encode('utf-8'))
+            if piece:
+                self._chunks.append(piece)
+
+    def write(self, data):
+        """
+        Append a piece of the log.
+        
+        Parameters:
+            data (bytes): UTF-8 encoded log text
+        """
+        self._compress(self._decoder.decode(data))
+
+    def store(self, battlelog, sha256):
+        """
+        Attach the accumulated log to a battlelog.
+        
+        Parameters:
+            battlelog (Battlelog): Battlelog being created
+            sha256 (str): Hex digest of the log, computed while it was read
+        """
+        self._compress(self._decoder.decode(b'', final=True))
+        self._chunks.append(self._compressor.flush())
+        data = b''.join(self._chunks)
+        self._chunks = []
+        if self.compressed:
+            battlelog.raw_log_compressed = data
+            battlelog.log_dictionary_id = self.dictionary_id
+            battlelog.raw_log = None
+        else:
+            decoder = codecs.getincrementaldecoder('utf-8')()
+            battlelog.raw_log = ''.join(decoder.decode(piece) for piece in iter_decompressed(data))
+        battlelog.raw_log_sha256 = sha256
+
+
+def store_raw_log(battlelog, log_text, dictionary_id=None):
+    """
+    Attach raw log text to a battlelog using the configured storage mode.
+    
+    Parameters:
+        battlelog (Battlelog): Battlelog being created
+        log_text (str): Raw battle log text
+        dictionary_id (int, optional): Dictionary to compress with; defaults to the newest
+    """
+    writer = RawLogWriter(dictionary_id)
+    writer.write(log_text.encode('utf-8'))
+    writer.store(battlelog, Battlelog.hash_log(log_text))
+
+
+def decode_raw_log(raw_log, raw_log_compressed, log_dictionary_id):
+    """
+    Return a battle log's full text from its stored columns.
+    
+    Parameters:
+        raw_log (str): Plain-text column value, or None
+        raw_log_compressed (bytes): Compressed column value, or None
+        log_dictionary_id (int): Dictionary the compressed value was built with
+        
+    Returns:
+        str: The original battle log text
+    """
+    if raw_log_compressed is not None:
+        return b''.join(iter_decompressed(raw_log_compressed, get_dictionary(log_dictionary_id))).decode('utf-8')
+    return raw_log or ''
+
+
+def iter_raw_log(battlelog_id):
+    """
+    Load a battlelog's raw text in whichever form it was stored.
+    
+    Parameters:
+        battlelog_id (int): Battlelog primary key
+        
+    Returns:
+        tuple: (chunks, etag) where chunks yields UTF-8 bytes, or None if not found
+    """
+    row = db.session.execute(
+        db.select(
+            Battlelog.raw_log,
+            Battlelog.raw_log_compressed,
+            Battlelog.log_dictionary_id,
+            Battlelog.raw_log_sha256
+        ).where(Battlelog.id == battlelog_id)
+    ).one_or_none()
+    if row is None:
+        return None
+
+    if row.raw_log_compressed is not None:
+        chunks = iter_decompressed(row.raw_log_compressed, get_dictionary(row.log_dictionary_id))
+    else:
+        raw_log = (row.raw_log or '').encode('utf-8')
+        chunks = (raw_log[start:start + STREAM_CHUNK_SIZE] for start in range(0, len(raw_log), STREAM_CHUNK_SIZE))
+    return chunks, row.raw_log_sha256
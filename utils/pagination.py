@@ -0,0 +1,121 @@
+'''Cursor-based keyset pagination for list endpoints'''
+
+from urllib.parse import urlencode
+from flask import request
+from marshmallow import ValidationError
+from init import db
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def keyset_requested():
+    """Check whether the client asked for a keyset page (?after= or ?limit=)"""
+    return 'after' in request.args or 'limit' in request.args
+
+
+def keyset_params():
+    """
+    Read and check the keyset query parameters.
+
+    Query Parameters:
+        after (int): Return rows after the row with this ID (default: start)
+        limit (int): Page size, 1 to MAX_LIMIT (default: DEFAULT_LIMIT)
+        count (bool): Also return the total number of matching rows
+
+    Returns:
+        tuple: (after, limit, with_count)
+
+    Raises:
+        ValidationError: If after or limit is not a valid integer
+    """
+    try:
+        after = int(request.args['after']) if request.args.get('after') else None
+        limit = int(request.args.get('limit') or DEFAULT_LIMIT)
+    except ValueError:
+        raise ValidationError('after and limit must be integers')
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValidationError(f'limit must be between 1 and {MAX_LIMIT}')
+    with_count = request.args.get('count', '').lower() in ('1', 'true', 'yes')
+    return after, limit, with_count
+
+
+def keyset_paginate(stmt, id_column, sort_column=None, scalars=True):
+    """
+    Fetch one keyset page of an ORM select, or every row if paging was not requested.
+
+    Rows are ordered by id_column, or by (sort_column, id_column) when a sort
+    column is given; the cursor is always the last row's ID. The page is read
+    with an indexed range scan instead of OFFSET, so deep pages cost the same
+    as the first one.
+
+    Parameters:
+        stmt (Select): Select of a single mapped entity, with any filters applied
+        id_column: The entity's primary key column
+        sort_column (optional): Column to order by before the ID
+        scalars (bool): Return ORM entities; pass False for a Core select of
+            columns, whose rows must include the ID labelled "id"
+
+    Returns:
+        tuple: (items, pagination) where pagination is a dict with limit,
+            next_after, has_more and optionally total, or None when the
+            request did not ask for a page
+
+    Raises:
+        ValidationError: If the paging parameters are invalid
+    """
+    fetch = db.session.scalars if scalars else db.session.execute
+    if not keyset_requested():
+        return fetch(stmt).all(), None
+
+    after, limit, with_count = keyset_params()
+    total = None
+    if with_count:
+        total = db.session.scalar(db.select(db.func.count()).select_from(stmt.order_by(None).subquery()))
+
+    order = [id_column] if sort_column is None else [sort_column, id_column]
+    page_stmt = stmt.order_by(None).order_by(*order)
+    if after is not None:
+        if sort_column is None:
+            page_stmt = page_stmt.where(id_column > after)
+        else:
+            after_sort = db.select(sort_column).where(id_column == after).scalar_subquery()
+            page_stmt = page_stmt.where(db.or_(
+                sort_column > after_sort,
+                db.and_(sort_column == after_sort, id_column > after)
+            ))
+
+    items = fetch(page_stmt.limit(limit + 1)).all()
+    has_more = len(items) > limit
+    items = items[:limit]
+    pagination = {
+        'limit': limit,
+        'next_after': items[-1].id if has_more else None,
+        'has_more': has_more
+    }
+    if total is not None:
+        pagination['total'] = total
+    return items, pagination
+
+
+def pagination_headers(pagination):
+    """
+    Describe a keyset page in response headers, for endpoints that return a bare list.
+
+    Parameters:
+        pagination (dict): Pagination metadata from keyset_paginate, or None
+
+    Returns:
+        dict: X-Next-After, X-Total-Count and Link headers as applicable
+    """
+    if not pagination:
+        return {}
+    headers = {}
+    if pagination['next_after'] is not None:
+        headers['X-Next-After'] = str(pagination['next_after'])
+        args = request.args.to_dict()
+        args.update(after=pagination['next_after'], limit=pagination['limit'])
+        headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    if 'total' in pagination:
+        headers['X-Total-Count'] = str(pagination['total'])
+    return headers
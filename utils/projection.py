@@ -0,0 +1,149 @@
+'''Sparse fieldsets (?fields=) and relationship control (?include=) for API responses'''
+
+from functools import lru_cache
+from flask import request
+from marshmallow import ValidationError
+from sqlalchemy.orm import joinedload, load_only, selectinload
+from models.card import Card
+from models.cardset import CardSet
+from models.deck import Deck
+from models.deckbox import DeckBox
+from schemas.card_schema import CardSchema
+from schemas.cardset_schema import CardSetSchema
+from schemas.deck_schema import DeckSchema
+from schemas.deckbox_schema import DeckBoxSchema
+
+
+# Per resource: schema, scalar columns, relationship loaders and the
+# relationships embedded when the client does not choose
+PROJECTIONS = {
+    'deck': {
+        'schema': DeckSchema,
+        'columns': {
+            'id': Deck.id,
+            'name': Deck.name,
+            'description': Deck.description,
+            'format_id': Deck.format_id,
+            'created_at': Deck.created_at,
+            'updated_at': Deck.updated_at
+        },
+        'relations': {
+            'deckbox': lambda: joinedload(Deck.deckbox),
+            'battlelogs': lambda: selectinload(Deck.battlelogs)
+        },
+        'default_include': ('deckbox', 'battlelogs')
+    },
+    'card': {
+        'schema': CardSchema,
+        'columns': {
+            'id': Card.id,
+            'name': Card.name,
+            'card_number': Card.card_number
+        },
+        'relations': {
+            'cardtype': lambda: joinedload(Card.cardtype),
+            'cardset': lambda: joinedload(Card.cardset)
+        },
+        'default_include': ('cardtype', 'cardset')
+    },
+    'cardset': {
+        'schema': CardSetSchema,
+        'columns': {
+            'id': CardSet.id,
+            'name': CardSet.name,
+            'release_date': CardSet.release_date
+        },
+        'relations': {
+            'cards': lambda: selectinload(CardSet.cards).joinedload(Card.cardtype)
+        },
+        'default_include': ('cards',)
+    },
+    'deckbox': {
+        'schema': DeckBoxSchema,
+        'columns': {
+            'id': DeckBox.id,
+            'name': DeckBox.name,
+            'description': DeckBox.description
+        },
+        'relations': {
+            'decks': lambda: selectinload(DeckBox.decks)
+        },
+        'default_include': ()
+    }
+}
+
+
+def _split(value):
+    """Parse a comma-separated query parameter into a frozenset of names"""
+    return frozenset(name.strip() for name in value.split(',') if name.strip())
+
+
+def request_fields(resource):
+    """
+    Work out which top-level fields the client asked for.
+
+    ?fields= limits the response to the named fields; ?include= picks the
+    relationships to embed. Without ?fields= every column is returned along
+    with the included relationships (or the resource's usual ones when
+    ?include= is absent as well).
+
+    Parameters:
+        resource (str): Key into PROJECTIONS
+
+    Returns:
+        frozenset: Field names to serialize
+
+    Raises:
+        ValidationError: If a requested field or relationship does not exist
+    """
+    spec = PROJECTIONS[resource]
+    fields = _split(request.args['fields']) if 'fields' in request.args else None
+    include = _split(request.args['include']) if 'include' in request.args else None
+
+    unknown = (fields or frozenset()) - spec['columns'].keys() - spec['relations'].keys()
+    unknown |= (include or frozenset()) - spec['relations'].keys()
+    if unknown:
+        raise ValidationError(f"Unknown fields for {resource}: {', '.join(sorted(unknown))}")
+
+    if fields is not None:
+        return fields | (include or frozenset())
+    relations = include if include is not None else frozenset(spec['default_include'])
+    return frozenset(spec['columns']) | relations
+
+
+def projection_options(resource, fields):
+    """
+    Loader options that fetch exactly what a projection serializes.
+
+    Only the selected columns are loaded (the primary key always is), and
+    each selected relationship is eager loaded so serializing a list never
+    falls back to a lazy load per row.
+
+    Parameters:
+        resource (str): Key into PROJECTIONS
+        fields (frozenset): Field names from request_fields()
+
+    Returns:
+        list: Options for Select.options()
+    """
+    spec = PROJECTIONS[resource]
+    columns = [column for name, column in spec['columns'].items() if name in fields]
+    options = [load_only(*columns)] if columns else []
+    options.extend(loader() for name, loader in spec['relations'].items() if name in fields)
+    return options
+
+
+@lru_cache(maxsize=256)
+def projected_schema(resource, fields, many=False):
+    """
+    Return a schema limited to the given fields, cached per combination.
+
+    Parameters:
+        resource (str): Key into PROJECTIONS
+        fields (frozenset): Field names from request_fields()
+        many (bool): Whether the schema serializes a list
+
+    Returns:
+        Schema: Schema instance with only= set to the fields
+    """
+    return PROJECTIONS[resource]['schema'](only=tuple(sorted(fields)), many=many)
@@ -0,0 +1,119 @@
+'''Per-request SQL query counting, timing headers and repeated-statement detection'''
+
+import re
+import time
+from collections import Counter
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from init import db
+
+DEFAULT_REPEAT_THRESHOLD = 10
+
+# Placeholder lists such as (?, ?, ?) or (%(id_1)s, %(id_2)s) from expanded IN clauses
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class RepeatedQueryError(Exception):
+    """Raised in test mode when one statement shape repeats too often in a request"""
+
+
+def statement_shape(statement):
+    """
+    Normalise SQL so executions that differ only in parameters compare equal.
+
+    Parameters:
+        statement (str): SQL as sent to the driver
+
+    Returns:
+        str: The statement with whitespace collapsed and IN lists reduced to (?)
+    """
+    return _PLACEHOLDER_LIST.sub('(?)', _WHITESPACE.sub(' ', statement).strip())
+
+
+def _stats():
+    """The current request's query statistics, created on first use"""
+    if 'query_stats' not in g:
+        g.query_stats = {'count': 0, 'seconds': 0.0, 'shapes': Counter()}
+    return g.query_stats
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context so a statement that raises leaves nothing behind
+    if has_request_context() and context is not None:
+        context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, '_query_start', None)
+    if start is None or not has_request_context():
+        return
+    elapsed = time.perf_counter() - start
+    stats = _stats()
+    stats['count'] += 1
+    stats['seconds'] += elapsed
+    stats['shapes'][statement_shape(statement)] += 1
+
+
+def _start_request():
+    g.request_start = time.perf_counter()
+    _stats()
+
+
+def _report_repeats(app, label, stats):
+    """Warn about, or in test mode raise for, statement shapes repeated too often"""
+    threshold = app.config['QUERY_REPEAT_THRESHOLD']
+    repeated = [(shape, count) for shape, count in stats['shapes'].most_common() if count > threshold]
+    for shape, count in repeated:
+        message = f'{label} ran the same statement {count} times: {shape[:300]}'
+        if app.config['QUERY_REPEAT_RAISE'] or app.testing:
+            raise RepeatedQueryError(message)
+        app.logger.warning(message)
+
+
+def _finish_request(response):
+    """Attach the query headers and report statements that repeated too often"""
+    stats = _stats()
+    app = current_app._get_current_object()
+    label = f'{request.method} {request.path}'
+
+    if response.is_streamed:
+        # Most of a streamed response's queries run while the body is sent, after
+        # the headers, so skip the headers and check repeats once the body is done
+        response.call_on_close(lambda: _report_repeats(app, label, stats))
+        return response
+
+    total_ms = (time.perf_counter() - g.get('request_start', time.perf_counter())) * 1000
+    db_ms = stats['seconds'] * 1000
+    response.headers['X-Query-Count'] = str(stats['count'])
+    response.headers['Server-Timing'] = (
+        f'db;dur={db_ms:.2f};desc="{stats["count"]} queries", total;dur={total_ms:.2f}'
+    )
+    _report_repeats(app, label, stats)
+    return response
+
+
+def init_query_counter(app):
+    """
+    Count the SQL statements each request runs and flag likely N+1 patterns.
+
+    Every buffered response gets X-Query-Count and a Server-Timing header
+    with the database time and total request time. Streamed responses get
+    no headers, since their queries run after the headers are sent, but
+    are still checked once the body is complete. When one statement shape
+    runs more than QUERY_REPEAT_THRESHOLD times in a request a warning is
+    logged, or RepeatedQueryError is raised when QUERY_REPEAT_RAISE is set
+    or the app is in testing mode. Queries outside a request are not counted.
+
+    Parameters:
+        app (Flask): Application whose engines and requests to instrument
+    """
+    app.config.setdefault('QUERY_REPEAT_THRESHOLD', DEFAULT_REPEAT_THRESHOLD)
+    app.config.setdefault('QUERY_REPEAT_RAISE', False)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
@@ -0,0 +1,79 @@
+'''Checks that every foreign key is backed by an index'''
+
+from sqlalchemy import UniqueConstraint, inspect
+
+
+def _covered(columns, indexed):
+    """Check whether columns are the leading columns of any index in indexed"""
+    return any(tuple(index[:len(columns)]) == tuple(columns) for index in indexed)
+
+
+def model_indexes(table):
+    """
+    List the column tuples a table's model declares as indexed, in index order.
+
+    Parameters:
+        table (Table): Table from the models' metadata
+
+    Returns:
+        list: Tuples of column names for the primary key, indexes and unique constraints
+    """
+    indexed = [tuple(column.name for column in table.primary_key.columns)]
+    indexed += [tuple(column.name for column in index.columns) for index in table.indexes]
+    indexed += [
+        tuple(column.name for column in constraint.columns)
+        for constraint in table.constraints
+        if isinstance(constraint, UniqueConstraint)
+    ]
+    return indexed
+
+
+def database_indexes(inspector, table_name):
+    """
+    List the column tuples indexed in the live database for one table.
+
+    Parameters:
+        inspector (Inspector): Inspector bound to the database
+        table_name (str): Table to read
+
+    Returns:
+        list: Tuples of column names for the primary key, indexes and unique constraints
+    """
+    indexed = [tuple(inspector.get_pk_constraint(table_name)['constrained_columns'])]
+    indexed += [tuple(index['column_names']) for index in inspector.get_indexes(table_name)]
+    indexed += [tuple(constraint['column_names']) for constraint in inspector.get_unique_constraints(table_name)]
+    return indexed
+
+
+def missing_fk_indexes(metadata, bind=None):
+    """
+    Find foreign keys whose columns are not the leading columns of any index.
+
+    An index on (deck_id, card_id) covers a foreign key on deck_id but not
+    one on card_id. With a bind, the live database's indexes are checked
+    instead of the ones declared on the models, which catches databases
+    that have not been migrated.
+
+    Parameters:
+        metadata (MetaData): Models' metadata, e.g. db.metadata
+        bind (Engine, optional): Database to inspect instead of the models
+
+    Returns:
+        list: (table, columns, referenced table) for each uncovered foreign key
+    """
+    inspector = inspect(bind) if bind is not None else None
+    existing = set(inspector.get_table_names()) if inspector is not None else None
+
+    missing = []
+    for table in metadata.sorted_tables:
+        if existing is not None and table.name not in existing:
+            continue
+        if inspector is not None:
+            indexed = database_indexes(inspector, table.name)
+        else:
+            indexed = model_indexes(table)
+        for constraint in table.foreign_key_constraints:
+            columns = tuple(column.name for column in constraint.columns)
+            if not _covered(columns, indexed):
+                missing.append((table.name, columns, constraint.referred_table.name))
+    return missing
@@ -0,0 +1,41 @@
+'''Helpers for streaming API results as newline-delimited JSON'''
+
+from flask import Response, request, stream_with_context
+from utils.fast_serializer import dumps
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def wants_ndjson():
+    """
+    Check whether the client asked for an NDJSON stream.
+    
+    Either an Accept header preferring application/x-ndjson or ?stream=true
+    selects streaming.
+    
+    Returns:
+        bool: True if results should be streamed as NDJSON
+    """
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    # JSON is listed first so it wins ties such as */*
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def ndjson_response(items):
+    """
+    Stream an iterable of JSON-serialisable objects, one per line.
+    
+    The iterable is consumed inside the request context so it can keep
+    reading from the database session while the response is sent.
+    
+    Parameters:
+        items (iterable): Dicts to serialise; dates are written in ISO format
+        
+    Returns:
+        Response: Streaming application/x-ndjson response
+    """
+    def generate():
+        for item in items:
+            yield dumps(item) + b'\n'
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
@@ -0,0 +1,295 @@
+'''Deterministic synthetic data for load testing and benchmarks'''
+
+import glob
+import os
+import random
+import re
+from datetime import date, datetime, timedelta
+from init import db
+from models.battle_event import insert_battle_events
+from models.battlelog import Battlelog
+from models.card import Card
+from models.card_legality import refresh_card_legality
+from models.cardset import CardSet
+from models.cardtype import CardType
+from models.deck import Deck
+from models.deck_battle_stats import rebuild_deck_battle_stats
+from models.deck_rating_stats import rebuild_deck_rating_stats
+from models.deckbox import DeckBox
+from models.deckcard import DeckCard
+from models.format import Format
+from models.rating import Rating
+from utils.battlelog_parser import parse_battle_events
+from utils.log_storage import compress_log, compression_enabled, get_dictionary, latest_dictionary_id
+
+TEMPLATE_GLOB = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'raw_import_data', '*battlelog*.txt')
+INSERT_BATCH_SIZE = 5000
+DECKS_PER_BOX = 100
+BASE_TIME = datetime(2024, 1, 1)
+
+CARD_TYPES = ['Pokemon', 'Trainer', 'Energy']
+SYLLABLES = ['char', 'zard', 'pika', 'chu', 'mew', 'two', 'gen', 'gar', 'dra', 'gon', 'ite', 'lu', 'gia',
+             'ray', 'quaza', 'sab', 'leye', 'dusk', 'nox', 'roar', 'ing', 'moon', 'iron', 'val', 'iant']
+SUFFIXES = ['', '', '', ' ex', ' V', ' VSTAR', ' VMAX', ' GX']
+TRAINER_NAMES = ['Ball', 'Researcher', 'Orders', 'Vessel', 'Stretcher', 'Candy', 'Switch', 'Catcher']
+ENERGY_NAMES = ['Grass', 'Fire', 'Water', 'Lightning', 'Psychic', 'Fighting', 'Darkness', 'Metal']
+FORMATS = [
+    ('Standard', 'Current sets from Sword & Shield forward', date(2023, 9, 1)),
+    ('Expanded', 'Black & White forward', date(2011, 4, 6)),
+    ('Unlimited', 'All cards from all sets', date(1996, 1, 9))
+]
+OPENING_HAND = re.compile(r'^(\S+) drew 7 cards for the opening hand\.', re.MULTILINE)
+
+
+def _batches(rows, size=INSERT_BATCH_SIZE):
+    """Group an iterable of rows into lists of at most size"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(session, model, rows):
+    """Core executemany insert of rows in batches; returns the number inserted"""
+    table = model.__table__
+    count = 0
+    for batch in _batches(rows):
+        session.execute(table.insert(), batch)
+        count += len(batch)
+    return count
+
+
+def _insert_returning_ids(session, model, rows):
+    """Insert rows in batches and return their new IDs in row order"""
+    table = model.__table__
+    ids = []
+    for batch in _batches(rows):
+        stmt = table.insert().returning(table.c.id, sort_by_parameter_order=True)
+        ids.extend(session.execute(stmt, batch).scalars())
+    return ids
+
+
+def _ensure_lookup(session, model, rows):
+    """Return {name: id} for a small lookup table, inserting the given rows if it is empty"""
+    existing = dict(session.execute(db.select(model.name, model.id)).all())
+    if not existing:
+        _insert(session, model, rows)
+        existing = dict(session.execute(db.select(model.name, model.id)).all())
+    return existing
+
+
+def _card_name(rng, card_type):
+    """Build a plausible card name for a card type"""
+    if card_type == 'Energy':
+        return f'Basic {rng.choice(ENERGY_NAMES)} Energy'
+    if card_type == 'Trainer':
+        return f'{rng.choice(SYLLABLES).title()}{rng.choice(SYLLABLES)} {rng.choice(TRAINER_NAMES)}'
+    parts = rng.randint(2, 3)
+    return ''.join(rng.choice(SYLLABLES) for _ in range(parts)).title() + rng.choice(SUFFIXES)
+
+
+def _deck_quantities(rng, distinct):
+    """Split sixty cards over a number of distinct entries"""
+    distinct = max(1, min(distinct, 60))
+    quantities = [1] * distinct
+    for _ in range(60 - distinct):
+        quantities[rng.randrange(distinct)] += 1
+    return quantities
+
+
+def load_templates():
+    """
+    Read the battle log templates and the player names they use.
+
+    Returns:
+        list: (text, players) tuples where players are the names found on
+            the opening hand lines
+    """
+    templates = []
+    for path in sorted(glob.glob(TEMPLATE_GLOB)):
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        players = list(dict.fromkeys(OPENING_HAND.findall(text)))
+        templates.append((text, players))
+    return templates
+
+
+def seed_synthetic(session, sets=200, cards=50000, decks=500000, deckcards=30000000,
+                   battlelogs=5000000, ratings=10000000, seed=0, progress=None):
+    """
+    Generate a reproducible catalog, deck library, battle logs and ratings.
+
+    Rows are written with Core executemany inserts in batches of
+    INSERT_BATCH_SIZE and committed per table, bypassing the ORM and its
+    flush listeners; derived tables (card legality, battle and rating
+    statistics) are rebuilt once at the end. Battle logs are stored the way
+    the importer stores them: compressed with the newest dictionary when
+    BATTLELOG_STORAGE=zlib, and with their parsed battle events. The same
+    seed and volumes on an empty database always produce the same data.
+
+    Parameters:
+        session: Session to write through; committed after each table
+        sets (int): Card sets to create
+        cards (int): Cards to create, spread over the sets
+        decks (int): Decks to create, in deck boxes of DECKS_PER_BOX
+        deckcards (int): Total deck card rows, split evenly over the decks (at most 60 each)
+        battlelogs (int): Battle logs built from the raw_import_data templates,
+            each with the battle events parsed from its template
+        ratings (int): Ratings spread over the decks
+        seed (int): Random seed
+        progress (callable, optional): Called with a message after each table
+
+    Returns:
+        dict: Number of rows inserted per table
+    """
+    rng = random.Random(seed)
+    report = progress or (lambda message: None)
+    counts = {}
+
+    format_ids = list(_ensure_lookup(session, Format, [
+        {'name': name, 'description': description, 'start_date': start_date}
+        for name, description, start_date in FORMATS
+    ]).values())
+    type_ids = _ensure_lookup(session, CardType, [{'name': name} for name in CARD_TYPES])
+    type_names = [name for name in CARD_TYPES if name in type_ids] or list(type_ids)
+    # Mostly Pokemon, then trainers, then energy, when the default types are present
+    type_weights = [6, 3, 1] if type_names == CARD_TYPES else None
+    session.commit()
+
+    first_release = date(1999, 1, 9)
+    span = (date(2025, 1, 1) - first_release).days
+    set_ids = _insert_returning_ids(session, CardSet, (
+        {
+            'name': f'Synthetic {seed}-{index:05d}',
+            'release_date': first_release + timedelta(days=span * index // max(sets, 1)),
+            'description': 'Generated by seed-synthetic'
+        }
+        for index in range(sets)
+    ))
+    counts['cardsets'] = len(set_ids)
+    session.commit()
+    report(f'Inserted {len(set_ids)} card sets')
+
+    def card_rows():
+        taken = set()
+        for index in range(cards):
+            card_type = rng.choices(type_names, weights=type_weights)[0]
+            cardset_id = set_ids[index % len(set_ids)]
+            card_number = str(index // len(set_ids) + 1)
+            name = _card_name(rng, card_type)
+            # A set holds one card per name; numbers are unique within a set
+            if (name, cardset_id) in taken:
+                name = f'{name} {card_number}'
+            taken.add((name, cardset_id))
+            yield {
+                'name': name,
+                'cardtype_id': type_ids[card_type],
+                'cardset_id': cardset_id,
+                'card_number': card_number
+            }
+    card_ids = _insert_returning_ids(session, Card, card_rows()) if set_ids else []
+    card_names = dict(session.execute(db.select(Card.id, Card.name).where(Card.id.in_(card_ids[:1000]))).all())
+    counts['cards'] = len(card_ids)
+    session.commit()
+    report(f'Inserted {len(card_ids)} cards')
+
+    box_ids = _insert_returning_ids(session, DeckBox, (
+        {'name': f'Synthetic Box {index}', 'description': 'Generated by seed-synthetic'}
+        for index in range(-(-decks // DECKS_PER_BOX))
+    ))
+    counts['deckboxes'] = len(box_ids)
+
+    def deck_rows():
+        for index in range(decks):
+            created = BASE_TIME + timedelta(minutes=index)
+            yield {
+                'name': f'Deck {index}',
+                'description': 'Generated by seed-synthetic',
+                'format_id': rng.choice(format_ids),
+                'deckbox_id': box_ids[index // DECKS_PER_BOX],
+                'created_at': created,
+                'updated_at': created,
+                'content_version': 0
+            }
+    deck_ids = _insert_returning_ids(session, Deck, deck_rows())
+    counts['decks'] = len(deck_ids)
+    session.commit()
+    report(f'Inserted {len(deck_ids)} decks')
+
+    per_deck = min(deckcards // max(len(deck_ids), 1), 60, len(card_ids))
+
+    def deckcard_rows():
+        for deck_id in deck_ids:
+            chosen = rng.sample(card_ids, per_deck)
+            for card_id, quantity in zip(chosen, _deck_quantities(rng, per_deck)):
+                yield {'deck_id': deck_id, 'card_id': card_id, 'quantity': quantity}
+    counts['deckcards'] = _insert(session, DeckCard, deckcard_rows()) if per_deck else 0
+    session.commit()
+    report(f"Inserted {counts['deckcards']} deck cards")
+
+    templates = load_templates()
+    template_events = [parse_battle_events(text) for text, _ in templates]
+    name_pool = list(card_names.values()) or ['Synthetic Card']
+    compressed = compression_enabled()
+    dictionary_id = latest_dictionary_id() if compressed else None
+    zdict = get_dictionary(dictionary_id)
+
+    def battlelog_rows():
+        for index in range(battlelogs):
+            template = index % len(templates)
+            text, players = templates[template]
+            # The opponent name is unique per log so every log hashes differently
+            replacements = dict(zip(players, [f'Player{rng.randrange(1000)}', f'Rival{index}']))
+            if replacements:
+                text = re.sub('|'.join(map(re.escape, replacements)), lambda m: replacements[m.group(0)], text)
+            row = {
+                'deck_id': rng.choice(deck_ids),
+                'win_loss': rng.random() < 0.5,
+                'total_turns': rng.randint(4, 30),
+                'most_used_cards': rng.sample(name_pool, min(3, len(name_pool))),
+                'key_synergy_cards': [rng.sample(name_pool, min(2, len(name_pool)))],
+                'raw_log': None if compressed else text,
+                'raw_log_compressed': compress_log(text, zdict) if compressed else None,
+                'log_dictionary_id': dictionary_id,
+                'raw_log_sha256': Battlelog.hash_log(text),
+                'created_at': BASE_TIME + timedelta(seconds=index)
+            }
+            events = [
+                dict(event, player=replacements.get(event['player'], event['player']))
+                for event in template_events[template]
+            ]
+            yield row, events
+
+    counts['battlelogs'] = counts['battle_events'] = 0
+    if templates and deck_ids:
+        for batch in _batches(battlelog_rows()):
+            battlelog_ids = _insert_returning_ids(session, Battlelog, [row for row, _ in batch])
+            counts['battle_events'] += insert_battle_events(session, {
+                battlelog_id: events for battlelog_id, (_, events) in zip(battlelog_ids, batch)
+            })
+            counts['battlelogs'] += len(battlelog_ids)
+    session.commit()
+    report(f"Inserted {counts['battlelogs']} battle logs with {counts['battle_events']} battle events")
+
+    def rating_rows():
+        for index in range(ratings):
+            yield {
+                'deck_id': rng.choice(deck_ids),
+                'score': rng.choices([1, 2, 3, 4, 5], weights=[1, 2, 4, 5, 3])[0],
+                'comment': None,
+                'created_at': BASE_TIME + timedelta(seconds=index)
+            }
+    counts['ratings'] = _insert(session, Rating, rating_rows()) if deck_ids else 0
+    session.commit()
+    report(f"Inserted {counts['ratings']} ratings")
+
+    refresh_card_legality(session)
+    rebuild_deck_battle_stats(session)
+    rebuild_deck_rating_stats(session)
+    session.commit()
+    report('Rebuilt card legality, battle and rating statistics')
+    return counts